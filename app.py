@@ -1,24 +1,80 @@
 from flask import Flask, render_template, request, jsonify ,flash ,redirect ,url_for
 from flask_cors import CORS
-import sqlite3
+import uuid
 from datetime import datetime
 import sys
 from pathlib import Path
+import numpy as np
 from config import Config
-from ml_models.predict import predict_crop
+import db
+from migrations import migrate
+from pagination import (paginate, clamp_per_page, NEWS_ORDER, SCHEMES_ORDER,
+                        PRODUCT_ORDERS, MARKET_ORDER)
+from ml_models.predict import (predict_crop, predict_crops, sweep_crops, validate_inputs,
+                               get_model_info, get_crop_classes, FEATURES, MODEL_TIERS)
+from ml_models.similar_profiles import similar_profiles
 from scraping.news_scraper import scrape_farmer_news
 from scraping.pesticide_scraper import scrape_pesticides, scrape_equipment
+from services.prediction_writer import (prediction_writer, prediction_timestamp,
+                                        INSERT_PREDICTION_SQL)
+from services.news_search import search_news, count_news
+from services.analytics import crop_distribution, nutrient_stats, prediction_trends
+from services.facet_cache import price_facets
+from services.price_index import price_index
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+db.init_app(app)
+
+# Bring an existing database up to the current schema
+if Config.DATABASE_PATH.exists():
+    migrate()
 
 # Database helper
 def get_db_connection():
-    """Create database connection"""
-    conn = sqlite3.connect(Config.DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """This thread's shared database connection (do not close it)"""
+    return db.get_connection()
+
+def save_predictions(rows):
+    """Insert (N, P, K, temperature, humidity, ph, rainfall, crop, confidence, uid) rows in one transaction"""
+    if not rows:
+        return
+    stamp = prediction_timestamp()
+    conn = get_db_connection()
+    with conn:
+        conn.executemany(INSERT_PREDICTION_SQL, [tuple(row) + (stamp,) for row in rows])
+
+def _top_k(data):
+    """Read the number of ranked crops to return from ?k= or the JSON body, clamped to MAX_TOP_K"""
+    k = request.args.get('k', type=int)
+    if k is None and isinstance(data, dict):
+        try:
+            k = int(data.get('k', 1))
+        except (TypeError, ValueError):
+            k = 1
+    return max(1, min(k or 1, Config.MAX_TOP_K))
+
+def _tier(data):
+    """Read the model tier hint from ?tier= or the JSON body; None means Config.MODEL_TIER"""
+    tier = request.args.get('tier')
+    if tier is None and isinstance(data, dict):
+        tier = data.get('tier')
+    return tier if tier in MODEL_TIERS else None
+
+def _explain(data):
+    """True if ?explain=1 or the JSON body asks for feature contributions"""
+    flag = request.args.get('explain')
+    if flag is None and isinstance(data, dict):
+        flag = data.get('explain')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def _to_float(value):
+    """Convert a JSON value to float, NaN if missing or not numeric"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
 
 # ============= ROUTES =============
 
@@ -35,30 +91,36 @@ def crop_recommendation():
 @app.route('/news')
 def news():
     """News aggregator page"""
-    page = request.args.get('page', 1, type=int)
+    page = max(1, request.args.get('page', 1, type=int))
     per_page = Config.NEWS_PER_PAGE
+    q = request.args.get('q', '').strip()
     
     conn = get_db_connection()
     
-    # Get total count
-    total = conn.execute('SELECT COUNT(*) FROM news_articles').fetchone()[0]
-    
-    # Get paginated news
-    offset = (page - 1) * per_page
-    news_articles = conn.execute('''
-        SELECT * FROM news_articles 
-        ORDER BY scraped_at DESC 
-        LIMIT ? OFFSET ?
-    ''', (per_page, offset)).fetchall()
-    
-    conn.close()
+    if q:
+        # Full-text search, best matches first (page numbers only)
+        total = count_news(q, conn)
+        news_articles = search_news(q, per_page, (page - 1) * per_page, conn)
+        next_cursor = prev_cursor = None
+    else:
+        # Get total count
+        total = conn.execute('SELECT COUNT(*) FROM news_articles').fetchone()[0]
+        
+        # Get paginated news (?cursor= from the Next/Previous links, else ?page=)
+        news_articles, page, next_cursor, prev_cursor = paginate(
+            conn, 'news_articles', NEWS_ORDER, per_page,
+            cursor=request.args.get('cursor'), page=page
+        )
     
     total_pages = (total + per_page - 1) // per_page
     
     return render_template('news.html', 
                          news=news_articles, 
+                         q=q,
                          page=page, 
-                         total_pages=total_pages)
+                         total_pages=total_pages,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor)
 
 # app.py - MODIFIED /products route with search
 
@@ -86,11 +148,11 @@ def search_products():
     conn = get_db_connection()
     
     if keyword:
-        query = "SELECT * FROM search_products WHERE keyword = ?"
+        where = ["keyword = ?"]
         count_query = "SELECT COUNT(*) FROM search_products WHERE keyword = ?"
         params = [keyword]
     else:
-        query = "SELECT * FROM search_products"
+        where = []
         count_query = "SELECT COUNT(*) FROM search_products"
         params = []
     
@@ -98,23 +160,14 @@ def search_products():
     total = conn.execute(count_query, params).fetchone()[0]
     total_pages = max(1, (total + per_page - 1) // per_page)
     
-    # Add sorting logic
-    if sort_by == 'low_to_high':
-        # Sort by price ascending (extract numeric price)
-        query += " ORDER BY CAST(REPLACE(REPLACE(price, '₹', ''), ',', '') AS INTEGER) ASC"
-    elif sort_by == 'high_to_low':
-        # Sort by price descending
-        query += " ORDER BY CAST(REPLACE(REPLACE(price, '₹', ''), ',', '') AS INTEGER) DESC"
-    else:
-        # Default: newest first
-        query += " ORDER BY scraped_at DESC"
-    
-    # Add pagination
-    query += " LIMIT ? OFFSET ?"
-    params.extend([per_page, (page - 1) * per_page])
+    # Sorting: numeric price (unpriced items last) or newest first
+    if sort_by not in PRODUCT_ORDERS:
+        sort_by = 'newest'
     
-    products_list = conn.execute(query, params).fetchall()
-    conn.close()
+    products_list, page, next_cursor, prev_cursor = paginate(
+        conn, 'search_products', PRODUCT_ORDERS[sort_by], per_page, where, params,
+        cursor=request.args.get('cursor'), page=page
+    )
     
     return render_template(
         'search_products.html',
@@ -122,7 +175,9 @@ def search_products():
         keyword=keyword,
         sort_by=sort_by,
         page=page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
     )
 
 
@@ -131,12 +186,8 @@ def analytics():
     """Analytics dashboard page"""
     conn = get_db_connection()
     
-    # Get crop distribution from predictions
-    crop_dist = conn.execute('''
-        SELECT predicted_crop, COUNT(*) as count 
-        FROM user_predictions 
-        GROUP BY predicted_crop
-    ''').fetchall()
+    # Get crop distribution from predictions (rollup table)
+    crop_dist = crop_distribution(conn)
     
     # Get recent predictions
     recent_predictions = conn.execute('''
@@ -145,21 +196,9 @@ def analytics():
         LIMIT 10
     ''').fetchall()
     
-    # Get average nutrient values by crop from dataset
-    avg_nutrients = conn.execute('''
-        SELECT label, 
-               AVG(N) as avg_n, 
-               AVG(P) as avg_p, 
-               AVG(K) as avg_k,
-               AVG(temperature) as avg_temp,
-               AVG(humidity) as avg_humidity,
-               AVG(ph) as avg_ph,
-               AVG(rainfall) as avg_rainfall
-        FROM crops_data 
-        GROUP BY label
-    ''').fetchall()
+    # Get average nutrient values by crop from dataset (materialised at load time)
+    avg_nutrients = nutrient_stats(conn)
     
-    conn.close()
     
     return render_template('analytics.html',
                          crop_dist=crop_dist,
@@ -183,28 +222,26 @@ def api_predict():
         ph = float(data.get('ph'))
         rainfall = float(data.get('rainfall'))
         
-        # Validate inputs
-        if not all([N >= 0, P >= 0, K >= 0, temperature >= -10, 
-                   humidity >= 0, humidity <= 100, ph >= 0, ph <= 14, rainfall >= 0]):
+        # Validate inputs against FEATURE_LIMITS
+        invalid = validate_inputs([[N, P, K, temperature, humidity, ph, rainfall]])[0]
+        if invalid.any():
+            bad = [f for f, flag in zip(FEATURES, invalid) if flag]
             return jsonify({
                 'success': False,
-                'error': 'Invalid input values'
+                'error': 'Invalid input values: ' + ', '.join(bad)
             }), 400
         
-        # Get prediction
-        result = predict_crop(N, P, K, temperature, humidity, ph, rainfall)
+        # Get prediction (plus k-1 ranked alternatives)
+        result = predict_crop(N, P, K, temperature, humidity, ph, rainfall,
+                              k=_top_k(data), tier=_tier(data), explain=_explain(data))
         
         if result['success']:
-            # Save to database
-            conn = get_db_connection()
-            conn.execute('''
-                INSERT INTO user_predictions 
-                (N, P, K, temperature, humidity, ph, rainfall, predicted_crop, confidence)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (N, P, K, temperature, humidity, ph, rainfall, 
-                  result['crop'], result['confidence']))
-            conn.commit()
-            conn.close()
+            # Clients send this id back to /api/predict/feedback
+            result['prediction_id'] = uuid.uuid4().hex
+            # Queue for the background writer
+            prediction_writer.submit((N, P, K, temperature, humidity, ph, rainfall,
+                                      result['crop'], result['confidence'],
+                                      result['prediction_id']))
         
         return jsonify(result)
     
@@ -214,31 +251,224 @@ def api_predict():
             'error': str(e)
         }), 500
 
+@app.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
+    """Score many soil samples in one call"""
+    try:
+        data = request.get_json(silent=True) or {}
+        samples = data.get('samples') if isinstance(data, dict) else data
+        
+        if not isinstance(samples, list) or not samples:
+            return jsonify({
+                'success': False,
+                'error': 'Expected a non-empty "samples" list'
+            }), 400
+        
+        if len(samples) > Config.MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'Too many samples (max {Config.MAX_BATCH_SIZE})'
+            }), 400
+        
+        X = np.array([
+            [_to_float(s.get(f)) if isinstance(s, dict) else float('nan') for f in FEATURES]
+            for s in samples
+        ])
+        
+        # Validate all rows at once
+        invalid = validate_inputs(X)
+        valid_rows = ~invalid.any(axis=1)
+        
+        predictions = iter(predict_crops(X[valid_rows], k=_top_k(data), tier=_tier(data),
+                                         explain=_explain(data)))
+        
+        results = []
+        to_save = []
+        for i, ok in enumerate(valid_rows):
+            if not ok:
+                bad = [f for f, flag in zip(FEATURES, invalid[i]) if flag]
+                results.append({
+                    'index': i,
+                    'success': False,
+                    'error': 'Invalid input values: ' + ', '.join(bad)
+                })
+                continue
+            
+            result = next(predictions)
+            result['index'] = i
+            result['prediction_id'] = uuid.uuid4().hex
+            results.append(result)
+            to_save.append(tuple(X[i].tolist()) + (result['crop'], result['confidence'],
+                                                   result['prediction_id']))
+        
+        save_predictions(to_save)
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'valid': len(to_save),
+            'results': results
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/predict/sweep', methods=['POST'])
+def api_predict_sweep():
+    """
+    What-if grid: vary one or two inputs of a base profile
+    
+    Body: {"base": {N, P, K, ...}, "sweep": [{"feature": "N", "min": 0,
+    "max": 140, "steps": 30}, ...], "tier": optional}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        base = data.get('base') or {}
+        sweep = data.get('sweep')
+        
+        base = {f: _to_float(base.get(f)) for f in FEATURES}
+        if not isinstance(sweep, list) or not sweep:
+            return jsonify({
+                'success': False,
+                'error': 'Expected a non-empty "sweep" list'
+            }), 400
+        
+        axes = []
+        for axis in sweep:
+            if not isinstance(axis, dict) or 'min' not in axis or 'max' not in axis:
+                raise ValueError('Each sweep entry needs feature, min, max and steps')
+            feature = axis.get('feature')
+            steps = int(axis.get('steps', 20))
+            if not 2 <= steps <= Config.SWEEP_MAX_STEPS:
+                raise ValueError(f'steps must be between 2 and {Config.SWEEP_MAX_STEPS}')
+            axes.append((feature, np.linspace(float(axis['min']), float(axis['max']), steps)))
+            # Swept features do not need a base value
+            if feature in base and np.isnan(base[feature]):
+                base[feature] = float(axis['min'])
+        
+        return jsonify(sweep_crops(base, axes, tier=_tier(data)))
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/predict/feedback', methods=['POST'])
+def api_predict_feedback():
+    """Record the crop a farmer actually grew for an earlier prediction"""
+    try:
+        data = request.get_json(silent=True) or {}
+        prediction_id = str(data.get('prediction_id') or '').strip()
+        crop = str(data.get('crop') or '').strip().lower()
+        
+        if not prediction_id or not crop:
+            return jsonify({
+                'success': False,
+                'error': 'prediction_id and crop are required'
+            }), 400
+        
+        if crop not in get_crop_classes():
+            return jsonify({
+                'success': False,
+                'error': f'Unknown crop: {crop}'
+            }), 400
+        
+        # prediction_ids are uuid4 hex; anything else cannot be waited for
+        is_uid = len(prediction_id) == 32 and all(c in '0123456789abcdef' for c in prediction_id)
+        
+        # Waits for the row if a write-behind buffer (here or in another worker) still holds it
+        if not is_uid or not prediction_writer.confirm(prediction_id, crop):
+            return jsonify({
+                'success': False,
+                'error': 'Prediction not found'
+            }), 404
+        
+        return jsonify({'success': True, 'prediction_id': prediction_id, 'crop': crop})
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/similar-profiles', methods=['POST'])
+def api_similar_profiles():
+    """Nearest labelled crops_data samples to a soil/weather profile"""
+    try:
+        data = request.get_json(silent=True) or {}
+        X = np.array([[_to_float(data.get(f)) for f in FEATURES]])
+        
+        invalid = validate_inputs(X)[0]
+        if invalid.any():
+            bad = [f for f, flag in zip(FEATURES, invalid) if flag]
+            return jsonify({
+                'success': False,
+                'error': 'Invalid input values: ' + ', '.join(bad)
+            }), 400
+        
+        k = request.args.get('k', type=int)
+        if k is None:
+            try:
+                k = int(data.get('k', Config.SIMILAR_DEFAULT_K))
+            except (TypeError, ValueError):
+                k = Config.SIMILAR_DEFAULT_K
+        k = max(1, min(k, Config.SIMILAR_MAX_K))
+        
+        return jsonify({
+            'success': True,
+            'k': k,
+            'neighbours': similar_profiles.query(X, k=k)[0]
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/model/info')
+def api_model_info():
+    """Version and load details of the resident prediction model"""
+    return jsonify(get_model_info())
+
 @app.route('/api/news')
 def api_news():
-    """Get news articles API"""
-    limit = request.args.get('limit', 10, type=int)
-    search = request.args.get('search', '')
+    """
+    Get news articles API
+
+    Returns a JSON list as before; when there are more articles the token
+    for the next page is sent in the X-Next-Cursor header (pass it back as
+    ?cursor=). With ?search= the list is ranked by relevance, each article
+    has `snippet` (HTML with <mark> around the hits) and `rank`, and further
+    pages are requested with ?page=.
+    """
+    limit = clamp_per_page(request.args.get('limit', 10, type=int), 10)
+    search = request.args.get('search', '').strip()
     
     conn = get_db_connection()
     
     if search:
-        news_articles = conn.execute('''
-            SELECT * FROM news_articles 
-            WHERE headline LIKE ? OR summary LIKE ?
-            ORDER BY scraped_at DESC 
-            LIMIT ?
-        ''', (f'%{search}%', f'%{search}%', limit)).fetchall()
-    else:
-        news_articles = conn.execute('''
-            SELECT * FROM news_articles 
-            ORDER BY scraped_at DESC 
-            LIMIT ?
-        ''', (limit,)).fetchall()
+        page = max(1, request.args.get('page', 1, type=int))
+        return jsonify(search_news(search, limit, (page - 1) * limit, conn))
     
-    conn.close()
+    news_articles, _, next_cursor, _ = paginate(
+        conn, 'news_articles', NEWS_ORDER, limit,
+        cursor=request.args.get('cursor')
+    )
     
-    return jsonify([dict(row) for row in news_articles])
+    response = jsonify([dict(row) for row in news_articles])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/schemes')
 def schemes():
@@ -251,18 +481,18 @@ def schemes():
     total = conn.execute("SELECT COUNT(*) FROM government_schemes").fetchone()[0]
     total_pages = max(1, (total + per_page - 1) // per_page)
     
-    schemes_list = conn.execute(
-        "SELECT * FROM government_schemes ORDER BY scraped_at DESC LIMIT ? OFFSET ?",
-        (per_page, (page - 1) * per_page)
-    ).fetchall()
-    
-    conn.close()
+    schemes_list, page, next_cursor, prev_cursor = paginate(
+        conn, 'government_schemes', SCHEMES_ORDER, per_page,
+        cursor=request.args.get('cursor'), page=page
+    )
     
     return render_template(
         'schemes.html',
         schemes=schemes_list,
         page=page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
     )
 
 @app.route('/api/scrape/schemes', methods=['POST'])
@@ -336,7 +566,7 @@ def market_prices():
     category = request.args.get('category', '').strip()
     commodity = request.args.get('commodity', '').strip()
     variety = request.args.get('variety', '').strip()
-    per_page = request.args.get('per_page', 100, type=int)
+    per_page = clamp_per_page(request.args.get('per_page', 100, type=int), 100)
     page = request.args.get('page', 1, type=int)
 
     conn = get_db_connection()
@@ -354,17 +584,25 @@ def market_prices():
         conds.append("variety = ?")
         params.append(variety)
 
-    where = " WHERE " + " AND ".join(conds) if conds else ""
-    total = conn.execute(f"SELECT COUNT(*) FROM agmarknet_prices{where}", params).fetchone()[0]
+    # In-memory columnar index first; SQLite (with cached counts) if it cannot answer
+    indexed = price_index.query(search, category, commodity, variety, per_page,
+                                request.args.get('cursor'), page, conn)
+    if indexed is not None:
+        results, total, page, next_cursor, prev_cursor = indexed
+    else:
+        # Counts and facet lists are cached until the next price ingest
+        total = price_facets.count(conds, params, conn)
+        results, page, next_cursor, prev_cursor = paginate(
+            conn, 'agmarknet_prices', MARKET_ORDER, per_page, conds, params,
+            cursor=request.args.get('cursor'), page=page
+        )
     total_pages = max(1, (total + per_page - 1) // per_page)
 
-    query = f"SELECT * FROM agmarknet_prices{where} ORDER BY date DESC, commodity ASC LIMIT ? OFFSET ?"
-    results = conn.execute(query, params + [per_page, (page - 1) * per_page]).fetchall()
-
-    categories = [r[0] for r in conn.execute("SELECT DISTINCT commodity_group FROM agmarknet_prices").fetchall()]
-    commodities = [r[0] for r in conn.execute("SELECT DISTINCT commodity FROM agmarknet_prices ORDER BY commodity ASC").fetchall()]
-    varieties = [r[0] for r in conn.execute("SELECT DISTINCT variety FROM agmarknet_prices ORDER BY variety ASC").fetchall()]
-    conn.close()
+    # (value, row count) pairs for the filter dropdowns
+    facets = price_facets.facets(conn)
+    categories = facets['commodity_group']
+    commodities = facets['commodity']
+    varieties = facets['variety']
 
     return render_template(
         'market_prices.html',
@@ -378,7 +616,9 @@ def market_prices():
         varieties=varieties,
         per_page=per_page,
         page=page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
     )
 
 
@@ -399,42 +639,40 @@ def scrape_prices_api():
 @app.route('/api/analytics/crop-distribution')
 def api_crop_distribution():
     """Get crop prediction distribution"""
-    conn = get_db_connection()
-    
-    crop_dist = conn.execute('''
-        SELECT predicted_crop as crop, COUNT(*) as count 
-        FROM user_predictions 
-        GROUP BY predicted_crop
-        ORDER BY count DESC
-    ''').fetchall()
-    
-    conn.close()
+    crop_dist = crop_distribution(get_db_connection())
     
     return jsonify([dict(row) for row in crop_dist])
 
+@app.route('/api/analytics/trends')
+def api_prediction_trends():
+    """
+    Prediction counts and average inputs per time bucket
+    
+    Query: granularity=hour|day|month (default day), start/end as ISO
+    dates or times in UTC, optional crop
+    """
+    try:
+        trends = prediction_trends(
+            request.args.get('granularity', 'day'),
+            request.args.get('start'),
+            request.args.get('end'),
+            request.args.get('crop', '').strip() or None,
+            get_db_connection()
+        )
+        return jsonify(trends)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/analytics/nutrient-stats')
 def api_nutrient_stats():
     """Get nutrient statistics by crop"""
-    conn = get_db_connection()
-    
-    stats = conn.execute('''
-        SELECT label as crop,
-               AVG(N) as avg_n, 
-               AVG(P) as avg_p, 
-               AVG(K) as avg_k,
-               AVG(temperature) as avg_temp,
-               AVG(humidity) as avg_humidity,
-               AVG(ph) as avg_ph,
-               AVG(rainfall) as avg_rainfall,
-               COUNT(*) as sample_count
-        FROM crops_data 
-        GROUP BY label
-        ORDER BY label
-    ''').fetchall()
-    
-    conn.close()
+    stats = nutrient_stats(get_db_connection())
     
-    return jsonify([dict(row) for row in stats])
+    # Keep the response keys: crop first, then the averages
+    return jsonify([{'crop': row['label'], **{k: row[k] for k in row.keys()[1:]}} for row in stats])
 
 @app.route('/api/scrape/news', methods=['POST'])
 def api_scrape_news():
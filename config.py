@@ -14,11 +14,70 @@ class Config:
     # Database
     DATABASE_PATH = BASE_DIR / 'database' / 'farmer_portal.db'
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
+    SQLITE_BUSY_TIMEOUT = 5000  # ms a connection waits for a lock
+    SQLITE_SYNCHRONOUS = 'NORMAL'  # safe with WAL, far fewer fsyncs than FULL
+    SQLITE_CACHE_KB = 16384  # page cache per connection
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # bytes of the database file memory-mapped
     
     # ML Model
     MODEL_PATH = BASE_DIR / 'ml_models' / 'crop_model.pkl'
     SCALER_PATH = BASE_DIR / 'ml_models' / 'scaler.pkl'
+    MODEL_CURRENT_PATH = BASE_DIR / 'ml_models' / 'MODEL_CURRENT'  # version of the pickled pair, written after both
+    ARTIFACT_DIR = BASE_DIR / 'ml_models' / 'artifacts'  # memory-mappable compiled models
+    ARTIFACT_KEEP = 3  # published versions kept on disk
+    USE_COMPILED_MODEL = True  # serve from the artifact instead of the pickled model
+    MODEL_TIER = 'full'  # default tier: 'full' forest or 'lite' distilled tree
+    LITE_MAX_DEPTH = 10  # depth of the distilled lite tree
+    LITE_MIN_SAMPLES_LEAF = 2
+    LITE_AUGMENT = 5  # jittered copies of each training row labelled by the forest
+    
+    # Out-of-distribution guard (envelope stored in the artifact manifest)
+    OOD_QUANTILES = (0.001, 0.999)  # per-feature range of the training inputs
+    OOD_MARGIN = 0.1  # fraction of the quantile range added on each side
+    OOD_DISTANCE_QUANTILE = 0.995  # Mahalanobis distance that scores 1.0
+    
+    # Incremental retraining from confirmed user_predictions
+    RETRAIN_MIN_ROWS = 20  # new confirmed rows needed before trees are added
+    RETRAIN_NEW_TREES = 10  # trees added per update (warm_start)
+    RETRAIN_REPLAY_RATIO = 4  # base rows replayed per new row, so old classes are kept
+    RETRAIN_MAX_TREES = 200  # oldest update trees are dropped beyond this; base trees are kept
+    RETRAIN_ACCURACY_FLOOR = 0.99  # held-out accuracy an update must reach to be published
     DATASET_PATH = BASE_DIR / 'Crop_recommendation.csv'
+    SEARCH_CACHE_DIR = BASE_DIR / 'ml_models' / 'search_cache'  # cached CV fold scores
+    MODEL_RELOAD_INTERVAL = 5  # seconds between checks for a retrained model
+    MAX_BATCH_SIZE = 1000  # samples per /api/predict/batch request
+    MAX_TOP_K = 10  # ranked crops a prediction request may ask for
+    SWEEP_MAX_STEPS = 100  # grid points per axis for /api/predict/sweep
+    SWEEP_MAX_POINTS = 10000
+    SCORE_CHUNK_SIZE = 100000  # rows per chunk for `python -m ml_models.predict score`
+    
+    # Prediction cache (size 0 disables it)
+    PREDICTION_CACHE_SIZE = 4096
+    PREDICTION_CACHE_TTL = 3600  # seconds
+    # Inputs are rounded to these steps before lookup; omit a feature to require an exact match
+    PREDICTION_CACHE_QUANTUM = {
+        'N': 1,
+        'P': 1,
+        'K': 1,
+        'temperature': 0.1,
+        'humidity': 0.1,
+        'ph': 0.01,
+        'rainfall': 0.1,
+    }
+    
+    # Write-behind buffer for user_predictions
+    PREDICTION_WRITE_BUFFER = 10000  # max queued rows
+    PREDICTION_WRITE_BATCH = 200  # rows per transaction
+    PREDICTION_WRITE_INTERVAL = 1.0  # seconds before a partial batch is written
+    PREDICTION_WRITE_OVERFLOW = 'block'  # 'block', 'sync' or 'drop' when the buffer is full
+    PREDICTION_WRITE_BLOCK_TIMEOUT = 0.5  # seconds 'block' waits before writing synchronously
+    PREDICTION_FEEDBACK_WAIT = 3.0  # seconds feedback waits for a prediction another worker has buffered
+    
+    # Similar field profiles (KD-tree over crops_data)
+    SIMILAR_INDEX_PATH = BASE_DIR / 'ml_models' / 'similar_profiles.pkl'
+    SIMILAR_INDEX_CHECK_INTERVAL = 60  # seconds between crops_data change checks
+    SIMILAR_DEFAULT_K = 5
+    SIMILAR_MAX_K = 50
     
     # Scraping
     SCRAPING_DELAY = 2  # seconds between requests
@@ -28,6 +87,16 @@ class Config:
     # Pagination
     NEWS_PER_PAGE = 12
     PRODUCTS_PER_PAGE = 16
+    MAX_PER_PAGE = 500  # upper bound for client-chosen page sizes (?per_page=, ?limit=)
+
+    # Analytics
+    TRENDS_MAX_BUCKETS = 2000  # per /api/analytics/trends response
+    PREDICTION_RETENTION_DAYS = 180  # raw user_predictions kept by `services/analytics.py compact`
+    FACET_COUNT_CACHE_SIZE = 256  # memoised /market-prices filter counts per process
+    PRICE_INDEX_ENABLED = True  # serve /market-prices from the in-memory columnar index
+    PRICE_INDEX_MAX_ROWS = 2000000  # larger tables stay in SQLite
+    PRICE_ARCHIVE_ENABLED = True  # also write each ingest to the Parquet archive (needs pyarrow)
+    PRICE_ARCHIVE_DIR = BASE_DIR / 'database' / 'archive' / 'agmarknet_prices'  # date=YYYY-MM-DD/ partitions
     
     # Scheduler (for auto-scraping)
     SCRAPING_INTERVAL_HOURS = 6
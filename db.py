@@ -0,0 +1,96 @@
+"""
+Shared SQLite connection layer
+
+Each thread keeps one open connection per database file and reuses it
+instead of connecting for every query. Connections are opened in WAL mode,
+so a scraper writing prices or news does not block page reads, with the
+pragmas from Config applied once per connection.
+
+Flask requests hand their connection back through init_app(): at teardown
+any transaction left open is rolled back and the connection stays open for
+the thread's next request. Code outside Flask (scrapers, scripts) uses
+get_connection() the same way and commits with `with conn:` or
+conn.commit(); it should not close the shared connection.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from config import Config
+
+_local = threading.local()
+
+def _key(db_path):
+    return str(Path(db_path or Config.DATABASE_PATH).resolve())
+
+def connect(db_path=None):
+    """
+    Open a new connection with the standard settings (not shared)
+
+    Args:
+        db_path: database file (default Config.DATABASE_PATH)
+
+    Returns:
+        sqlite3.Connection: rows as sqlite3.Row
+    """
+    path = Path(db_path or Config.DATABASE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=Config.SQLITE_BUSY_TIMEOUT / 1000)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f'PRAGMA busy_timeout = {int(Config.SQLITE_BUSY_TIMEOUT)}')
+    # journal_mode is stored in the database file; the others are per connection
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA synchronous = {Config.SQLITE_SYNCHRONOUS}')
+    conn.execute(f'PRAGMA cache_size = {-int(Config.SQLITE_CACHE_KB)}')
+    conn.execute(f'PRAGMA mmap_size = {int(Config.SQLITE_MMAP_SIZE)}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+def get_connection(db_path=None):
+    """Return this thread's connection to db_path, opening it on first use"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    key = _key(db_path)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = connect(key)
+    return conn
+
+def release_connection(exception=None):
+    """Roll back anything this thread left uncommitted (Flask teardown)"""
+    for conn in getattr(_local, 'connections', {}).values():
+        if conn.in_transaction:
+            conn.rollback()
+
+def close_connections():
+    """Close every connection opened by this thread"""
+    connections = getattr(_local, 'connections', {})
+    while connections:
+        _, conn = connections.popitem()
+        conn.close()
+
+def init_app(app):
+    """Register the teardown handler on a Flask app"""
+    app.teardown_appcontext(release_connection)
+
+def read_generation(conn, name):
+    """Change counter of `name` in cache_generations (0 if not tracked yet)"""
+    row = conn.execute(
+        "SELECT generation FROM cache_generations WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+def bump_generation(conn, name):
+    """
+    Mark `name` as changed so every process reloads its caches of it
+
+    Call inside the transaction that made the change.
+    """
+    conn.execute('''
+        INSERT INTO cache_generations (name, generation) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET generation = generation + 1,
+                                        changed_at = CURRENT_TIMESTAMP
+    ''', (name,))
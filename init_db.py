@@ -1,7 +1,10 @@
-import sqlite3
 from pathlib import Path
 import pandas as pd
 from config import Config
+from db import get_connection
+from migrations import migrate
+from ml_models.similar_profiles import build_index
+from services.analytics import refresh_nutrient_stats
 
 def init_database():
     """Initialize SQLite database with required tables"""
@@ -9,139 +12,35 @@ def init_database():
     # Create database directory if not exists
     Path(Config.DATABASE_PATH).parent.mkdir(exist_ok=True)
     
-    # Connect to database
-    conn = sqlite3.connect(Config.DATABASE_PATH)
-    cursor = conn.cursor()
-    
     print("Creating database tables...")
-    
-    # Table 1: Crops Data (from CSV)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS crops_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            N INTEGER NOT NULL,
-            P INTEGER NOT NULL,
-            K INTEGER NOT NULL,
-            temperature REAL NOT NULL,
-            humidity REAL NOT NULL,
-            ph REAL NOT NULL,
-            rainfall REAL NOT NULL,
-            label TEXT NOT NULL
-        )
-    ''')
-    
-    # Table 2: News Articles
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS news_articles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            headline TEXT NOT NULL,
-            summary TEXT,
-            source TEXT NOT NULL,
-            url TEXT UNIQUE NOT NULL,
-            image_url TEXT,
-            published_date TEXT,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Table 3: Pesticide Products
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pesticide_products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            category TEXT,
-            price TEXT,
-            description TEXT,
-            image_url TEXT,
-            product_url TEXT UNIQUE,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Table 4: Equipment Products
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS equipment_products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            category TEXT,
-            price TEXT,
-            description TEXT,
-            image_url TEXT,
-            product_url TEXT UNIQUE,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Table 5: User Predictions
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            N INTEGER,
-            P INTEGER,
-            K INTEGER,
-            temperature REAL,
-            humidity REAL,
-            ph REAL,
-            rainfall REAL,
-            predicted_crop TEXT,
-            confidence REAL,
-            prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    cursor.execute('''
-CREATE TABLE IF NOT EXISTS search_products (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    category TEXT,
-    price TEXT,
-    image_url TEXT,
-    product_url TEXT,
-    source TEXT,
-    keyword TEXT,
-    scraped_at TEXT,
-    UNIQUE(name, source)
-)
-''')
-
-    cursor.execute('''
-CREATE TABLE IF NOT EXISTS government_schemes (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    scheme_name TEXT UNIQUE,
-    publish_date TEXT,
-    doc_links TEXT,
-    apply_links TEXT,
-    scraped_at TEXT
-)
-''')
-
-    cursor.execute('''
-CREATE TABLE IF NOT EXISTS agmarknet_prices (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    commodity_group TEXT,
-    commodity TEXT,
-    variety TEXT,
-    msp TEXT,
-    price TEXT,
-    arrival TEXT,
-    date TEXT,
-    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(commodity, variety, date)
-)
-''')
-
-
-    
-    conn.commit()
+    migrate(Config.DATABASE_PATH, verbose=True)
     print("✓ Database tables created successfully!")
     
+    conn = get_connection(Config.DATABASE_PATH)
+    cursor = conn.cursor()
+    
     # Load crop dataset into database
     if Config.DATASET_PATH.exists():
         print("\nLoading crop dataset into database...")
         try:
             df = pd.read_csv(Config.DATASET_PATH)
-            df.to_sql('crops_data', conn, if_exists='replace', index=False)
+            # Replace the rows but keep the table (and its id column and indexes)
+            with conn:
+                conn.execute("DELETE FROM crops_data")
+                conn.executemany(
+                    f"INSERT INTO crops_data ({', '.join(df.columns)}) "
+                    f"VALUES ({', '.join('?' * len(df.columns))})",
+                    df.itertuples(index=False, name=None)
+                )
             print(f"✓ Loaded {len(df)} crop records into database!")
+            
+            # Materialise the per-crop averages served by /api/analytics/nutrient-stats
+            crops = refresh_nutrient_stats(conn)
+            print(f"✓ Nutrient stats refreshed for {crops} crops")
+            
+            # Rebuild the similar-profiles KD-tree for the new rows
+            build_index(Config.DATABASE_PATH)
+            print(f"✓ Similar-profiles index saved to {Config.SIMILAR_INDEX_PATH}")
         except Exception as e:
             print(f"✗ Error loading dataset: {e}")
     else:
@@ -170,7 +69,6 @@ CREATE TABLE IF NOT EXISTS agmarknet_prices (
     print(f"Equipment Products: {equipment_count}")
     print("="*50)
     
-    conn.close()
     print("\n✓ Database initialization complete!")
 
 if __name__ == '__main__':
@@ -0,0 +1,695 @@
+"""
+Versioned schema migrations for the portal database
+
+Every table, column and index is defined here and nowhere else. Each
+migration runs once, in its own transaction, and is recorded in
+schema_version; running migrate() again is a no-op. init_db.py, the app
+and the scrapers all call migrate() instead of carrying their own DDL.
+
+    python migrations.py            # upgrade the database
+    python migrations.py --check    # EXPLAIN QUERY PLAN for the hot queries
+                                    # (tests/test_query_plans.py asserts the same)
+"""
+
+import re
+import sys
+from config import Config
+from db import get_connection
+from pagination import (page_queries, NEWS_ORDER, SCHEMES_ORDER, PRODUCT_ORDERS,
+                        MARKET_ORDER)
+from services.prediction_writer import CONFIRM_PREDICTION_SQL
+
+def add_column_if_missing(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def has_unique(conn, table, columns):
+    """True if `table` has a UNIQUE index on exactly `columns`"""
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        if index[2]:
+            indexed = [row[2] for row in conn.execute(f"PRAGMA index_info({index[1]})")]
+            if indexed == list(columns):
+                return True
+    return False
+
+# ============= MIGRATIONS =============
+
+def _001_base_schema(conn):
+    """Tables as init_db.py and the scrapers used to create them"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS crops_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            N INTEGER NOT NULL,
+            P INTEGER NOT NULL,
+            K INTEGER NOT NULL,
+            temperature REAL NOT NULL,
+            humidity REAL NOT NULL,
+            ph REAL NOT NULL,
+            rainfall REAL NOT NULL,
+            label TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS news_articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            headline TEXT NOT NULL,
+            summary TEXT,
+            source TEXT NOT NULL,
+            url TEXT UNIQUE NOT NULL,
+            image_url TEXT,
+            published_date TEXT,
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for table in ('pesticide_products', 'equipment_products'):
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                category TEXT,
+                price TEXT,
+                description TEXT,
+                image_url TEXT,
+                product_url TEXT,
+                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            N INTEGER,
+            P INTEGER,
+            K INTEGER,
+            temperature REAL,
+            humidity REAL,
+            ph REAL,
+            rainfall REAL,
+            predicted_crop TEXT,
+            confidence REAL,
+            prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS search_products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            category TEXT,
+            price TEXT,
+            image_url TEXT,
+            product_url TEXT,
+            source TEXT,
+            keyword TEXT,
+            scraped_at TEXT,
+            UNIQUE(name, source)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS government_schemes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scheme_name TEXT UNIQUE,
+            publish_date TEXT,
+            doc_links TEXT,
+            apply_links TEXT,
+            scraped_at TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS agmarknet_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_group TEXT,
+            commodity TEXT,
+            variety TEXT,
+            msp TEXT,
+            price TEXT,
+            arrival TEXT,
+            date TEXT,
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(commodity, variety, date)
+        )
+    ''')
+    # Very old price tables predate the variety column
+    add_column_if_missing(conn, 'agmarknet_prices', 'variety', 'TEXT')
+
+def _002_prediction_feedback(conn):
+    """prediction_uid / confirmed_crop for incremental retraining"""
+    add_column_if_missing(conn, 'user_predictions', 'prediction_uid', 'TEXT')
+    add_column_if_missing(conn, 'user_predictions', 'confirmed_crop', 'TEXT')
+    add_column_if_missing(conn, 'user_predictions', 'confirmed_at', 'TIMESTAMP')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_predictions_uid
+        ON user_predictions(prediction_uid)
+    ''')
+
+def _rebuild_table(conn, table, create_sql, columns, order_by='id'):
+    """Recreate `table` from create_sql, copying rows (first wins on UNIQUE conflicts)"""
+    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    conn.execute(create_sql)
+    column_list = ', '.join(columns)
+    conn.execute(f'''
+        INSERT OR IGNORE INTO {table} ({column_list})
+        SELECT {column_list} FROM {table}_old ORDER BY {order_by}
+    ''')
+    conn.execute(f"DROP TABLE {table}_old")
+
+def _003_unify_tables(conn):
+    """
+    One definition per table
+
+    init_db.py made product_url UNIQUE on the product tables while the
+    scraper made name UNIQUE and relied on it for INSERT OR IGNORE; the
+    scraper's version wins. crops_data loaded with to_sql(replace) lost its
+    id column and is rebuilt with it.
+    """
+    product_columns = ['id', 'name', 'category', 'price', 'description',
+                       'image_url', 'product_url', 'scraped_at']
+    for table in ('pesticide_products', 'equipment_products'):
+        if has_unique(conn, table, ['name']):
+            continue
+        # Rows without a name cannot satisfy NOT NULL
+        conn.execute(f"DELETE FROM {table} WHERE name IS NULL")
+        _rebuild_table(conn, table, f'''
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                category TEXT,
+                price TEXT,
+                description TEXT,
+                image_url TEXT,
+                product_url TEXT,
+                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''', product_columns)
+
+    crop_columns = [row[1] for row in conn.execute("PRAGMA table_info(crops_data)")]
+    if 'id' not in crop_columns:
+        _rebuild_table(conn, 'crops_data', '''
+            CREATE TABLE crops_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                N INTEGER NOT NULL,
+                P INTEGER NOT NULL,
+                K INTEGER NOT NULL,
+                temperature REAL NOT NULL,
+                humidity REAL NOT NULL,
+                ph REAL NOT NULL,
+                rainfall REAL NOT NULL,
+                label TEXT NOT NULL
+            )
+        ''', ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'label'],
+            order_by='rowid')
+
+def _004_query_indexes(conn):
+    """Indexes behind the sorted/filtered queries in app.py (see HOT_QUERIES)"""
+    # executescript() would commit the migration's transaction, so one at a time
+    for statement in [
+        'CREATE INDEX IF NOT EXISTS idx_news_scraped_at '
+        'ON news_articles(scraped_at)',
+        'CREATE INDEX IF NOT EXISTS idx_search_products_scraped_at '
+        'ON search_products(scraped_at)',
+        'CREATE INDEX IF NOT EXISTS idx_search_products_keyword_scraped_at '
+        'ON search_products(keyword, scraped_at)',
+        'CREATE INDEX IF NOT EXISTS idx_schemes_scraped_at '
+        'ON government_schemes(scraped_at)',
+        'CREATE INDEX IF NOT EXISTS idx_user_predictions_date '
+        'ON user_predictions(prediction_date)',
+        'CREATE INDEX IF NOT EXISTS idx_user_predictions_crop '
+        'ON user_predictions(predicted_crop)',
+        'CREATE INDEX IF NOT EXISTS idx_crops_data_label_features '
+        'ON crops_data(label, N, P, K, temperature, humidity, ph, rainfall)',
+        'CREATE INDEX IF NOT EXISTS idx_agmarknet_date_commodity '
+        'ON agmarknet_prices(date DESC, commodity)',
+        'CREATE INDEX IF NOT EXISTS idx_agmarknet_group_date '
+        'ON agmarknet_prices(commodity_group, date DESC, commodity)',
+        'CREATE INDEX IF NOT EXISTS idx_agmarknet_commodity_date '
+        'ON agmarknet_prices(commodity, date DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_agmarknet_variety_date '
+        'ON agmarknet_prices(variety, date DESC, commodity)',
+    ]:
+        conn.execute(statement)
+
+PRICED_TABLES = ('search_products', 'pesticide_products', 'equipment_products')
+
+def _005_numeric_prices(conn):
+    """price_paise / price_currency / price_status next to the display price, backfilled"""
+    from scraping.scraper_utils import parse_price
+
+    for table in PRICED_TABLES:
+        add_column_if_missing(conn, table, 'price_paise', 'INTEGER')
+        add_column_if_missing(conn, table, 'price_currency', 'TEXT')
+        add_column_if_missing(conn, table, 'price_status', 'TEXT')
+        rows = conn.execute(f"SELECT id, price FROM {table} WHERE price_status IS NULL").fetchall()
+        conn.executemany(
+            f"UPDATE {table} SET price_paise = ?, price_currency = ?, price_status = ? WHERE id = ?",
+            [parse_price(price) + (row_id,) for row_id, price in rows]
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_price ON {table}(price_paise)")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_search_products_keyword_price
+        ON search_products(keyword, price_paise)
+    ''')
+
+def _006_news_fts(conn):
+    """FTS5 index over news headlines/summaries, kept in sync by triggers"""
+    # External-content table: the text lives only in news_articles
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            headline, summary,
+            content='news_articles', content_rowid='id',
+            tokenize='porter unicode61', prefix='2 3'
+        )
+    ''')
+    for statement in [
+        '''CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news_articles BEGIN
+               INSERT INTO news_fts(rowid, headline, summary)
+               VALUES (new.id, new.headline, new.summary);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news_articles BEGIN
+               INSERT INTO news_fts(news_fts, rowid, headline, summary)
+               VALUES ('delete', old.id, old.headline, old.summary);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF headline, summary
+           ON news_articles BEGIN
+               INSERT INTO news_fts(news_fts, rowid, headline, summary)
+               VALUES ('delete', old.id, old.headline, old.summary);
+               INSERT INTO news_fts(rowid, headline, summary)
+               VALUES (new.id, new.headline, new.summary);
+           END''',
+    ]:
+        conn.execute(statement)
+    # Headline matches weigh more; stored so ORDER BY rank needs no sort
+    conn.execute("INSERT INTO news_fts(news_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    conn.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+
+def _007_analytics_rollups(conn):
+    """Per-crop rollups read by the analytics endpoints instead of GROUP BY scans"""
+    # crops_data only changes in init_db.py, which refreshes this table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS crop_nutrient_stats (
+            label TEXT PRIMARY KEY,
+            avg_n REAL,
+            avg_p REAL,
+            avg_k REAL,
+            avg_temp REAL,
+            avg_humidity REAL,
+            avg_ph REAL,
+            avg_rainfall REAL,
+            sample_count INTEGER NOT NULL,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO crop_nutrient_stats
+        (label, avg_n, avg_p, avg_k, avg_temp, avg_humidity, avg_ph, avg_rainfall, sample_count)
+        SELECT label, AVG(N), AVG(P), AVG(K), AVG(temperature), AVG(humidity), AVG(ph),
+               AVG(rainfall), COUNT(*)
+        FROM crops_data GROUP BY label
+    ''')
+
+    # Every prediction ever made, per crop; deleting raw rows does not
+    # take them out of the counts
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS prediction_crop_counts (
+            crop TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0,
+            last_predicted_at TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS prediction_crop_counts_insert
+        AFTER INSERT ON user_predictions BEGIN
+            INSERT INTO prediction_crop_counts (crop, count, last_predicted_at)
+            VALUES (new.predicted_crop, 1, new.prediction_date)
+            ON CONFLICT(crop) DO UPDATE SET
+                count = count + 1,
+                last_predicted_at = MAX(IFNULL(last_predicted_at, ''), excluded.last_predicted_at);
+        END
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO prediction_crop_counts (crop, count, last_predicted_at)
+        SELECT predicted_crop, COUNT(*), MAX(prediction_date)
+        FROM user_predictions GROUP BY predicted_crop
+    ''')
+
+# strftime() formats of the prediction_rollups buckets, shared with services/analytics.py
+BUCKET_FORMATS = {'hour': '%Y-%m-%d %H:00', 'day': '%Y-%m-%d', 'month': '%Y-%m'}
+
+def _create_rollups_trigger(conn):
+    """prediction_rollups_insert: file every new user_predictions row in its buckets"""
+    # Rows land in the bucket of their own prediction_date, which the
+    # write-behind buffer sets when the prediction is made, so a late insert
+    # still updates the right bucket. crop is NOT NULL: a prediction without
+    # one is counted under ''
+    upsert = '''
+            INSERT INTO prediction_rollups VALUES (
+                '{granularity}',
+                strftime('{fmt}', IFNULL(new.prediction_date, CURRENT_TIMESTAMP)),
+                COALESCE(new.predicted_crop, ''), 1,
+                new.N, new.P, new.K, new.temperature, new.humidity, new.ph, new.rainfall,
+                new.confidence
+            )
+            ON CONFLICT (granularity, bucket, crop) DO UPDATE SET
+                count = count + 1,
+                sum_n = sum_n + excluded.sum_n,
+                sum_p = sum_p + excluded.sum_p,
+                sum_k = sum_k + excluded.sum_k,
+                sum_temperature = sum_temperature + excluded.sum_temperature,
+                sum_humidity = sum_humidity + excluded.sum_humidity,
+                sum_ph = sum_ph + excluded.sum_ph,
+                sum_rainfall = sum_rainfall + excluded.sum_rainfall,
+                sum_confidence = sum_confidence + excluded.sum_confidence;'''
+    upserts = ''.join(upsert.format(granularity=granularity, fmt=fmt)
+                      for granularity, fmt in BUCKET_FORMATS.items())
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS prediction_rollups_insert
+        AFTER INSERT ON user_predictions BEGIN{upserts}
+        END
+    ''')
+
+def _008_prediction_rollups(conn):
+    """Hourly/daily/monthly per-crop counts and input sums of user_predictions"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS prediction_rollups (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            crop TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            sum_n REAL, sum_p REAL, sum_k REAL, sum_temperature REAL,
+            sum_humidity REAL, sum_ph REAL, sum_rainfall REAL, sum_confidence REAL,
+            PRIMARY KEY (granularity, bucket, crop)
+        ) WITHOUT ROWID
+    ''')
+    _create_rollups_trigger(conn)
+    for granularity, fmt in BUCKET_FORMATS.items():
+        conn.execute(f'''
+            INSERT OR REPLACE INTO prediction_rollups
+            SELECT '{granularity}', strftime('{fmt}', prediction_date) AS bucket,
+                   COALESCE(predicted_crop, '') AS crop, COUNT(*), SUM(N), SUM(P), SUM(K),
+                   SUM(temperature), SUM(humidity), SUM(ph), SUM(rainfall), SUM(confidence)
+            FROM user_predictions
+            WHERE prediction_date IS NOT NULL
+            GROUP BY bucket, crop
+        ''')
+
+def _009_cache_generations(conn):
+    """Per-table change counters that tell in-process caches to reload"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_generations (
+            name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO cache_generations (name) VALUES ('agmarknet_prices')")
+
+def _010_confirmation_sequence(conn):
+    """confirmed_seq: order in which predictions were confirmed, the retraining watermark"""
+    add_column_if_missing(conn, 'user_predictions', 'confirmed_seq', 'INTEGER')
+    # Earlier confirmations were consumed in id order; seq = id keeps old watermarks valid
+    conn.execute('''
+        UPDATE user_predictions SET confirmed_seq = id
+        WHERE confirmed_crop IS NOT NULL AND confirmed_seq IS NULL
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_predictions_confirmed_seq
+        ON user_predictions(confirmed_seq)
+    ''')
+
+def _011_confirmation_counter(conn):
+    """Number confirmations from a counter row that compaction cannot delete"""
+    # MAX(confirmed_seq) + 1 went backwards whenever compaction removed the
+    # row holding the maximum, dropping the next confirmation below the
+    # retraining watermark for good. (WHERE true lets SQLite parse the upsert.)
+    conn.execute('''
+        INSERT INTO cache_generations (name, generation)
+        SELECT 'prediction_feedback', IFNULL(MAX(confirmed_seq), 0) FROM user_predictions
+        WHERE true
+        ON CONFLICT(name) DO UPDATE SET generation = MAX(generation, excluded.generation)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS user_predictions_confirm
+        AFTER UPDATE OF confirmed_crop ON user_predictions
+        WHEN new.confirmed_crop IS NOT NULL AND new.confirmed_crop IS NOT old.confirmed_crop
+        BEGIN
+            UPDATE cache_generations
+            SET generation = generation + 1, changed_at = CURRENT_TIMESTAMP
+            WHERE name = 'prediction_feedback';
+            UPDATE user_predictions
+            SET confirmed_seq = (SELECT generation FROM cache_generations
+                                 WHERE name = 'prediction_feedback')
+            WHERE id = new.id;
+        END
+    ''')
+
+def _012_rollups_null_crop(conn):
+    """Rebuild the rollups trigger so a prediction without a crop no longer fails to insert"""
+    conn.execute("DROP TRIGGER IF EXISTS prediction_rollups_insert")
+    _create_rollups_trigger(conn)
+
+# (version, name, upgrade) - append only, never renumber
+MIGRATIONS = [
+    (1, 'base schema', _001_base_schema),
+    (2, 'prediction feedback columns', _002_prediction_feedback),
+    (3, 'unify product and crop tables', _003_unify_tables),
+    (4, 'query indexes', _004_query_indexes),
+    (5, 'numeric product prices', _005_numeric_prices),
+    (6, 'news full-text search', _006_news_fts),
+    (7, 'analytics rollups', _007_analytics_rollups),
+    (8, 'time-bucketed prediction rollups', _008_prediction_rollups),
+    (9, 'cache generations', _009_cache_generations),
+    (10, 'confirmation sequence', _010_confirmation_sequence),
+    (11, 'confirmation counter', _011_confirmation_counter),
+    (12, 'rollups of predictions without a crop', _012_rollups_null_crop),
+]
+
+def current_version(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def migrate(db_path=None, verbose=False):
+    """
+    Apply every pending migration
+
+    Args:
+        db_path: database file (default Config.DATABASE_PATH)
+        verbose: print each applied migration
+
+    Returns:
+        list: versions applied by this call
+    """
+    conn = get_connection(db_path)
+    if conn.in_transaction:
+        conn.commit()
+    applied = []
+
+    for version, name, upgrade in MIGRATIONS:
+        if version <= current_version(conn):
+            continue
+        # IMMEDIATE takes the write lock up front, so two processes starting
+        # together apply each migration once
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            upgrade(conn)
+            conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                         (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        if verbose:
+            print(f"✓ Migration {version}: {name}")
+
+    return applied
+
+# ============= QUERY PLAN CHECKS =============
+
+# Listing pages read through pagination.paginate():
+# name -> (table, keyset, filter, filter params, index that must serve it)
+LISTINGS = {
+    'news page': ('news_articles', NEWS_ORDER, (), (), 'idx_news_scraped_at'),
+    'schemes page': ('government_schemes', SCHEMES_ORDER, (), (), 'idx_schemes_scraped_at'),
+    'search products': (
+        'search_products', PRODUCT_ORDERS['newest'], (), (), 'idx_search_products_scraped_at'),
+    'search products by keyword': (
+        'search_products', PRODUCT_ORDERS['newest'], ('keyword = ?',), ('urea',),
+        'idx_search_products_keyword_scraped_at'),
+    'search products by price': (
+        'search_products', PRODUCT_ORDERS['low_to_high'], (), (), 'idx_search_products_price'),
+    'search products by price, highest first': (
+        'search_products', PRODUCT_ORDERS['high_to_low'], (), (), 'idx_search_products_price'),
+    'search products by keyword and price': (
+        'search_products', PRODUCT_ORDERS['low_to_high'], ('keyword = ?',), ('urea',),
+        'idx_search_products_keyword_price'),
+    'search products by keyword and price, highest first': (
+        'search_products', PRODUCT_ORDERS['high_to_low'], ('keyword = ?',), ('urea',),
+        'idx_search_products_keyword_price'),
+    'market prices': ('agmarknet_prices', MARKET_ORDER, (), (), 'idx_agmarknet_date_commodity'),
+    'market prices by group': (
+        'agmarknet_prices', MARKET_ORDER, ('commodity_group = ?',), ('Vegetables',),
+        'idx_agmarknet_group_date'),
+    'market prices by commodity': (
+        'agmarknet_prices', MARKET_ORDER, ('commodity = ?',), ('Onion',),
+        'idx_agmarknet_commodity_date'),
+    'market prices by variety': (
+        'agmarknet_prices', MARKET_ORDER, ('variety = ?',), ('Local',),
+        'idx_agmarknet_variety_date'),
+}
+# Boundary row values for the cursor queries, by sort column
+SAMPLE_CURSOR_VALUES = {
+    'scraped_at': '2025-01-01 00:00:00',
+    'price_paise': 10000,
+    'date': '2025-01-01',
+    'commodity': 'Onion',
+    'id': 1,
+}
+
+def listing_queries(listings=None):
+    """
+    HOT_QUERIES entries for every query paginate() runs on the listings
+
+    Built with pagination.page_queries(), so they are the app's own SQL:
+    the first page, then the next and previous pages from a sample boundary
+    row and from one with NULL in each nullable sort column. Every cursor
+    query must SEARCH the listing's index, not walk it from the start.
+    """
+    queries = {}
+    for name, (table, keyset, where, params, index) in (listings or LISTINGS).items():
+        (sql, args), = page_queries(table, keyset, where, params)
+        access = 'SEARCH' if where else 'SCAN'
+        queries[name] = (sql, args + [13, 0], f"{access} {table} USING INDEX {index}")
+
+        boundaries = {'': [SAMPLE_CURSOR_VALUES[column] for column in keyset.columns]}
+        for nullable in keyset.nulls:
+            boundaries[f' at NULL {nullable}'] = [
+                None if column == nullable else SAMPLE_CURSOR_VALUES[column]
+                for column in keyset.columns]
+        for label, values in boundaries.items():
+            for backward in (False, True):
+                segments = page_queries(table, keyset, where, params, values, backward)
+                for i, (sql, args) in enumerate(segments):
+                    part = f" ({i + 1}/{len(segments)})" if len(segments) > 1 else ''
+                    step = 'previous' if backward else 'next'
+                    queries[f"{name}, {step}{label}{part}"] = (
+                        sql, args + [13, 0], f"SEARCH {table} USING INDEX {index}")
+    return queries
+
+# Queries app.py runs on every page view, with representative parameters,
+# and the plan step each must use (COVERING is optional). SEARCH seeks an
+# index; SCAN ... USING INDEX is only expected where the query reads the
+# index in order and stops at LIMIT, or builds the facet lists once per ingest.
+# Substring searches (LIKE '%x%') cannot use a B-tree index and are left out.
+HOT_QUERIES = {
+    **listing_queries(),
+    'search products count by keyword': (
+        "SELECT COUNT(*) FROM search_products WHERE keyword = ?", ('urea',),
+        'SEARCH search_products USING INDEX idx_search_products_keyword_price'),
+    'news search': (
+        "SELECT news_articles.*, news_fts.rank FROM news_fts "
+        "JOIN news_articles ON news_articles.id = news_fts.rowid "
+        "WHERE news_fts MATCH ? ORDER BY news_fts.rank LIMIT ? OFFSET ?", ('"crop"*', 10, 0),
+        'SEARCH news_articles USING INTEGER PRIMARY KEY'),
+    'recent predictions': (
+        "SELECT * FROM user_predictions ORDER BY prediction_date DESC LIMIT 10", (),
+        'SCAN user_predictions USING INDEX idx_user_predictions_date'),
+    # Rollup tables hold one row per crop, so reading them whole is the point
+    'prediction distribution': (
+        "SELECT crop, count FROM prediction_crop_counts", (),
+        'SCAN prediction_crop_counts'),
+    'prediction feedback': (
+        CONFIRM_PREDICTION_SQL, {'crop': 'rice', 'uid': 'x'},
+        'SEARCH user_predictions USING INDEX idx_user_predictions_uid'),
+    'prediction trends': (
+        "SELECT * FROM prediction_rollups WHERE granularity = ? AND bucket BETWEEN ? AND ? "
+        "ORDER BY bucket, crop", ('day', '2026-01-01', '2026-01-31'),
+        'SEARCH prediction_rollups USING PRIMARY KEY'),
+    'old predictions': (
+        "SELECT id FROM user_predictions WHERE prediction_date < ? "
+        "AND NOT (confirmed_crop IS NOT NULL AND confirmed_seq > ?) LIMIT ?",
+        ('2026-01-01', 0, 1000),
+        'SEARCH user_predictions USING INDEX idx_user_predictions_date'),
+    'nutrient stats': (
+        "SELECT * FROM crop_nutrient_stats ORDER BY label", (),
+        'SCAN crop_nutrient_stats USING INDEX sqlite_autoindex_crop_nutrient_stats_1'),
+    'price categories': (
+        "SELECT commodity_group, COUNT(*) FROM agmarknet_prices "
+        "GROUP BY commodity_group ORDER BY commodity_group", (),
+        'SCAN agmarknet_prices USING INDEX idx_agmarknet_group_date'),
+    'price commodities': (
+        "SELECT commodity, COUNT(*) FROM agmarknet_prices GROUP BY commodity ORDER BY commodity", (),
+        'SCAN agmarknet_prices USING INDEX idx_agmarknet_commodity_date'),
+    'price varieties': (
+        "SELECT variety, COUNT(*) FROM agmarknet_prices GROUP BY variety ORDER BY variety", (),
+        'SCAN agmarknet_prices USING INDEX idx_agmarknet_variety_date'),
+    'price cache generation': (
+        "SELECT generation FROM cache_generations WHERE name = ?", ('agmarknet_prices',),
+        'SEARCH cache_generations USING INDEX sqlite_autoindex_cache_generations_1'),
+}
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN detail lines of one query"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def _uses(line, expected):
+    return re.sub(r'\bCOVERING ', '', line).startswith(expected)
+
+def plan_problems(plan, expected):
+    """
+    What is wrong with a query plan
+
+    Args:
+        plan: lines from explain()
+        expected: the step the query must use, e.g.
+                  'SEARCH news_articles USING INDEX idx_news_scraped_at'
+
+    Returns:
+        list: problems; empty if the plan uses `expected`, sorts nothing in a
+              temporary B-tree and reads no other table or index end to end
+    """
+    problems = [f"sorts in a temporary B-tree: {line}" for line in plan if 'TEMP B-TREE' in line]
+    if not any(_uses(line, expected) for line in plan):
+        problems.append(f"does not use {expected}")
+    problems += [f"walks a whole table or index: {line}" for line in plan
+                 if line.startswith('SCAN ') and 'VIRTUAL TABLE' not in line
+                 and not _uses(line, expected)]
+    return problems
+
+def check_query_plans(db_path=None, queries=None):
+    """
+    Run EXPLAIN QUERY PLAN for each hot query
+
+    Returns:
+        list: (name, problems, plan lines) per query
+    """
+    conn = get_connection(db_path)
+    results = []
+    for name, (sql, params, expected) in (queries or HOT_QUERIES).items():
+        plan = explain(conn, sql, params)
+        results.append((name, plan_problems(plan, expected), plan))
+    return results
+
+if __name__ == '__main__':
+    print(f"Database: {Config.DATABASE_PATH}")
+    applied = migrate(verbose=True)
+    print(f"✓ Schema at version {current_version(get_connection())}"
+          + ("" if applied else " (up to date)"))
+
+    if '--check' in sys.argv:
+        failures = 0
+        for name, problems, plan in check_query_plans():
+            print(f"{'✗' if problems else '✓'} {name}")
+            for line in plan:
+                print(f"     {line}")
+            for problem in problems:
+                print(f"   ✗ {problem}")
+            failures += bool(problems)
+        sys.exit(1 if failures else 0)
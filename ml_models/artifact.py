@@ -0,0 +1,127 @@
+"""
+Versioned, memory-mappable model artifacts
+
+An artifact is a directory of plain .npy arrays plus a manifest.json:
+
+    ml_models/artifacts/<name>/
+        CURRENT                 <- version currently published
+        <version>/
+            manifest.json       <- classes, feature names, scaler params, metrics
+            feature.npy
+            threshold.npy
+            ...
+
+Arrays are opened with np.load(mmap_mode='r'), so every worker process
+maps the same read-only pages instead of unpickling a private copy, and
+loading only costs a few file opens.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import Config
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+def artifact_root(name='full', artifact_dir=None):
+    return Path(artifact_dir or Config.ARTIFACT_DIR) / name
+
+def read_current_version(name='full', artifact_dir=None):
+    """Version currently published under `name`, or None"""
+    try:
+        return (artifact_root(name, artifact_dir) / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_artifact(arrays, manifest, version, name='full', artifact_dir=None, keep=None):
+    """
+    Write arrays + manifest as a new version and publish it
+
+    The version directory is built under a temporary name and renamed into
+    place, then CURRENT is swapped atomically, so readers never see a
+    partial artifact.
+
+    Args:
+        arrays: {name: ndarray}
+        manifest: JSON-serialisable metadata
+        version: identifier for this artifact (directory name)
+        name: artifact family, e.g. 'full'
+        keep: number of versions to retain (default Config.ARTIFACT_KEEP)
+
+    Returns:
+        Path: directory of the published version
+    """
+    root = artifact_root(name, artifact_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / version
+    tmp_dir = root / f'.tmp-{version}-{os.getpid()}'
+
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir()
+
+    for key, value in arrays.items():
+        np.save(tmp_dir / f'{key}.npy', np.ascontiguousarray(value), allow_pickle=False)
+
+    manifest = dict(manifest)
+    manifest.update({
+        'format': FORMAT_VERSION,
+        'version': version,
+        'arrays': sorted(arrays),
+        'created_at': manifest.get('created_at') or datetime.now().isoformat(timespec='seconds')
+    })
+    with open(tmp_dir / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if target.exists():
+        shutil.rmtree(target)
+    tmp_dir.rename(target)
+
+    current_tmp = root / f'{CURRENT_FILE}.tmp'
+    current_tmp.write_text(version)
+    os.replace(current_tmp, root / CURRENT_FILE)
+
+    _prune(root, keep if keep is not None else Config.ARTIFACT_KEEP, version)
+    return target
+
+def load_artifact(name='full', version=None, artifact_dir=None, mmap=True):
+    """
+    Open a published artifact
+
+    Returns:
+        tuple: ({array name: ndarray}, manifest dict), arrays memory-mapped read-only
+    """
+    version = version or read_current_version(name, artifact_dir)
+    if version is None:
+        raise FileNotFoundError(f"No artifact published under {artifact_root(name, artifact_dir)}")
+
+    path = artifact_root(name, artifact_dir) / version
+    with open(path / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format')}")
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        key: np.load(path / f'{key}.npy', mmap_mode=mmap_mode, allow_pickle=False)
+        for key in manifest['arrays']
+    }
+    return arrays, manifest
+
+def _prune(root, keep, current):
+    """Delete all but the newest `keep` versions (never the current one)"""
+    versions = sorted(
+        (p for p in root.iterdir() if p.is_dir() and not p.name.startswith('.')),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for path in versions[max(keep, 1):]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,306 @@
+"""
+Array-backed evaluator for the crop Random Forest
+
+The fitted RandomForestClassifier is flattened into a few NumPy arrays
+(split feature, threshold, left/right child, per-node class probabilities)
+with the StandardScaler folded into the thresholds, so raw inputs can be
+scored by walking every tree for every row at once. The folded thresholds
+reproduce scikit-learn's float32 comparison of the scaled value exactly,
+so every row reaches the same leaves as with the pickled model. This skips
+scikit-learn's per-call overhead, which dominates single-row predictions.
+
+Each node also carries its path contributions: how much every feature's
+splits moved the class probabilities on the way from the root to that node.
+Reading them at the leaves gives an exact per-feature explanation for the
+price of the traversal that made the prediction.
+"""
+
+import time
+import numpy as np
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import Config
+from ml_models.artifact import load_artifact
+
+# Rows evaluated per step; bounds the (rows, trees, classes) temporary
+BLOCK_SIZE = 1024
+
+# Up to this many (row, tree) walks a plain loop beats vectorised traversal
+SCALAR_WALKS = 4
+
+def raw_thresholds(threshold, mean, scale):
+    """
+    Fold the scaler into split thresholds without changing any decision
+
+    scikit-learn sends x left when float32((x - mean) / scale) <= threshold.
+    That holds for every raw x up to some largest float64 value, found here
+    by bisection from the algebraic threshold * scale + mean (which can be
+    off by the float32 rounding of the scaled value).
+
+    Returns:
+        ndarray: largest raw value going left, per split
+    """
+    threshold, mean, scale = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                   for a in (threshold, mean, scale)))
+
+    def goes_left(x):
+        with np.errstate(over='ignore'):
+            return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    guess = threshold * scale + mean
+    step = np.maximum(np.abs(guess), scale) * 1e-6
+    lo, hi = guess - step, guess + step
+    while not (goes_left(lo).all() and not goes_left(hi).any()):
+        step = step * 2
+        lo = np.where(goes_left(lo), lo, guess - step)
+        hi = np.where(goes_left(hi), guess + step, hi)
+    # Invariant: lo goes left, hi goes right; stop once they are adjacent doubles
+    while True:
+        open_ = np.nextafter(lo, np.inf) < hi
+        if not open_.any():
+            return lo
+        mid = np.where(open_, lo + (hi - lo) / 2, lo)
+        left = goes_left(mid)
+        lo = np.where(open_ & left, mid, lo)
+        hi = np.where(open_ & ~left, mid, hi)
+
+def compile_forest(model, scaler, classes=None):
+    """
+    Export a fitted forest and scaler into flat node arrays
+
+    Args:
+        model: fitted RandomForestClassifier (trained on scaled inputs), or a
+               single DecisionTreeRegressor fitted on class probabilities
+        scaler: fitted StandardScaler used for training
+        classes: class labels for the regressor outputs (default model.classes_)
+
+    Returns:
+        dict: NumPy arrays describing every node of every tree
+    """
+    n_features = model.n_features_in_
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    estimators = getattr(model, 'estimators_', [model])
+    classes = model.classes_ if classes is None else classes
+
+    features, thresholds, lefts, rights, values, roots, contribs = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in estimators:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left < 0
+        node_ids = np.arange(n_nodes) + offset
+
+        feature = np.where(is_leaf, -1, tree.feature)
+        # float32((x - mean) / scale) <= t  <=>  x <= raw threshold
+        split = np.maximum(feature, 0)
+        threshold = np.where(is_leaf, 0.0,
+                             raw_thresholds(tree.threshold, mean[split], scale[split]))
+        # Leaves point to themselves so traversal can run a fixed number of steps
+        left = np.where(is_leaf, node_ids, tree.children_left + offset)
+        right = np.where(is_leaf, node_ids, tree.children_right + offset)
+
+        if tree.n_outputs == 1:
+            # Classifier: per-class sample weights
+            value = tree.value[:, 0, :]
+        else:
+            # Multi-output regressor: one mean probability per class
+            value = np.clip(tree.value[:, :, 0], 0, None)
+        value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+
+        features.append(feature)
+        contribs.append(path_contributions(tree, value, n_features))
+        thresholds.append(threshold)
+        lefts.append(left)
+        rights.append(right)
+        values.append(value)
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values).astype(np.float64),
+        'contrib': np.concatenate(contribs).astype(np.float32),
+        'roots': np.array(roots, dtype=np.int32),
+        'max_depth': np.array(max_depth, dtype=np.int32),
+        'classes': np.asarray(classes).astype(str),
+    }
+
+def path_contributions(tree, value, n_features):
+    """
+    Per-node sum of the probability changes made by each feature's splits
+
+    Node ids in a fitted tree always exceed their parent's, so one pass in id
+    order sees every parent before its children.
+
+    Returns:
+        ndarray: shape (n_nodes, n_features, n_classes)
+    """
+    contrib = np.zeros((tree.node_count, n_features, value.shape[1]))
+    for node in range(tree.node_count):
+        feature = tree.feature[node]
+        for child in (tree.children_left[node], tree.children_right[node]):
+            if child < 0:
+                continue
+            contrib[child] = contrib[node]
+            contrib[child, feature] += value[child] - value[node]
+    return contrib
+
+class CompiledForest:
+    """Vectorised Random Forest over the arrays produced by compile_forest()"""
+
+    def __init__(self, arrays, version=None):
+        self.arrays = arrays
+        self.version = version
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        # Artifacts published before explanations existed have no table
+        self.contrib = arrays.get('contrib')
+        self.max_depth = int(arrays['max_depth'])
+        self.classes_ = np.asarray(arrays['classes'])
+        self._split_feature = np.maximum(self.feature, 0)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(np.asarray(a).nbytes for a in self.arrays.values())
+
+    @classmethod
+    def load(cls, name='full'):
+        """Open the published artifact `name` (memory-mapped)"""
+        arrays, manifest = load_artifact(name)
+        return cls(arrays, version=manifest['version'])
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) * len(self.roots) <= SCALAR_WALKS:
+            return self._apply_scalar(X)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.tile(self.roots, (len(X), 1))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self._split_feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def _apply_scalar(self, X):
+        nodes = np.empty((len(X), len(self.roots)), dtype=np.int64)
+        for i, row in enumerate(X.tolist()):
+            for t, node in enumerate(self.roots.tolist()):
+                while self.feature[node] >= 0:
+                    if row[self.feature[node]] <= self.threshold[node]:
+                        node = self.left[node]
+                    else:
+                        node = self.right[node]
+                nodes[i, t] = node
+        return nodes
+
+    def predict_proba(self, X):
+        """Class probabilities for raw (unscaled) inputs, shape (n_samples, n_classes)"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), BLOCK_SIZE):
+            leaves = self.apply(X[start:start + BLOCK_SIZE])
+            proba[start:start + BLOCK_SIZE] = self.value[leaves].mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @property
+    def can_explain(self):
+        return self.contrib is not None
+
+    def explain(self, X, class_index):
+        """
+        Per-feature contributions to one class probability per row
+
+        For each row, bias + contributions.sum() equals its predicted
+        probability of that class.
+
+        Args:
+            X: raw inputs, shape (n_samples, n_features)
+            class_index: class column to explain, one per row
+
+        Returns:
+            tuple: (bias per row, contributions of shape (n_samples, n_features))
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        class_index = np.broadcast_to(np.asarray(class_index), (len(X),))
+        leaves = self.apply(X)
+        bias = self.value[self.roots][:, class_index].mean(axis=0)
+        contributions = np.stack([
+            self.contrib[row_leaves, :, c].mean(axis=0)
+            for row_leaves, c in zip(leaves, class_index)
+        ])
+        return bias, contributions
+
+def check_parity(model, scaler, compiled, X):
+    """
+    Compare the compiled forest against scikit-learn on the same raw inputs
+
+    Returns:
+        dict: label agreement rate and largest absolute probability difference
+    """
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(scaler.transform(X))
+    actual = compiled.predict_proba(X)
+    return {
+        'rows': len(X),
+        'label_agreement': float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))),
+        'max_proba_diff': float(np.abs(expected - actual).max())
+    }
+
+def time_single_row(predict_proba, X, repeats=200):
+    """Mean milliseconds per single-row predict_proba call over `repeats` rows of X"""
+    X = np.asarray(X, dtype=np.float64)
+    rows = [X[i:i + 1] for i in np.arange(repeats) % len(X)]
+    start = time.perf_counter()
+    for row in rows:
+        predict_proba(row)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def benchmark(model, scaler, compiled, X, repeats=200):
+    """
+    Time single-row predictions with scikit-learn and with the compiled forest
+
+    Returns:
+        dict: mean latency per single-row prediction in milliseconds
+    """
+    sklearn_ms = time_single_row(lambda row: model.predict_proba(scaler.transform(row)), X, repeats)
+    compiled_ms = time_single_row(compiled.predict_proba, X, repeats)
+
+    return {
+        'sklearn_ms': round(sklearn_ms, 4),
+        'compiled_ms': round(compiled_ms, 4),
+        'speedup': round(sklearn_ms / compiled_ms, 1) if compiled_ms else None
+    }
+
+if __name__ == '__main__':
+    # Check the saved compiled forest against the saved sklearn model
+    import pickle
+    import pandas as pd
+
+    with open(Config.MODEL_PATH, 'rb') as f:
+        model = pickle.load(f)
+    with open(Config.SCALER_PATH, 'rb') as f:
+        scaler = pickle.load(f)
+    compiled = CompiledForest.load()
+
+    X = pd.read_csv(Config.DATASET_PATH).drop('label', axis=1).to_numpy(dtype=float)
+    print("Parity:", check_parity(model, scaler, compiled, X))
+    print("Latency:", benchmark(model, scaler, compiled, X))
@@ -0,0 +1,90 @@
+"""
+Out-of-distribution guard for crop predictions
+
+At training time the envelope of the training inputs is summarised as
+per-feature quantiles plus the mean and inverse covariance, and stored in
+the artifact manifest. At prediction time every row gets a Mahalanobis
+distance to the training data, expressed as a ratio to the distance that
+covers OOD_DISTANCE_QUANTILE of the training rows (so <= 1 is typical),
+and the features that fall outside their quantile range are listed.
+"""
+
+import numpy as np
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import Config
+
+def compute_envelope(X, feature_names):
+    """
+    Summarise the training inputs
+
+    Args:
+        X: raw (unscaled) training rows
+        feature_names: column names of X
+
+    Returns:
+        dict: JSON-serialisable envelope for the manifest
+    """
+    X = np.asarray(X, dtype=np.float64)
+    low_q, high_q = Config.OOD_QUANTILES
+    low = np.quantile(X, low_q, axis=0)
+    high = np.quantile(X, high_q, axis=0)
+    margin = Config.OOD_MARGIN * (high - low)
+
+    mean = X.mean(axis=0)
+    inv_cov = np.linalg.pinv(np.cov(X, rowvar=False))
+    centered = X - mean
+    distances = np.sqrt(np.einsum('ij,jk,ik->i', centered, inv_cov, centered))
+
+    return {
+        'features': list(feature_names),
+        'quantiles': [low_q, high_q],
+        'low': (low - margin).tolist(),
+        'high': (high + margin).tolist(),
+        'mean': mean.tolist(),
+        'inv_cov': inv_cov.tolist(),
+        'distance_threshold': float(np.quantile(distances, Config.OOD_DISTANCE_QUANTILE))
+    }
+
+class OODGuard:
+    """Vectorised scoring against an envelope from compute_envelope()"""
+
+    def __init__(self, envelope):
+        self.features = envelope['features']
+        self.low = np.array(envelope['low'])
+        self.high = np.array(envelope['high'])
+        self.mean = np.array(envelope['mean'])
+        self.inv_cov = np.array(envelope['inv_cov'])
+        self.threshold = envelope['distance_threshold']
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        envelope = (manifest or {}).get('envelope')
+        return cls(envelope) if envelope else None
+
+    def score(self, X):
+        """
+        Args:
+            X: raw rows, shape (n_samples, n_features)
+
+        Returns:
+            tuple: (distance ratio per row, boolean mask of features outside their range)
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        centered = X - self.mean
+        distances = np.sqrt(np.einsum('ij,jk,ik->i', centered, self.inv_cov, centered))
+        outside = (X < self.low) | (X > self.high)
+        return distances / self.threshold, outside
+
+    def describe(self, X):
+        """Per-row {flagged, score, features} dicts for API responses"""
+        scores, outside = self.score(X)
+        return [
+            {
+                'flagged': bool(score > 1 or row.any()),
+                'score': round(float(score), 3),
+                'features': [f for f, flag in zip(self.features, row) if flag]
+            }
+            for score, row in zip(scores, outside)
+        ]
@@ -1,23 +1,408 @@
 import pickle
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
 import numpy as np
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config import Config
+from ml_models.artifact import artifact_root, load_artifact, read_current_version, CURRENT_FILE
+from ml_models.compiled_forest import CompiledForest
+from ml_models.prediction_cache import PredictionCache
+from ml_models.ood import OODGuard
 
-def load_model():
-    """Load trained model and scaler"""
+ModelSnapshot = namedtuple(
+    'ModelSnapshot', 'model scaler compiled manifest guard source version loaded_at load_seconds'
+)
+
+# Model inputs, in training column order
+FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# Accepted (min, max) range for each input
+FEATURE_LIMITS = {
+    'N': (0, np.inf),
+    'P': (0, np.inf),
+    'K': (0, np.inf),
+    'temperature': (-10, np.inf),
+    'humidity': (0, 100),
+    'ph': (0, 14),
+    'rainfall': (0, np.inf),
+}
+
+DEFAULT_CROP_INFO = {
+    'image': 'https://images.unsplash.com/photo-1625246333195-78d9c38ad449',
+    'season': 'N/A',
+    'duration': 'N/A',
+    'tips': 'No additional information available'
+}
+
+
+def model_version(model_bytes, scaler_bytes):
+    """Content hash identifying a trained model + scaler pair"""
+    return hashlib.sha256(model_bytes + scaler_bytes).hexdigest()[:12]
+
+def read_model_current(path=None):
+    """Version of the published model + scaler pickles (MODEL_CURRENT), or None"""
     try:
-        with open(Config.MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
-        with open(Config.SCALER_PATH, 'rb') as f:
-            scaler = pickle.load(f)
-        return model, scaler
+        return Path(path or Config.MODEL_CURRENT_PATH).read_text().strip() or None
     except FileNotFoundError:
-        print("Model not found. Please train the model first.")
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the trained model.
+
+    The model is loaded once and kept resident. The preferred source is the
+    published artifact (ARTIFACT_DIR/full/CURRENT), whose arrays are
+    memory-mapped read-only and shared between worker processes; without
+    one the pickled model and scaler are loaded instead.
+
+    At most every `check_interval` seconds the version pointer is stat()ed:
+    the artifact's CURRENT file, or MODEL_CURRENT for the pickles, which
+    training writes only after both the model and the scaler are in place.
+    When it changes the new version is loaded into a fresh snapshot that
+    replaces the current one in a single assignment. Requests that already
+    hold the old snapshot finish with it, and a failed reload (e.g. a pair
+    that does not match the pointer yet) keeps serving the previous model
+    and is retried at the next check.
+    """
+
+    def __init__(self, model_path, scaler_path, check_interval=5, artifact_dir=None,
+                 artifact_name='full', version_path=None):
+        self.model_path = Path(model_path) if model_path else None
+        self.scaler_path = Path(scaler_path) if scaler_path else None
+        self.version_path = Path(version_path) if version_path else None
+        self.artifact_dir = Path(artifact_dir) if artifact_dir else None
+        self.artifact_name = artifact_name
+        self.check_interval = check_interval
+        self.reload_count = 0
+        self._snapshot = None
+        self._stat_key = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current ModelSnapshot (or None if no model is available)"""
+        now = time.monotonic()
+        if self._snapshot is None or now >= self._next_check:
+            self._refresh(now)
+        return self._snapshot
+
+    @property
+    def _current_file(self):
+        if self.artifact_dir is None:
+            return None
+        return artifact_root(self.artifact_name, self.artifact_dir) / CURRENT_FILE
+
+    def _file_stats(self):
+        paths = [self.model_path, self.scaler_path]
+        if self._current_file is not None and self._current_file.exists():
+            paths = [self._current_file]
+        elif self.version_path is not None and self.version_path.exists():
+            paths = [self.version_path]
+        elif self.model_path is None:
+            # Artifact-only registry with nothing published yet
+            return None
+        try:
+            return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, paths))
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self, now):
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._snapshot is not None and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+
+            stats = self._file_stats()
+            if stats is None:
+                if self._snapshot is None and self.model_path is not None:
+                    print("Model not found. Please train the model first.")
+                return
+            if stats == self._stat_key:
+                return
+
+            try:
+                started = time.perf_counter()
+                if self._current_file is not None and self._current_file.exists():
+                    snapshot = self._load_artifact()
+                else:
+                    snapshot = self._load_pickles()
+            except Exception as e:
+                print(f"Model load failed, keeping previous model: {e}")
+                return
+
+            self._stat_key = stats
+            if snapshot is None:
+                # Files were touched but the version did not change
+                return
+
+            if self._snapshot is not None:
+                self.reload_count += 1
+                print(f"Reloaded model {self._snapshot.version} -> {snapshot.version}")
+
+            self._snapshot = snapshot._replace(
+                loaded_at=datetime.now().isoformat(timespec='seconds'),
+                load_seconds=time.perf_counter() - started
+            )
+
+    def _load_artifact(self):
+        version = read_current_version(self.artifact_name, self.artifact_dir)
+        if self._snapshot is not None and version == self._snapshot.version:
+            return None
+        arrays, manifest = load_artifact(self.artifact_name, version, self.artifact_dir)
+        return ModelSnapshot(
+            model=None,
+            scaler=None,
+            compiled=CompiledForest(arrays, version=version),
+            manifest=manifest,
+            guard=OODGuard.from_manifest(manifest),
+            source='artifact',
+            version=version,
+            loaded_at=None,
+            load_seconds=None
+        )
+
+    def _load_pickles(self):
+        expected = read_model_current(self.version_path) if self.version_path else None
+        if self._snapshot is not None and expected and expected == self._snapshot.version:
+            return None
+        model_bytes = self.model_path.read_bytes()
+        scaler_bytes = self.scaler_path.read_bytes()
+        version = model_version(model_bytes, scaler_bytes)
+        if expected and version != expected:
+            # Another training run is replacing the pair right now
+            raise ValueError(f"model/scaler pair is {version}, MODEL_CURRENT says {expected}")
+        if self._snapshot is not None and version == self._snapshot.version:
+            return None
+        return ModelSnapshot(
+            model=pickle.loads(model_bytes),
+            scaler=pickle.loads(scaler_bytes),
+            compiled=None,
+            manifest=None,
+            guard=None,
+            source='pickle',
+            version=version,
+            loaded_at=None,
+            load_seconds=None
+        )
+
+    def info(self):
+        """Describe the resident model for monitoring"""
+        snapshot = self.get()
+        if snapshot is None:
+            return {'loaded': False, 'model_path': str(self.model_path or '')}
+        info = {
+            'loaded': True,
+            'version': snapshot.version,
+            'source': snapshot.source,
+            'loaded_at': snapshot.loaded_at,
+            'load_ms': round(snapshot.load_seconds * 1000, 2),
+            'reloads': self.reload_count,
+            'compiled': snapshot.compiled is not None,
+            'ood_guard': snapshot.guard is not None,
+            'model_path': str(self.model_path or '')
+        }
+        if snapshot.manifest:
+            info['trained_at'] = snapshot.manifest.get('created_at')
+            info['metrics'] = snapshot.manifest.get('metrics')
+        return info
+
+
+# 'full' is the trained forest; 'lite' is the distilled single tree for low-end hardware
+MODEL_TIERS = ('full', 'lite')
+
+model_registry = ModelRegistry(
+    Config.MODEL_PATH,
+    Config.SCALER_PATH,
+    Config.MODEL_RELOAD_INTERVAL,
+    Config.ARTIFACT_DIR if Config.USE_COMPILED_MODEL else None,
+    version_path=Config.MODEL_CURRENT_PATH
+)
+
+model_registries = {
+    'full': model_registry,
+    'lite': ModelRegistry(None, None, Config.MODEL_RELOAD_INTERVAL, Config.ARTIFACT_DIR, 'lite'),
+}
+
+# One cache per tier, since each invalidates on its own model version
+prediction_caches = {
+    tier: PredictionCache(
+        max_size=Config.PREDICTION_CACHE_SIZE,
+        ttl=Config.PREDICTION_CACHE_TTL,
+        quantum=Config.PREDICTION_CACHE_QUANTUM
+    )
+    for tier in MODEL_TIERS
+}
+prediction_cache = prediction_caches['full']
+
+def _get_snapshot(tier=None):
+    """Resolve the tier to serve (default Config.MODEL_TIER), falling back to the full model"""
+    tier = tier if tier in model_registries else Config.MODEL_TIER
+    snapshot = model_registries[tier].get()
+    if snapshot is None and tier != 'full':
+        tier, snapshot = 'full', model_registry.get()
+    return tier, snapshot
+
+def load_model():
+    """Load trained model and scaler"""
+    snapshot = model_registry.get()
+    if snapshot is None:
         return None, None
+    return snapshot.model, snapshot.scaler
+
+def get_model_info():
+    """Return version and load details of the resident model"""
+    info = model_registry.info()
+    info['cache'] = prediction_cache.stats()
+    info['default_tier'] = Config.MODEL_TIER
+    for tier in MODEL_TIERS[1:]:
+        info[tier] = model_registries[tier].info()
+        info[tier]['cache'] = prediction_caches[tier].stats()
+    return info
+
+def get_crop_classes():
+    """Crop labels the full model can predict"""
+    snapshot = model_registry.get()
+    if snapshot is None:
+        return []
+    model = snapshot.compiled if snapshot.compiled is not None else snapshot.model
+    return [str(c) for c in model.classes_]
+
+def get_crop_info(crop):
+    """Look up display metadata for a crop in Config.CROP_INFO"""
+    return Config.CROP_INFO.get(str(crop).lower(), DEFAULT_CROP_INFO)
+
+def validate_inputs(X):
+    """
+    Check a matrix of inputs against FEATURE_LIMITS
+    
+    Args:
+        X: array of shape (n_samples, len(FEATURES)); missing values as NaN
+    
+    Returns:
+        ndarray: boolean mask of shape X.shape, True where a value is missing or out of range
+    """
+    X = np.asarray(X, dtype=float)
+    low = np.array([FEATURE_LIMITS[f][0] for f in FEATURES])
+    high = np.array([FEATURE_LIMITS[f][1] for f in FEATURES])
+    # NaN fails both comparisons, so it is flagged too
+    return ~((X >= low) & (X <= high))
+
+def _predict_proba(snapshot, X):
+    """Class probabilities and class labels for raw inputs"""
+    if snapshot.compiled is not None:
+        return snapshot.compiled.predict_proba(X), snapshot.compiled.classes_
+    return snapshot.model.predict_proba(snapshot.scaler.transform(X)), snapshot.model.classes_
+
+def _explanations(snapshot, X, probabilities, classes):
+    """
+    Why the top crop was picked, one dict per row (None if the model cannot explain)
+    
+    Contributions are in percentage points of the top crop's confidence and
+    add up, with the base rate, to that confidence.
+    """
+    compiled = snapshot.compiled
+    if compiled is None or not compiled.can_explain:
+        return [None] * len(X)
+    
+    best = probabilities.argmax(axis=1)
+    bias, contributions = compiled.explain(X, best)
+    results = []
+    for c, row_bias, row_contrib, row_x in zip(best, bias, contributions, X):
+        order = np.argsort(-np.abs(row_contrib), kind='stable')
+        results.append({
+            'crop': str(classes[c]),
+            'base_rate': round(float(row_bias) * 100, 2),
+            'contributions': [
+                {
+                    'feature': FEATURES[i],
+                    'value': float(row_x[i]),
+                    'contribution': round(float(row_contrib[i]) * 100, 2)
+                }
+                for i in order
+            ]
+        })
+    return results
 
-def predict_crop(N, P, K, temperature, humidity, ph, rainfall):
+def _crop_entry(crop, probability):
+    """Crop name, confidence (%) and CROP_INFO metadata"""
+    crop_info = get_crop_info(crop)
+    return {
+        'crop': str(crop),
+        'confidence': round(float(probability) * 100, 2),
+        'image': crop_info.get('image'),
+        'season': crop_info.get('season'),
+        'duration': crop_info.get('duration'),
+        'tips': crop_info.get('tips')
+    }
+
+def _rank_predictions(probabilities, classes, k=1):
+    """
+    Turn a probability matrix into prediction dicts
+    
+    The top crop and its confidence come from the same predict_proba pass;
+    with k > 1 the next k-1 crops with non-zero probability are returned
+    under 'alternatives', best first.
+    """
+    k = max(1, min(int(k), len(classes)))
+    if k == 1:
+        ranked = probabilities.argmax(axis=1)[:, None]
+    else:
+        ranked = np.argsort(-probabilities, axis=1, kind='stable')[:, :k]
+    
+    results = []
+    for row, order in zip(probabilities, ranked):
+        result = {'success': True}
+        result.update(_crop_entry(classes[order[0]], row[order[0]]))
+        if k > 1:
+            result['alternatives'] = [
+                _crop_entry(classes[i], row[i]) for i in order[1:] if row[i] > 0
+            ]
+        results.append(result)
+    return results
+
+def predict_crops(X, k=1, tier=None, explain=False):
+    """
+    Predict crops for many input rows with a single predict_proba call
+    
+    Args:
+        X: array of shape (n_samples, len(FEATURES)), already validated
+        k: number of ranked crops per row (top crop + k-1 alternatives)
+        tier: 'full' or 'lite' (default Config.MODEL_TIER)
+        explain: add per-feature contributions under 'explanation'
+    
+    Returns:
+        list: one prediction dict per row, in the same format as predict_crop
+    """
+    tier, snapshot = _get_snapshot(tier)
+    
+    if snapshot is None:
+        raise RuntimeError('Model not loaded. Please train the model first.')
+    
+    X = np.asarray(X, dtype=float).reshape(-1, len(FEATURES))
+    if len(X) == 0:
+        return []
+    
+    probabilities, classes = _predict_proba(snapshot, X)
+    results = _rank_predictions(probabilities, classes, k)
+    ood = snapshot.guard.describe(X) if snapshot.guard is not None else [None] * len(X)
+    explanations = _explanations(snapshot, X, probabilities, classes) if explain else None
+    for i, (result, row_ood) in enumerate(zip(results, ood)):
+        result['tier'] = tier
+        if row_ood is not None:
+            result['ood'] = row_ood
+        if explain:
+            result['explanation'] = explanations[i]
+    return results
+
+def predict_crop(N, P, K, temperature, humidity, ph, rainfall, k=1, tier=None, explain=False):
     """
     Predict crop based on input parameters
     
@@ -29,50 +414,48 @@ def predict_crop(N, P, K, temperature, humidity, ph, rainfall):
         humidity: Humidity percentage
         ph: pH value
         rainfall: Rainfall in mm
+        k: number of ranked crops to return (top crop + k-1 alternatives)
+        tier: 'full' or 'lite' (default Config.MODEL_TIER); falls back to
+              'full' when the lite model has not been trained
+        explain: add per-feature contributions to the top crop's confidence
+                 under 'explanation' (None if the served model cannot explain)
     
     Returns:
-        dict: Prediction result with crop name and confidence
+        dict: Prediction result with crop name, confidence, the tier that
+              served it and, if k > 1, a ranked list of alternative crops
     """
     
-    model, scaler = load_model()
+    tier, snapshot = _get_snapshot(tier)
     
-    if model is None or scaler is None:
+    if snapshot is None:
         return {
             'success': False,
             'error': 'Model not loaded. Please train the model first.'
         }
     
+    inputs = dict(zip(FEATURES, (N, P, K, temperature, humidity, ph, rainfall)))
+    cache = prediction_caches[tier]
+    cache_key = cache.make_key(inputs) + (k, bool(explain))
+    cached = cache.get(cache_key, snapshot.version)
+    if cached is not None:
+        return cached
+    
     try:
         # Prepare input
         input_data = np.array([[N, P, K, temperature, humidity, ph, rainfall]])
         
-        # Scale input
-        input_scaled = scaler.transform(input_data)
-        
-        # Predict
-        prediction = model.predict(input_scaled)[0]
-        
-        # Get prediction probabilities
-        probabilities = model.predict_proba(input_scaled)[0]
-        confidence = max(probabilities) * 100
-        
-        # Get crop info from config
-        crop_info = Config.CROP_INFO.get(prediction.lower(), {
-            'image': 'https://images.unsplash.com/photo-1625246333195-78d9c38ad449',
-            'season': 'N/A',
-            'duration': 'N/A',
-            'tips': 'No additional information available'
-        })
+        # One predict_proba pass gives the top crop, its confidence and the alternatives
+        probabilities, classes = _predict_proba(snapshot, input_data)
+        result = _rank_predictions(probabilities, classes, k)[0]
+        result['tier'] = tier
+        if snapshot.guard is not None:
+            # Flag inputs outside the training envelope
+            result['ood'] = snapshot.guard.describe(input_data)[0]
+        if explain:
+            result['explanation'] = _explanations(snapshot, input_data, probabilities, classes)[0]
         
-        return {
-            'success': True,
-            'crop': prediction,
-            'confidence': round(confidence, 2),
-            'image': crop_info.get('image'),
-            'season': crop_info.get('season'),
-            'duration': crop_info.get('duration'),
-            'tips': crop_info.get('tips')
-        }
+        cache.put(cache_key, snapshot.version, result)
+        return result
     
     except Exception as e:
         return {
@@ -80,7 +463,169 @@ def predict_crop(N, P, K, temperature, humidity, ph, rainfall):
             'error': str(e)
         }
 
+def sweep_crops(base, axes, tier=None):
+    """
+    Score a what-if grid around a base profile in one predict_proba call
+    
+    Args:
+        base: {feature: value} for all FEATURES
+        axes: one or two (feature, values) pairs to vary
+        tier: 'full' or 'lite' (default Config.MODEL_TIER)
+    
+    Returns:
+        dict: axis values, the crops that appear, and matrices (shaped like
+              the grid, first axis = rows) of indexes into crops and of
+              confidences
+    
+    Raises:
+        ValueError: unknown feature, too many points or out-of-range values
+    """
+    tier, snapshot = _get_snapshot(tier)
+    if snapshot is None:
+        raise RuntimeError('Model not loaded. Please train the model first.')
+    
+    if not 1 <= len(axes) <= 2:
+        raise ValueError('Sweep one or two features')
+    names = [feature for feature, _ in axes]
+    if len(set(names)) != len(names) or any(f not in FEATURES for f in names):
+        raise ValueError('Sweep features must be distinct names from ' + ', '.join(FEATURES))
+    
+    values = [np.asarray(v, dtype=float) for _, v in axes]
+    shape = tuple(len(v) for v in values)
+    if int(np.prod(shape)) > Config.SWEEP_MAX_POINTS:
+        raise ValueError(f'Too many grid points (max {Config.SWEEP_MAX_POINTS})')
+    
+    X = np.tile([float(base[f]) for f in FEATURES], (int(np.prod(shape)), 1))
+    for column, grid in zip(names, np.meshgrid(*values, indexing='ij')):
+        X[:, FEATURES.index(column)] = grid.ravel()
+    
+    invalid = validate_inputs(X).any(axis=0)
+    if invalid.any():
+        raise ValueError('Invalid input values: ' +
+                         ', '.join(f for f, flag in zip(FEATURES, invalid) if flag))
+    
+    probabilities, classes = _predict_proba(snapshot, X)
+    best = probabilities.argmax(axis=1)
+    # Dictionary-encode the crops so the matrix is small integers
+    used, codes = np.unique(best, return_inverse=True)
+    confidence = np.round(probabilities[np.arange(len(best)), best] * 100, 2)
+    
+    return {
+        'success': True,
+        'tier': tier,
+        'base': {f: float(base[f]) for f in FEATURES},
+        'axes': [{'feature': f, 'values': v.tolist()} for f, v in zip(names, values)],
+        'crops': [str(classes[i]) for i in used],
+        'crop_index': codes.reshape(shape).tolist(),
+        'confidence': confidence.reshape(shape).tolist()
+    }
+
+def _score_chunk(X, tier=None):
+    """Top crop, confidence (%) and OOD score per row; invalid rows get '' and NaN"""
+    tier, snapshot = _get_snapshot(tier)
+    if snapshot is None:
+        raise RuntimeError("Model not loaded. Please train the model first.")
+    
+    crops = np.full(len(X), '', dtype=object)
+    confidence = np.full(len(X), np.nan)
+    ood_score = np.full(len(X), np.nan)
+    valid = ~validate_inputs(X).any(axis=1)
+    if valid.any():
+        probabilities, classes = _predict_proba(snapshot, X[valid])
+        best = probabilities.argmax(axis=1)
+        crops[valid] = np.asarray(classes)[best]
+        confidence[valid] = np.round(probabilities[np.arange(len(best)), best] * 100, 2)
+        if snapshot.guard is not None:
+            ood_score[valid] = np.round(snapshot.guard.score(X[valid])[0], 3)
+    return crops, confidence, ood_score
+
+def score_csv(in_path, out_path, chunk_size=None, jobs=1, tier=None):
+    """
+    Score a CSV shaped like Crop_recommendation.csv
+    
+    The input is read `chunk_size` rows at a time and each chunk is written
+    to out_path (input columns + predicted_crop, confidence, ood_score) as soon as it is
+    scored, so memory stays flat however large the file is. With jobs > 1
+    chunks are scored in a process pool, at most 2*jobs chunks in flight.
+    
+    Returns:
+        dict: rows, invalid rows, seconds and rows/sec
+    """
+    import pandas as pd
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    
+    chunk_size = chunk_size or Config.SCORE_CHUNK_SIZE
+    reader = pd.read_csv(in_path, chunksize=chunk_size, float_precision='round_trip')
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    pending = deque()
+    stats = {'rows': 0, 'invalid': 0}
+    started = time.perf_counter()
+    
+    def write(chunk, crops, confidence, ood_score):
+        chunk['predicted_crop'] = crops
+        chunk['confidence'] = confidence
+        chunk['ood_score'] = ood_score
+        chunk.to_csv(out_path, mode='w' if stats['rows'] == 0 else 'a',
+                     header=stats['rows'] == 0, index=False)
+        stats['rows'] += len(chunk)
+        stats['invalid'] += int((crops == '').sum())
+        elapsed = time.perf_counter() - started
+        print(f"   {stats['rows']:,} rows ({stats['rows'] / elapsed:,.0f} rows/sec)")
+    
+    try:
+        for chunk in reader:
+            missing = [f for f in FEATURES if f not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing columns: {', '.join(missing)}")
+            X = chunk[FEATURES].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+            
+            if pool is None:
+                write(chunk, *_score_chunk(X, tier))
+                continue
+            
+            pending.append((chunk, pool.submit(_score_chunk, X, tier)))
+            if len(pending) >= 2 * jobs:
+                chunk, future = pending.popleft()
+                write(chunk, *future.result())
+        
+        while pending:
+            chunk, future = pending.popleft()
+            write(chunk, *future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    if stats['rows'] == 0:
+        # Empty input: still produce a file with the expected header
+        pd.DataFrame(columns=FEATURES + ['predicted_crop', 'confidence', 'ood_score']).to_csv(
+            out_path, index=False
+        )
+    
+    seconds = time.perf_counter() - started
+    stats['seconds'] = round(seconds, 2)
+    stats['rows_per_sec'] = round(stats['rows'] / seconds) if seconds else None
+    return stats
+
 if __name__ == '__main__':
-    # Test prediction
-    result = predict_crop(90, 42, 43, 20.8, 82.0, 6.5, 202.9)
-    print(result)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Crop prediction')
+    subparsers = parser.add_subparsers(dest='command')
+    score = subparsers.add_parser('score', help='score a CSV file in chunks')
+    score.add_argument('input')
+    score.add_argument('output')
+    score.add_argument('--chunk-size', type=int, default=Config.SCORE_CHUNK_SIZE)
+    score.add_argument('--jobs', type=int, default=1, help='worker processes')
+    score.add_argument('--tier', choices=MODEL_TIERS, default=None)
+    args = parser.parse_args()
+    
+    if args.command == 'score':
+        print(f"Scoring {args.input} -> {args.output}")
+        result = score_csv(args.input, args.output, args.chunk_size, args.jobs, args.tier)
+        print(f"✓ {result['rows']:,} rows in {result['seconds']}s "
+              f"({result['rows_per_sec']:,} rows/sec), {result['invalid']:,} invalid")
+    else:
+        # Test prediction
+        result = predict_crop(90, 42, 43, 20.8, 82.0, 6.5, 202.9)
+        print(result)
@@ -0,0 +1,108 @@
+"""
+LRU/TTL cache for crop predictions
+
+Kiosks and the web form often resubmit the same soil card and default
+weather, so results are memoised on the quantised inputs. Entries are
+tied to the model version that produced them and the whole cache is
+dropped as soon as a different version is seen.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, max_size=4096, ttl=3600, quantum=None):
+        """
+        Args:
+            max_size: maximum number of entries (0 disables the cache)
+            ttl: seconds an entry stays valid
+            quantum: {feature: step} - inputs are rounded to a multiple of
+                     step before lookup; features without a step must match exactly
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.quantum = quantum or {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def make_key(self, inputs):
+        """
+        Build a cache key from {feature: value}
+
+        Values are snapped to the configured step so near-identical inputs share an entry.
+        """
+        key = []
+        for feature, value in inputs.items():
+            step = self.quantum.get(feature)
+            value = float(value)
+            key.append(round(value / step) if step else value)
+        return tuple(key)
+
+    def get(self, key, version):
+        """Return a copy of the cached result for key, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key, version, result):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self, version):
+        # Caller holds the lock
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'model_version': self._version
+            }
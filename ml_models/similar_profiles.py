@@ -0,0 +1,182 @@
+"""
+Nearest labelled samples in crops_data for a soil/weather profile
+
+Features are standardised (so one unit of rainfall does not outweigh a
+whole pH step) and stored in a scikit-learn KDTree. The tree, the crops_data
+rowids and labels are pickled to Config.SIMILAR_INDEX_PATH together with a
+fingerprint of the table; the index is rebuilt when the fingerprint no
+longer matches, either by init_db.py or lazily on the first query.
+"""
+
+import os
+import pickle
+import threading
+import time
+import numpy as np
+from sklearn.neighbors import KDTree
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import Config
+from db import get_connection
+
+FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# Rows fetched from SQLite per step while building
+BUILD_CHUNK = 100000
+
+def table_fingerprint(conn):
+    """Cheap identity of crops_data: (row count, max rowid)"""
+    count, max_rowid = conn.execute('SELECT COUNT(*), MAX(rowid) FROM crops_data').fetchone()
+    return (count, max_rowid)
+
+def build_index(db_path=None, index_path=None, leaf_size=40):
+    """
+    Build the KD-tree over crops_data and save it
+
+    Returns:
+        dict: the saved index
+    """
+    db_path = db_path or Config.DATABASE_PATH
+    index_path = Path(index_path or Config.SIMILAR_INDEX_PATH)
+
+    conn = get_connection(db_path)
+    fingerprint = table_fingerprint(conn)
+    cursor = conn.execute(
+        f'SELECT rowid, {", ".join(FEATURES)}, label FROM crops_data ORDER BY rowid'
+    )
+    rowids, features, labels = [], [], []
+    while True:
+        rows = cursor.fetchmany(BUILD_CHUNK)
+        if not rows:
+            break
+        rowids.append(np.array([r[0] for r in rows], dtype=np.int64))
+        features.append(np.array([tuple(r)[1:-1] for r in rows], dtype=np.float64))
+        labels.append(np.array([r[-1] for r in rows], dtype=object))
+
+    if not rowids:
+        raise ValueError('crops_data is empty')
+
+    X = np.concatenate(features)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+
+    index = {
+        'fingerprint': fingerprint,
+        'mean': mean,
+        'scale': scale,
+        'rowids': np.concatenate(rowids),
+        'labels': np.concatenate(labels).astype(str),
+        'tree': KDTree((X - mean) / scale, leaf_size=leaf_size)
+    }
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(f'.tmp{os.getpid()}')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+    return index
+
+class SimilarProfilesIndex:
+    """Lazily loaded, self-refreshing KD-tree over crops_data"""
+
+    def __init__(self, db_path, index_path, check_interval=60):
+        self.db_path = db_path
+        self.index_path = Path(index_path)
+        self.check_interval = check_interval
+        self._index = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current index dict, loading or rebuilding it if needed"""
+        now = time.monotonic()
+        if self._index is None or now >= self._next_check:
+            self._refresh(now)
+        return self._index
+
+    def _refresh(self, now):
+        with self._lock:
+            if self._index is not None and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+
+            fingerprint = table_fingerprint(get_connection(self.db_path))
+
+            if self._index is not None and self._index['fingerprint'] == fingerprint:
+                return
+
+            index = None
+            if self.index_path.exists():
+                try:
+                    with open(self.index_path, 'rb') as f:
+                        index = pickle.load(f)
+                except Exception as e:
+                    print(f"Could not read similar-profiles index: {e}")
+            if index is None or index['fingerprint'] != fingerprint:
+                index = build_index(self.db_path, self.index_path)
+            self._index = index
+
+    def query(self, X, k=5):
+        """
+        Nearest crops_data rows for each input profile
+
+        Args:
+            X: raw feature rows, shape (n_samples, len(FEATURES))
+            k: neighbours per row
+
+        Returns:
+            list: per input row, a list of {id, features..., label, distance}
+        """
+        index = self.get()
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        k = min(k, len(index['rowids']))
+        distances, positions = index['tree'].query((X - index['mean']) / index['scale'], k=k)
+
+        # The tree keeps the scaled rows; undo the scaling for the response
+        data = np.asarray(index['tree'].get_arrays()[0])
+        results = []
+        for row_distances, row_positions in zip(distances, positions):
+            raw = data[row_positions] * index['scale'] + index['mean']
+            results.append([
+                dict(
+                    id=int(index['rowids'][pos]),
+                    **{f: round(float(v), 4) for f, v in zip(FEATURES, values)},
+                    label=str(index['labels'][pos]),
+                    distance=round(float(dist), 4)
+                )
+                for pos, values, dist in zip(row_positions, raw, row_distances)
+            ])
+        return results
+
+    def info(self):
+        index = self._index
+        if index is None:
+            return {'loaded': False, 'index_path': str(self.index_path)}
+        return {
+            'loaded': True,
+            'rows': len(index['rowids']),
+            'fingerprint': list(index['fingerprint']),
+            'index_path': str(self.index_path)
+        }
+
+similar_profiles = SimilarProfilesIndex(
+    Config.DATABASE_PATH,
+    Config.SIMILAR_INDEX_PATH,
+    Config.SIMILAR_INDEX_CHECK_INTERVAL
+)
+
+if __name__ == '__main__':
+    # Rebuild the index and time a query
+    index = build_index()
+    print(f"✓ Indexed {len(index['rowids'])} rows -> {Config.SIMILAR_INDEX_PATH}")
+
+    sample = [[90, 42, 43, 20.8, 82.0, 6.5, 202.9]]
+    similar_profiles.query(sample)
+    start = time.perf_counter()
+    for _ in range(1000):
+        neighbours = similar_profiles.query(sample)[0]
+    print(f"✓ Query: {(time.perf_counter() - start):.3f} ms per call")
+    for n in neighbours:
+        print(f"   {n['label']:12s} distance {n['distance']}")
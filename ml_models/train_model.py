@@ -1,17 +1,297 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV
+import argparse
+import hashlib
+import json
+import time
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import pickle
+import os
+import sqlite3
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config import Config
+from ml_models.artifact import write_artifact, load_artifact
+from ml_models.compiled_forest import (CompiledForest, compile_forest, check_parity,
+                                      benchmark, time_single_row)
+from ml_models.predict import model_version
+from ml_models.ood import compute_envelope
 
-def train_crop_model():
-    """Train Random Forest model for crop recommendation"""
+# Forest configuration used unless --search picks another
+DEFAULT_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 15,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+}
+
+# Grid explored by --search
+SEARCH_GRID = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [8, 12, 15, None],
+    'min_samples_leaf': [1, 2, 4],
+    'min_samples_split': [5],
+}
+
+def save_bytes(data, path):
+    """Write to a temp file and rename it into place, so a running app never reads a partial file"""
+    tmp_path = Path(str(path) + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def save_model_pair(model_bytes, scaler_bytes):
+    """
+    Publish the pickled model and scaler together
+
+    Both are written to temp files and renamed into place, then
+    MODEL_CURRENT is replaced with the pair's version. The app only reloads
+    the pickles when MODEL_CURRENT changes and checks the pair against it,
+    so it never serves a new scaler with an old model.
+
+    Returns:
+        str: version of the pair
+    """
+    version = model_version(model_bytes, scaler_bytes)
+    Config.MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    staged = []
+    for data, path in ((scaler_bytes, Config.SCALER_PATH), (model_bytes, Config.MODEL_PATH)):
+        tmp_path = Path(str(path) + '.tmp')
+        tmp_path.write_bytes(data)
+        staged.append((tmp_path, path))
+    for tmp_path, path in staged:
+        os.replace(tmp_path, path)
+    save_bytes(version.encode(), Config.MODEL_CURRENT_PATH)
+    return version
+
+def build_manifest(model, scaler, feature_names, metrics, classes=None, envelope=None):
+    """Metadata stored next to the artifact arrays"""
+    classes = model.classes_ if classes is None else classes
+    manifest = {
+        'model_type': type(model).__name__,
+        'params': {k: v for k, v in model.get_params().items()
+                   if isinstance(v, (int, float, str, bool, type(None)))},
+        'feature_names': list(feature_names),
+        'classes': [str(c) for c in classes],
+        'scaler': {
+            'mean': scaler.mean_.tolist(),
+            'scale': scaler.scale_.tolist()
+        },
+        'feature_importance': dict(zip(feature_names, model.feature_importances_.round(6).tolist())),
+        'metrics': metrics
+    }
+    if envelope is not None:
+        manifest['envelope'] = envelope
+    return manifest
+
+def _fold_key(params, fold, n_folds, data_hash):
+    """Cache key for one cross-validation fit"""
+    payload = json.dumps({
+        'params': params,
+        'fold': fold,
+        'n_folds': n_folds,
+        'data': data_hash,
+        'sklearn': sklearn.__version__
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+def _cached_score(path):
+    """Score cached for one fit, or None if it was never written or is unreadable"""
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _score_fold(params, X, y, train_idx, test_idx):
+    """Fit one fold single-threaded (folds already run in parallel)"""
+    started = time.perf_counter()
+    model = RandomForestClassifier(**params, random_state=42, n_jobs=1)
+    model.fit(X[train_idx], y[train_idx])
+    return {
+        'accuracy': float(accuracy_score(y[test_idx], model.predict(X[test_idx]))),
+        'fit_seconds': round(time.perf_counter() - started, 3)
+    }
+
+def search_hyperparameters(X, y, scaler, X_raw, accuracy_floor=0.99, n_folds=5, n_jobs=-1,
+                           grid=None, cache_dir=None):
+    """
+    Cross-validated search over forest size/depth/leaf parameters
+    
+    Every (parameters, fold) fit runs in parallel on all cores and its score
+    is cached on disk, keyed on the parameters, fold and training data, so
+    rerunning with a larger grid only fits the new combinations.
+    
+    Among configurations whose mean CV accuracy reaches `accuracy_floor`,
+    each is refit on the full training set, compiled, and the one with the
+    lowest measured single-row latency (then smallest artifact) is chosen.
+    If none reaches the floor the most accurate one is used.
+    
+    Args:
+        X, y: scaled training features and labels
+        scaler: fitted scaler (needed to compile candidates)
+        X_raw: unscaled rows used to time candidates
+    
+    Returns:
+        tuple: (best params dict, list of per-configuration results)
+    """
+    grid = grid or SEARCH_GRID
+    cache_dir = Path(cache_dir or Config.SEARCH_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    X = np.asarray(X)
+    y = np.asarray(y)
+    data_hash = hashlib.sha256(X.tobytes() + '|'.join(map(str, y)).encode()).hexdigest()[:16]
+    splits = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(X, y))
+    candidates = list(ParameterGrid(grid))
+    
+    # Collect cached fold scores, queue the rest
+    scores = {}
+    pending = []
+    for i, params in enumerate(candidates):
+        for fold, (train_idx, test_idx) in enumerate(splits):
+            path = cache_dir / f'{_fold_key(params, fold, n_folds, data_hash)}.json'
+            cached = _cached_score(path)
+            if cached is not None:
+                scores[(i, fold)] = cached
+            else:
+                pending.append((i, fold, path, train_idx, test_idx))
+    
+    print(f"   {len(candidates)} configurations x {n_folds} folds: "
+          f"{len(scores)} cached, {len(pending)} to fit")
+    
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_score_fold)(candidates[i], X, y, train_idx, test_idx)
+        for i, fold, path, train_idx, test_idx in pending
+    )
+    for (i, fold, path, _, _), result in zip(pending, fitted):
+        save_bytes(json.dumps(result).encode(), path)
+        scores[(i, fold)] = result
+    
+    results = []
+    for i, params in enumerate(candidates):
+        fold_scores = [scores[(i, fold)]['accuracy'] for fold in range(n_folds)]
+        results.append({
+            'params': params,
+            'cv_accuracy': float(np.mean(fold_scores)),
+            'cv_std': float(np.std(fold_scores))
+        })
+    
+    passing = [r for r in results if r['cv_accuracy'] >= accuracy_floor]
+    if not passing:
+        best = max(results, key=lambda r: r['cv_accuracy'])
+        print(f"   ⚠ No configuration reached {accuracy_floor*100:.2f}% CV accuracy, "
+              f"using the most accurate ({best['cv_accuracy']*100:.2f}%)")
+        return best['params'], results
+    
+    # Measure what serving each passing configuration would cost
+    for r in passing:
+        model = RandomForestClassifier(**r['params'], random_state=42, n_jobs=-1).fit(X, y)
+        compiled = CompiledForest(compile_forest(model, scaler))
+        r['latency_ms'] = round(time_single_row(compiled.predict_proba, X_raw, repeats=100), 4)
+        r['artifact_bytes'] = compiled.nbytes
+    
+    passing.sort(key=lambda r: (round(r['latency_ms'], 2), r['artifact_bytes']))
+    print(f"   {len(passing)} configurations reach {accuracy_floor*100:.2f}% CV accuracy:")
+    for r in passing[:5]:
+        print(f"     {r['params']}  acc={r['cv_accuracy']*100:.2f}%  "
+              f"latency={r['latency_ms']} ms  size={r['artifact_bytes'] / 1024:.0f} KB")
+    return passing[0]['params'], results
+
+def distill_lite_model(forest, X, max_depth=None, min_samples_leaf=None, augment=None,
+                       random_state=42):
+    """
+    Distil the forest into a single shallow tree
+    
+    The tree is a multi-output regressor fitted on the forest's class
+    probabilities (soft labels) for the training rows plus `augment`
+    Gaussian-jittered copies of each, so it learns the forest's decision
+    surface between training points as well.
+    
+    Args:
+        forest: fitted RandomForestClassifier
+        X: scaled training features
+    
+    Returns:
+        DecisionTreeRegressor: outputs one probability per forest class
+    """
+    max_depth = max_depth or Config.LITE_MAX_DEPTH
+    min_samples_leaf = min_samples_leaf or Config.LITE_MIN_SAMPLES_LEAF
+    augment = Config.LITE_AUGMENT if augment is None else augment
+    
+    X = np.asarray(X, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+    # Scaled features have unit variance, so the jitter is a fixed fraction of each spread
+    X_soft = np.vstack([X] + [X + rng.normal(0, 0.1, X.shape) for _ in range(augment)])
+    
+    tree = DecisionTreeRegressor(max_depth=max_depth, min_samples_leaf=min_samples_leaf,
+                                 random_state=random_state)
+    tree.fit(X_soft, forest.predict_proba(X_soft))
+    return tree
+
+def split_dataset(df):
+    """
+    The stratified 80-20 split every training run uses
+
+    The test rows are never fitted on, by full training or by incremental
+    updates, so both are scored on the same held-out rows.
+
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test)
+    """
+    return train_test_split(df.drop('label', axis=1), df['label'],
+                            test_size=0.2, random_state=42, stratify=df['label'])
+
+def publish_lite_model(forest, scaler, scaler_bytes, X_fit, X_test_raw, y_test, full,
+                       feature_names, envelope=None):
+    """
+    Distil the forest into the lite tier's single tree and publish it
+
+    Args:
+        forest: fitted forest the tree imitates
+        X_fit: scaled rows the forest was fitted on
+        X_test_raw: held-out rows, unscaled
+        y_test: their labels
+        full: the forest's CompiledForest (for the agreement metric)
+
+    Returns:
+        tuple: (CompiledForest of the tree, its manifest metrics)
+    """
+    lite_tree = distill_lite_model(forest, X_fit)
+    lite_version = model_version(pickle.dumps(lite_tree), scaler_bytes)
+    lite = CompiledForest(compile_forest(lite_tree, scaler, classes=forest.classes_),
+                          version=lite_version)
+    lite_pred = lite.predict(X_test_raw)
+    metrics = {
+        'test_accuracy': round(accuracy_score(y_test, lite_pred), 4),
+        'agreement_with_full': round(float(np.mean(lite_pred == full.predict(X_test_raw))), 4),
+        'distilled_from': full.version,
+        'n_nodes': lite.n_nodes,
+        'artifact_bytes': lite.nbytes,
+        'compiled_latency_ms': round(time_single_row(lite.predict_proba, X_test_raw), 4)
+    }
+    lite_manifest = build_manifest(lite_tree, scaler, feature_names, metrics,
+                                   classes=forest.classes_, envelope=envelope)
+    lite_path = write_artifact(lite.arrays, lite_manifest, lite_version, name='lite')
+    print(f"✓ Lite artifact {lite_version} published to {lite_path}")
+    return lite, metrics
+
+def train_crop_model(search=False, accuracy_floor=0.99, n_folds=5, n_jobs=-1):
+    """
+    Train Random Forest model for crop recommendation
+    
+    Args:
+        search: run the cross-validated hyperparameter search instead of DEFAULT_PARAMS
+        accuracy_floor: minimum mean CV accuracy a searched configuration must reach
+        n_folds: cross-validation folds for the search
+        n_jobs: parallel workers for the search (-1 = all cores)
+    """
     
     print("="*60)
     print("CROP RECOMMENDATION MODEL TRAINING")
@@ -35,37 +315,39 @@ def train_crop_model():
     
     # Prepare features and target
     print("\n2. Preparing features and target...")
-    X = df.drop('label', axis=1)
-    y = df['label']
-    
-    feature_names = X.columns.tolist()
+    feature_names = df.drop('label', axis=1).columns.tolist()
     print(f"✓ Features: {feature_names}")
-    print(f"✓ Target classes: {y.nunique()}")
+    print(f"✓ Target classes: {df['label'].nunique()}")
     
     # Split data
     print("\n3. Splitting data (80-20 train-test)...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    X_train, X_test, y_train, y_test = split_dataset(df)
     print(f"✓ Training set: {X_train.shape[0]} samples")
     print(f"✓ Test set: {X_test.shape[0]} samples")
     
     # Feature scaling
     print("\n4. Scaling features...")
+    # Fitted on plain arrays: serving and the compiled forest pass arrays, not DataFrames
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    X_train_scaled = scaler.fit_transform(X_train.to_numpy(dtype=float))
+    X_test_scaled = scaler.transform(X_test.to_numpy(dtype=float))
     print("✓ Features scaled using StandardScaler")
     
+    params = dict(DEFAULT_PARAMS)
+    if search:
+        print("\n4b. Searching hyperparameters...")
+        params, _ = search_hyperparameters(
+            X_train_scaled, y_train, scaler, X_train.to_numpy(dtype=float),
+            accuracy_floor=accuracy_floor, n_folds=n_folds, n_jobs=n_jobs
+        )
+        print(f"✓ Selected: {params}")
+    
     # Train Random Forest model
     print("\n5. Training Random Forest Classifier...")
     print("   (This may take a minute...)")
     
     rf_model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2,
+        **params,
         random_state=42,
         n_jobs=-1
     )
@@ -100,25 +382,249 @@ def train_crop_model():
     print("\n8. Classification Report:")
     print(classification_report(y_test, test_pred))
     
-    # Save model and scaler
-    print("\n9. Saving model and scaler...")
-    Config.MODEL_PATH.parent.mkdir(exist_ok=True)
+    # Export array-backed forest
+    print("\n9. Compiling forest to NumPy arrays...")
+    model_bytes = pickle.dumps(rf_model)
+    scaler_bytes = pickle.dumps(scaler)
+    version = model_version(model_bytes, scaler_bytes)
     
-    with open(Config.MODEL_PATH, 'wb') as f:
-        pickle.dump(rf_model, f)
-    print(f"✓ Model saved to {Config.MODEL_PATH}")
+    compiled = CompiledForest(compile_forest(rf_model, scaler), version=version)
+    parity = check_parity(rf_model, scaler, compiled, X_test.to_numpy(dtype=float))
+    latency = benchmark(rf_model, scaler, compiled, X_test.to_numpy(dtype=float))
+    print(f"✓ {compiled.n_nodes} nodes, {compiled.nbytes / 1024:.0f} KB")
+    print(f"✓ Parity with scikit-learn: {parity['label_agreement']*100:.2f}% labels, "
+          f"max probability diff {parity['max_proba_diff']:.2e}")
+    print(f"✓ Single-row latency: sklearn {latency['sklearn_ms']} ms, "
+          f"compiled {latency['compiled_ms']} ms ({latency['speedup']}x)")
     
-    with open(Config.SCALER_PATH, 'wb') as f:
-        pickle.dump(scaler, f)
+    # Save model and scaler
+    print("\n10. Saving model and scaler...")
+    # Both files first, then MODEL_CURRENT: the app reloads when MODEL_CURRENT changes
+    save_model_pair(model_bytes, scaler_bytes)
     print(f"✓ Scaler saved to {Config.SCALER_PATH}")
+    print(f"✓ Model saved to {Config.MODEL_PATH}")
+    
+    # Publish the memory-mappable artifact last; the app serves from it
+    envelope = compute_envelope(X_train, feature_names)
+    manifest = build_manifest(rf_model, scaler, feature_names, {
+        'train_accuracy': round(train_accuracy, 4),
+        'test_accuracy': round(test_accuracy, 4),
+        'n_train': int(X_train.shape[0]),
+        'n_test': int(X_test.shape[0]),
+        'n_nodes': compiled.n_nodes,
+        'artifact_bytes': compiled.nbytes,
+        'label_agreement': parity['label_agreement'],
+        'compiled_latency_ms': latency['compiled_ms']
+    }, envelope=envelope)
+    # Confirmed user_predictions are not part of the CSV, so the next
+    # incremental update starts from the first one
+    manifest['feedback_watermark'] = 0
+    # Incremental updates never drop these trees, fitted on the whole training split
+    manifest['base_trees'] = len(rf_model.estimators_)
+    artifact_path = write_artifact(compiled.arrays, manifest, version)
+    print(f"✓ Artifact {version} published to {artifact_path}")
+    
+    # Distilled single tree for low-end hardware
+    print("\n11. Distilling lite model...")
+    X_test_raw = X_test.to_numpy(dtype=float)
+    lite, lite_metrics = publish_lite_model(rf_model, scaler, scaler_bytes, X_train_scaled,
+                                            X_test_raw, y_test, compiled, feature_names,
+                                            envelope)
+    lite_accuracy = lite_metrics['test_accuracy']
+    
+    print(f"   {'tier':6s} {'test acc':>9s} {'agree':>7s} {'latency':>10s} {'nodes':>7s} {'size':>8s}")
+    print(f"   {'full':6s} {test_accuracy*100:8.2f}% {100:6.2f}% {latency['compiled_ms']:8.4f}ms "
+          f"{compiled.n_nodes:7d} {compiled.nbytes / 1024:6.0f}KB")
+    print(f"   {'lite':6s} {lite_accuracy*100:8.2f}% {lite_metrics['agreement_with_full']*100:6.2f}% "
+          f"{lite_metrics['compiled_latency_ms']:8.4f}ms {lite.n_nodes:7d} {lite.nbytes / 1024:6.0f}KB")
     
     print("\n" + "="*60)
     print("MODEL TRAINING COMPLETE!")
     print("="*60)
-    print(f"Final Test Accuracy: {test_accuracy*100:.2f}%")
+    print(f"Final Test Accuracy: {test_accuracy*100:.2f}% (lite: {lite_accuracy*100:.2f}%)")
     print("="*60)
     
     return rf_model, scaler
 
+def load_confirmed_predictions(after_seq=0, db_path=None):
+    """
+    Rows of user_predictions confirmed after confirmation number `after_seq`
+    
+    Confirmations are numbered in the order they arrive (confirmed_seq), so
+    a late confirmation of an old prediction is still picked up.
+    
+    Returns:
+        DataFrame: id, confirmed_seq, the seven features and label (= confirmed_crop)
+    """
+    conn = sqlite3.connect(db_path or Config.DATABASE_PATH)
+    try:
+        return pd.read_sql_query('''
+            SELECT id, confirmed_seq, N, P, K, temperature, humidity, ph, rainfall,
+                   confirmed_crop AS label
+            FROM user_predictions
+            WHERE confirmed_crop IS NOT NULL AND confirmed_seq > ?
+            ORDER BY confirmed_seq
+        ''', conn, params=(after_seq,))
+    finally:
+        conn.close()
+
+def update_crop_model(min_rows=None, new_trees=None, replay_ratio=None, max_trees=None,
+                      accuracy_floor=None):
+    """
+    Add trees to the published model using newly confirmed predictions
+    
+    Only rows past the watermark recorded in the current artifact are used.
+    The new trees are fitted (warm_start) on those rows plus a stratified
+    replay sample of the training split, `replay_ratio` rows per new row, so
+    every class keeps its training signal. The base trees from the last full
+    training and the scaler are kept as they are, which makes an update cost
+    proportional to the new data; past `max_trees`, the oldest update trees
+    are dropped. The updated forest is scored on the held-out test split and
+    only published, with a re-distilled lite tree, if it reaches
+    `accuracy_floor`.
+    
+    Args:
+        min_rows: skip the update below this many new confirmed rows
+        new_trees: trees to add
+        replay_ratio: training rows sampled per new row
+        max_trees: drop the oldest update trees beyond this many trees
+        accuracy_floor: minimum held-out accuracy to publish
+    
+    Returns:
+        str: new model version, or None if nothing was published
+    """
+    min_rows = Config.RETRAIN_MIN_ROWS if min_rows is None else min_rows
+    new_trees = new_trees or Config.RETRAIN_NEW_TREES
+    replay_ratio = Config.RETRAIN_REPLAY_RATIO if replay_ratio is None else replay_ratio
+    max_trees = max_trees or Config.RETRAIN_MAX_TREES
+    accuracy_floor = Config.RETRAIN_ACCURACY_FLOOR if accuracy_floor is None else accuracy_floor
+    
+    print("="*60)
+    print("INCREMENTAL MODEL UPDATE")
+    print("="*60)
+    started = time.perf_counter()
+    
+    print("\n1. Loading published model...")
+    try:
+        _, manifest = load_artifact('full')
+        model_bytes = Config.MODEL_PATH.read_bytes()
+        scaler_bytes = Config.SCALER_PATH.read_bytes()
+    except FileNotFoundError as e:
+        print(f"✗ {e}")
+        print("  Run a full training first: python ml_models/train_model.py")
+        return None
+    
+    if model_version(model_bytes, scaler_bytes) != manifest['version']:
+        print("✗ Pickled model does not match the published artifact; run a full training")
+        return None
+    
+    rf_model = pickle.loads(model_bytes)
+    scaler = pickle.loads(scaler_bytes)
+    watermark = manifest.get('feedback_watermark', 0)
+    # Artifacts from before base_trees was recorded: only a full training's trees are all base
+    base_trees = manifest.get('base_trees')
+    if base_trees is None and 'updated_from' not in manifest:
+        base_trees = len(rf_model.estimators_)
+    if base_trees is None or base_trees + new_trees > max_trees:
+        print(f"✗ No room for {new_trees} more trees next to the base trees "
+              f"(max {max_trees}); run a full training")
+        return None
+    print(f"✓ Model {manifest['version']}: {len(rf_model.estimators_)} trees "
+          f"({base_trees} base), feedback watermark {watermark}")
+    
+    print("\n2. Loading new confirmed predictions...")
+    feedback = load_confirmed_predictions(watermark)
+    known = feedback['label'].isin(rf_model.classes_)
+    if not known.all():
+        print(f"⚠ Skipping {int((~known).sum())} rows with crops the model does not know")
+    new_rows = feedback[known]
+    print(f"✓ {len(new_rows)} new rows since confirmation {watermark}")
+    if len(new_rows) < max(min_rows, 1):
+        print(f"  Need at least {min_rows}; nothing to do")
+        return None
+    
+    print("\n3. Sampling replay rows from the training split...")
+    X_train, X_test, y_train, y_test = split_dataset(pd.read_csv(Config.DATASET_PATH))
+    base = X_train.assign(label=y_train)
+    per_class = max(2, int(np.ceil(len(new_rows) * replay_ratio / base['label'].nunique())))
+    replay = base.groupby('label', group_keys=False).apply(
+        lambda g: g.sample(min(len(g), per_class), random_state=len(rf_model.estimators_))
+    )
+    train = pd.concat([replay, new_rows[replay.columns]], ignore_index=True)
+    X = scaler.transform(train.drop('label', axis=1).to_numpy(dtype=float))
+    y = train['label']
+    print(f"✓ {len(replay)} replay + {len(new_rows)} new = {len(train)} rows")
+    
+    print(f"\n4. Adding {new_trees} trees (warm_start)...")
+    old_trees = len(rf_model.estimators_)
+    rf_model.set_params(warm_start=True, n_estimators=old_trees + new_trees)
+    rf_model.fit(X, y)
+    rf_model.set_params(warm_start=False)
+    if len(rf_model.estimators_) > max_trees:
+        keep_updates = max_trees - base_trees
+        rf_model.estimators_ = (rf_model.estimators_[:base_trees]
+                                + rf_model.estimators_[-keep_updates:])
+        rf_model.n_estimators = max_trees
+    print(f"✓ {old_trees} -> {len(rf_model.estimators_)} trees")
+    
+    print("\n5. Evaluating on the held-out test split...")
+    X_test_raw = X_test.to_numpy(dtype=float)
+    new_X = new_rows.drop(columns=['id', 'confirmed_seq', 'label']).to_numpy(dtype=float)
+    model_bytes = pickle.dumps(rf_model)
+    version = model_version(model_bytes, scaler_bytes)
+    compiled = CompiledForest(compile_forest(rf_model, scaler), version=version)
+    test_accuracy = accuracy_score(y_test, compiled.predict(X_test_raw))
+    feedback_accuracy = accuracy_score(new_rows['label'], compiled.predict(new_X))
+    previous = manifest['metrics'].get('test_accuracy')
+    print(f"✓ Test accuracy: {test_accuracy*100:.2f}%"
+          + (f" (was {previous*100:.2f}%)" if previous is not None else ""))
+    print(f"✓ Accuracy on new rows: {feedback_accuracy*100:.2f}%")
+    if test_accuracy < accuracy_floor:
+        print(f"✗ Below the {accuracy_floor*100:.2f}% floor; keeping {manifest['version']}")
+        return None
+    
+    print("\n6. Publishing...")
+    save_model_pair(model_bytes, scaler_bytes)
+    metrics = {
+        'test_accuracy': round(test_accuracy, 4),
+        'n_test': int(len(X_test)),
+        'n_trees': len(rf_model.estimators_),
+        'n_nodes': compiled.n_nodes,
+        'artifact_bytes': compiled.nbytes,
+        'feedback_rows': int(len(new_rows)),
+        'feedback_accuracy': round(feedback_accuracy, 4)
+    }
+    new_manifest = build_manifest(rf_model, scaler, manifest['feature_names'], metrics,
+                                  envelope=manifest.get('envelope'))
+    # Skipped rows (unknown crops) count as consumed too
+    new_manifest['feedback_watermark'] = int(feedback['confirmed_seq'].max())
+    new_manifest['base_trees'] = base_trees
+    new_manifest['updated_from'] = manifest['version']
+    artifact_path = write_artifact(compiled.arrays, new_manifest, version)
+    print(f"✓ Artifact {version} published to {artifact_path}")
+    
+    print("\n7. Re-distilling lite model...")
+    # The tree imitates the updated forest where it was fitted: training split and new rows
+    X_fit = np.vstack([scaler.transform(X_train.to_numpy(dtype=float)), scaler.transform(new_X)])
+    publish_lite_model(rf_model, scaler, scaler_bytes, X_fit, X_test_raw, y_test, compiled,
+                       manifest['feature_names'], manifest.get('envelope'))
+    print(f"\nUpdate took {time.perf_counter() - started:.1f}s")
+    return version
+
 if __name__ == '__main__':
-    train_crop_model()
+    parser = argparse.ArgumentParser(description='Train the crop recommendation model')
+    parser.add_argument('--search', action='store_true',
+                        help='cross-validated hyperparameter search (cached, all cores)')
+    parser.add_argument('--accuracy-floor', type=float, default=0.99,
+                        help='minimum mean CV accuracy for --search candidates')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1)
+    parser.add_argument('--incremental', action='store_true',
+                        help='add trees for newly confirmed user_predictions instead of retraining')
+    args = parser.parse_args()
+    
+    if args.incremental:
+        update_crop_model()
+    else:
+        train_crop_model(search=args.search, accuracy_floor=args.accuracy_floor,
+                         n_folds=args.folds, n_jobs=args.jobs)
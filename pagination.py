@@ -0,0 +1,231 @@
+"""
+Keyset (cursor) pagination for the listing pages
+
+OFFSET pagination makes SQLite step over every skipped row, so page 500 of
+the market prices costs 500 pages of work. A keyset page instead starts
+just after the last row already shown: the cursor holds that row's sort
+values plus its id as a tie-breaker, and the next query seeks there through
+the same index that serves the ORDER BY.
+
+Cursors are opaque tokens (url-safe base64 of a small JSON list) carrying
+the sort values, the direction (next/prev) and the page number, so the
+templates can keep showing "Page X of Y". Plain ?page=N links still work
+and fall back to OFFSET; every Next/Previous link they render is a cursor.
+"""
+
+import base64
+import binascii
+import json
+from config import Config
+
+def encode_cursor(values, page, backward=False):
+    """
+    Build an opaque page token
+
+    Args:
+        values: sort column values of the boundary row (id last)
+        page: page number the token leads to
+        backward: True if the token leads to the previous page
+
+    Returns:
+        str: url-safe token
+    """
+    raw = json.dumps([list(values), int(page), int(backward)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Return (values, page, backward) from a token, or None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values, page, backward = json.loads(raw)
+        return list(values), max(1, int(page)), bool(backward)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+def clamp_per_page(per_page, default):
+    """Page size from the request, limited to 1..Config.MAX_PER_PAGE"""
+    return max(1, min(per_page or default, Config.MAX_PER_PAGE))
+
+class Keyset:
+    """
+    A sort order ending in the table's id, e.g.
+    Keyset(('date', 'DESC'), ('commodity', 'ASC', 'NULLS FIRST'), ('id', 'ASC'))
+
+    Columns that can hold NULL name where their NULLs sort ('NULLS FIRST' or
+    'NULLS LAST', as in the ORDER BY they mirror). Columns without one are
+    treated as NOT NULL, which keeps the seek on the leading column.
+    """
+
+    def __init__(self, *order):
+        self.order = [(column, direction) for column, direction, *_ in order]
+        self.columns = [column for column, _ in self.order]
+        self.nulls = {item[0]: item[2] for item in order if len(item) > 2}
+
+    def order_by(self, backward=False):
+        """ORDER BY clause; reversed when walking back to the previous page"""
+        terms = []
+        for column, direction in self.order:
+            ascending = (direction == 'ASC') != backward
+            term = f"{column} {'ASC' if ascending else 'DESC'}"
+            if column in self.nulls:
+                nulls_last = (self.nulls[column] == 'NULLS LAST') != backward
+                term += ' NULLS LAST' if nulls_last else ' NULLS FIRST'
+            terms.append(term)
+        return ', '.join(terms)
+
+    def values(self, row):
+        return [row[column] for column in self.columns]
+
+    def _toward_nulls(self, column, backward):
+        """True if walking in this direction moves toward the column's NULLs"""
+        return column in self.nulls and (self.nulls[column] == 'NULLS LAST') != backward
+
+    def _beyond(self, i, value, backward):
+        """(sql, params) for rows strictly past `value` in column i"""
+        column, direction = self.order[i]
+        op = '>' if (direction == 'ASC') != backward else '<'
+        toward_nulls = self._toward_nulls(column, backward)
+        if value is None:
+            # At the NULLs: nothing lies past them, or every value does
+            return ("0", []) if toward_nulls else (f"{column} IS NOT NULL", [])
+        if toward_nulls:
+            return f"({column} {op} ? OR {column} IS NULL)", [value]
+        return f"{column} {op} ?", [value]
+
+    def _equal(self, i, value):
+        column = self.columns[i]
+        if value is None:
+            return f"{column} IS NULL", []
+        return f"{column} = ?", [value]
+
+    def _rest(self, values, backward, start):
+        """(sql, params) for rows past the boundary in columns start.. when the earlier ones tie"""
+        last = len(self.order) - 1
+        sql, params = self._beyond(last, values[last], backward)
+        for i in range(last - 1, start - 1, -1):
+            beyond, beyond_params = self._beyond(i, values[i], backward)
+            equal, equal_params = self._equal(i, values[i])
+            sql = f"({beyond} OR ({equal} AND {sql}))"
+            params = beyond_params + equal_params + params
+        return sql, params
+
+    def after(self, values, backward=False):
+        """
+        WHERE conditions selecting the rows after (or before) a boundary row
+
+        Each condition seeks the index on the leading column: values are
+        bounded as `a >= ? AND (a > ? OR (...))`, NULLs as `a IS NULL AND
+        (...)`. Any OR with `a IS NULL` on the leading column makes SQLite
+        walk the whole index instead, so when the walk crosses from the
+        values into the NULLs (or back) the rest of the boundary's segment
+        and the other segment are separate conditions.
+
+        Returns:
+            list: (sql, params) per segment, in the order they are read
+        """
+        column, direction = self.order[0]
+        value = values[0]
+        toward_nulls = self._toward_nulls(column, backward)
+        if value is None:
+            sql, params = self._rest(values, backward, 1)
+            segments = [(f"{column} IS NULL AND {sql}", params)]
+            if not toward_nulls:
+                segments.append((f"{column} IS NOT NULL", []))
+            return segments
+
+        op = '>' if (direction == 'ASC') != backward else '<'
+        if len(self.order) > 1:
+            sql, params = self._rest(values, backward, 1)
+            sql = f"{column} {op}= ? AND ({column} {op} ? OR ({column} = ? AND {sql}))"
+            params = [value, value, value] + params
+        else:
+            sql, params = f"{column} {op} ?", [value]
+        segments = [(sql, params)]
+        if toward_nulls:
+            segments.append((f"{column} IS NULL", []))
+        return segments
+
+# Keyset orders for the listing pages; id breaks ties between equal sort values
+NEWS_ORDER = Keyset(('scraped_at', 'DESC'), ('id', 'DESC'))
+SCHEMES_ORDER = Keyset(('scraped_at', 'DESC'), ('id', 'DESC'))
+PRODUCT_ORDERS = {
+    'newest': Keyset(('scraped_at', 'DESC'), ('id', 'DESC')),
+    'low_to_high': Keyset(('price_paise', 'ASC', 'NULLS LAST'), ('id', 'ASC')),
+    'high_to_low': Keyset(('price_paise', 'DESC', 'NULLS LAST'), ('id', 'DESC')),
+}
+# The only order /market-prices shows; services/price_index.py keeps its
+# snapshot in it. save_to_database() always sets date, so only commodity is
+# declared nullable
+MARKET_ORDER = Keyset(('date', 'DESC'), ('commodity', 'ASC', 'NULLS FIRST'), ('id', 'ASC'))
+
+def page_queries(table, keyset, where=(), params=(), values=None, backward=False):
+    """
+    SELECTs reading one page of `table`, run in order until the page is full
+
+    Without boundary values this is a single query from the start of the
+    order; with them, one query per segment from Keyset.after(). Each ends
+    in `LIMIT ? OFFSET ?`, bound by the caller.
+
+    Returns:
+        list: (sql, params) per query
+    """
+    segments = keyset.after(values, backward) if values is not None else [(None, [])]
+    queries = []
+    for cond, cond_params in segments:
+        conds = list(where) + ([cond] if cond else [])
+        sql = f"SELECT * FROM {table}"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += f" ORDER BY {keyset.order_by(backward)} LIMIT ? OFFSET ?"
+        queries.append((sql, list(params) + cond_params))
+    return queries
+
+def paginate(conn, table, keyset, per_page, where=(), params=(), cursor=None, page=1):
+    """
+    Fetch one page of `table` in keyset order
+
+    With a valid cursor the page is found by seeking past the cursor's row;
+    otherwise `page` is read with OFFSET so numbered links keep working.
+
+    Args:
+        conn: database connection
+        table: table to read (SELECT *)
+        keyset: Keyset describing the ORDER BY
+        per_page: rows per page (already clamped)
+        where: filter conditions joined with AND
+        params: parameters for `where`
+        cursor: token from a previous page's next_cursor/prev_cursor
+        page: page number used when there is no cursor
+
+    Returns:
+        tuple: (rows, page, next_cursor, prev_cursor)
+    """
+    decoded = decode_cursor(cursor)
+    values, backward = None, False
+    if decoded:
+        values, page, backward = decoded
+        if len(values) != len(keyset.columns):
+            values, backward = None, False
+    page = max(1, page)
+    offset = 0 if values is not None else (page - 1) * per_page
+
+    rows = []
+    for query, args in page_queries(table, keyset, where, params, values, backward):
+        rows += conn.execute(query, args + [per_page + 1 - len(rows), offset]).fetchall()
+        if len(rows) > per_page:
+            break
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        # Walking back, the page we came from is always still ahead
+        if more or backward:
+            next_cursor = encode_cursor(keyset.values(rows[-1]), page + 1)
+        if page > 1:
+            prev_cursor = encode_cursor(keyset.values(rows[0]), page - 1, backward=True)
+    return rows, page, next_cursor, prev_cursor
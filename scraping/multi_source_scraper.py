@@ -1,6 +1,5 @@
 
 
-import sqlite3
 from datetime import datetime, timezone
 import sys
 from pathlib import Path
@@ -14,6 +13,10 @@ PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from db import get_connection
+from migrations import migrate
+from scraping.scraper_utils import parse_price
+
 try:
     from scraping.scraper_utils import clean_text
 except:
@@ -88,7 +91,7 @@ def print_product_details(products, source_name):
 
 def clear_search_products_table(db_path):
     """Delete ALL entries from search_products table"""
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cursor = conn.cursor()
     
     try:
@@ -104,9 +107,6 @@ def clear_search_products_table(db_path):
     
     except Exception as e:
         print(f"Cleanup error: {e}")
-    
-    finally:
-        conn.close()
 
 def scrape_agriplex(keyword, max_items=30):
     """Scrape Agriplex India search results"""
@@ -230,25 +230,11 @@ def search_all_sources(keyword, max_per_source=30):
     return all_products
 
 def ensure_table_exists(db_path):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute('''CREATE TABLE IF NOT EXISTS search_products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        category TEXT,
-        price TEXT,
-        image_url TEXT,
-        product_url TEXT,
-        source TEXT,
-        keyword TEXT,
-        scraped_at TEXT,
-        UNIQUE(name, source)
-    )''')
-    conn.commit()
-    conn.close()
+    """Create/upgrade search_products (schema lives in migrations.py)"""
+    migrate(db_path)
 
 def save_to_db(products, keyword, db_path):
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cur = conn.cursor()
     inserted = 0
     now = datetime.now(timezone.utc).isoformat()
@@ -257,17 +243,17 @@ def save_to_db(products, keyword, db_path):
         try:
             cur.execute('''
                 INSERT OR IGNORE INTO search_products
-                (name, category, price, image_url, product_url, source, keyword, scraped_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                (name, category, price, image_url, product_url, source, keyword, scraped_at,
+                 price_paise, price_currency, price_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (p['name'], p['category'], p['price'], p.get('image_url'),
-                  p.get('product_url'), p['source'], keyword, now))
+                  p.get('product_url'), p['source'], keyword, now) + parse_price(p['price']))
             if cur.rowcount > 0:
                 inserted += 1
         except Exception as e:
             print(f"  ✗ Insert error: {e}")
     
     conn.commit()
-    conn.close()
     return inserted
 
 def _get_db_path():
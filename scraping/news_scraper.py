@@ -1,4 +1,3 @@
-import sqlite3
 from datetime import datetime
 import sys
 from pathlib import Path
@@ -8,7 +7,7 @@ from urllib.parse import urljoin
 import re
 
 sys.path.append(str(Path(__file__).parent.parent))
-from config import Config
+from db import get_connection
 from scraping.scraper_utils import clean_text
 
 HEADERS = {
@@ -170,7 +169,7 @@ def scrape_farmer_news():
     print(f"Inserting {len(all_news)} news articles into database...")
     print("=" * 70)
 
-    conn = sqlite3.connect(Config.DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
 
     inserted = 0
@@ -203,7 +202,6 @@ def scrape_farmer_news():
             print(f"Error inserting news: {e}")
 
     conn.commit()
-    conn.close()
 
     print(f"\n{'=' * 70}")
     print("SCRAPING SUMMARY")
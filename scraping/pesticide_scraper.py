@@ -1,4 +1,3 @@
-import sqlite3
 from datetime import datetime, timezone
 import sys
 from pathlib import Path
@@ -11,6 +10,10 @@ PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from db import get_connection
+from migrations import migrate
+from scraping.scraper_utils import parse_price
+
 try:
     from scraping.scraper_utils import get_soup, clean_text, extract_price
 except Exception:
@@ -215,33 +218,11 @@ def scrape_agribegri_pesticides(max_pages=2, per_page_limit=None, delay=1.5):
     return products
 
 def ensure_tables_exist(db_path):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute('''CREATE TABLE IF NOT EXISTS pesticide_products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE,
-        category TEXT,
-        price TEXT,
-        description TEXT,
-        image_url TEXT,
-        product_url TEXT,
-        scraped_at TEXT
-    )''')
-    cur.execute('''CREATE TABLE IF NOT EXISTS equipment_products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE,
-        category TEXT,
-        price TEXT,
-        description TEXT,
-        image_url TEXT,
-        product_url TEXT,
-        scraped_at TEXT
-    )''')
-    conn.commit()
-    conn.close()
+    """Create/upgrade the product tables (schema lives in migrations.py)"""
+    migrate(db_path)
 
 def insert_products_into_db(products, db_path, table='pesticide_products'):
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cur = conn.cursor()
     inserted = 0
     duplicates = 0
@@ -251,10 +232,11 @@ def insert_products_into_db(products, db_path, table='pesticide_products'):
         try:
             cur.execute(f'''
                 INSERT OR IGNORE INTO {table}
-                (name, category, price, description, image_url, product_url, scraped_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                (name, category, price, description, image_url, product_url, scraped_at,
+                 price_paise, price_currency, price_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (p['name'], p['category'], p['price'], p.get('description', ''),
-                  p.get('image_url'), p.get('product_url'), now))
+                  p.get('image_url'), p.get('product_url'), now) + parse_price(p['price']))
             
             if cur.rowcount > 0:
                 inserted += 1
@@ -264,7 +246,6 @@ def insert_products_into_db(products, db_path, table='pesticide_products'):
             print(f"Insert error: {e}")
     
     conn.commit()
-    conn.close()
     return inserted, duplicates
 
 def export_csv(products, path="pesticide_products.csv"):
@@ -1,7 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-import sqlite3
 from datetime import datetime, timezone
 import sys
 from pathlib import Path
@@ -10,6 +9,9 @@ PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from db import get_connection
+from migrations import migrate
+
 BASE = "https://agriwelfare.gov.in"
 PAGE = "https://agriwelfare.gov.in/en/Major"
 
@@ -66,23 +68,11 @@ def parse_schemes(html):
     return schemes
 
 def ensure_schemes_table(db_path):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS government_schemes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            scheme_name TEXT UNIQUE,
-            publish_date TEXT,
-            doc_links TEXT,
-            apply_links TEXT,
-            scraped_at TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    """Create/upgrade government_schemes (schema lives in migrations.py)"""
+    migrate(db_path)
 
 def save_schemes_to_db(schemes, db_path):
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cur = conn.cursor()
     inserted = 0
     updated = 0
@@ -112,7 +102,6 @@ def save_schemes_to_db(schemes, db_path):
             print(f"Error saving scheme: {e}")
     
     conn.commit()
-    conn.close()
     return inserted
 
 def _get_db_path():
@@ -1,8 +1,17 @@
+import re
 import requests
 from bs4 import BeautifulSoup
 import time
 from config import Config
 
+# Currency markers seen on the scraped sites, checked in order
+CURRENCY_PATTERNS = [
+    ('INR', re.compile(r'₹|\brs\.?|\binr\b', re.IGNORECASE)),
+    ('USD', re.compile(r'\$|\busd\b', re.IGNORECASE)),
+]
+AMOUNT_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+ON_REQUEST_PATTERN = re.compile(r'on request|contact|call for|ask for', re.IGNORECASE)
+
 def get_soup(url, delay=Config.SCRAPING_DELAY):
     """
     Get BeautifulSoup object from URL with error handling
@@ -48,6 +57,32 @@ def extract_price(price_text):
     if not price_text:
         return "N/A"
     # Remove currency symbols and extra spaces
-    import re
     price = re.sub(r'[^\d.,]', '', price_text)
     return price if price else "N/A"
+
+def parse_price(price_text):
+    """
+    Normalise a display price such as "₹1,299.50" or "Rs. 450 - 500"
+
+    Ranges use their first (lowest) amount; text without a currency marker
+    is taken as rupees.
+
+    Returns:
+        tuple: (price in paise or None, currency or None, status) where
+               status is 'ok', 'missing', 'on_request' or 'unparsed'
+    """
+    if not price_text or not str(price_text).strip() or str(price_text).strip().upper() == 'N/A':
+        return None, None, 'missing'
+    text = str(price_text)
+
+    match = AMOUNT_PATTERN.search(text)
+    if not match:
+        status = 'on_request' if ON_REQUEST_PATTERN.search(text) else 'unparsed'
+        return None, None, status
+
+    currency = next((code for code, pattern in CURRENCY_PATTERNS if pattern.search(text)), 'INR')
+    try:
+        amount = float(match.group(0).replace(',', ''))
+    except ValueError:
+        return None, None, 'unparsed'
+    return int(round(amount * 100)), currency, 'ok'
@@ -1,9 +1,17 @@
 import requests
 import csv
 from datetime import datetime
-import sqlite3
+import sys
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+from db import get_connection, bump_generation
+from migrations import migrate
+
 CSV_API_TEMPLATE = (
     "https://api.agmarknet.gov.in/v1/dashboard-data/"
     "?dashboard=marketwise_price_arrival"
@@ -50,7 +58,19 @@ def download_and_parse_csv(date_str=None, save_csv=True):
             f.write(content)
         print(f"📁 Saved raw CSV: {file_path.resolve()}")
     
-    # Continue parsing
+    return parse_csv(content, date_str)
+
+def parse_csv(content, date_str):
+    """
+    Parse an Agmarknet marketwise report (as downloaded, or from downloads/)
+
+    Args:
+        content: CSV text
+        date_str: ingest day stored in the `date` column
+
+    Returns:
+        list: record dicts; `price_date` is the day the price columns refer to
+    """
     lines = content.splitlines()
     data_start = 0
     for i, line in enumerate(lines):
@@ -63,6 +83,13 @@ def download_and_parse_csv(date_str=None, save_csv=True):
     reader = csv.DictReader(lines[data_start:])
     date_label = next((h for h in reader.fieldnames if "Price on" in h), None)
     arrival_label = next((h for h in reader.fieldnames if "Arrival on" in h), None)
+    price_date = None
+    if date_label:
+        try:
+            price_date = datetime.strptime(date_label.split("Price on", 1)[1].strip(),
+                                           "%d %b, %Y").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
 
     records = []
     for row in reader:
@@ -76,6 +103,7 @@ def download_and_parse_csv(date_str=None, save_csv=True):
             "price": row.get(date_label, "").strip() if date_label else "",
             "arrival": row.get(arrival_label, "").strip() if arrival_label else "",
             "date": date_str,
+            "price_date": price_date,
         })
 
     print(f"✅ Parsed {len(records)} rows")
@@ -83,32 +111,11 @@ def download_and_parse_csv(date_str=None, save_csv=True):
 
 
 def ensure_price_table(db_path):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS agmarknet_prices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            commodity_group TEXT,
-            commodity TEXT,
-            variety TEXT,
-            msp TEXT,
-            price TEXT,
-            arrival TEXT,
-            date TEXT,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(commodity, variety, date)
-        )
-    ''')
-    # Add variety column if needed
-    try:
-        cur.execute("ALTER TABLE agmarknet_prices ADD COLUMN variety TEXT")
-    except sqlite3.OperationalError:
-        pass
-    conn.commit()
-    conn.close()
+    """Create/upgrade agmarknet_prices (schema lives in migrations.py)"""
+    migrate(db_path)
 
 def save_to_database(records, db_path):
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cur = conn.cursor()
     inserted = 0
     for r in records:
@@ -119,16 +126,25 @@ def save_to_database(records, db_path):
         ''', (r['commodity_group'], r['commodity'], r['variety'], r['msp'], r['price'], r['arrival'], r['date']))
         if cur.rowcount > 0:
             inserted += 1
+    # Invalidates the /market-prices facet cache in every process
+    bump_generation(conn, 'agmarknet_prices')
     conn.commit()
-    conn.close()
     return inserted
 
 def scrape_agmarknet_prices(date_str=None):
-    db_path = Path("database/farmer_portal.db")
+    db_path = Config.DATABASE_PATH
     ensure_price_table(db_path)
     records = download_and_parse_csv(date_str)
     inserted = save_to_database(records, db_path)
     print(f"Saved {inserted} records for {date_str or datetime.now()}")
+    if Config.PRICE_ARCHIVE_ENABLED:
+        # The archive is optional (needs pyarrow); never fail the ingest over it
+        try:
+            from services.price_archive import archive_records
+            files = archive_records(records)
+            print(f"📦 Archived to {len(files)} partition(s)")
+        except Exception as e:
+            print(f"⚠ Price archive skipped: {e}")
     return inserted
 
 if __name__ == "__main__":
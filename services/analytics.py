@@ -0,0 +1,233 @@
+"""
+Analytics rollups
+
+The analytics endpoints read small per-crop tables (migration 7) instead
+of grouping crops_data and user_predictions on every request:
+
+- crop_nutrient_stats: per-crop averages of crops_data, materialised when
+  init_db.py loads the dataset (refresh_nutrient_stats()).
+- prediction_crop_counts: predictions per crop, bumped by a trigger on every
+  insert into user_predictions, whichever path wrote the row.
+
+Both hold one row per crop, so reads cost O(#crops) however long the
+prediction history grows.
+
+prediction_rollups (migration 8) adds the same per-crop counts, plus sums of
+the inputs, per hour, day and month. The insert trigger files each row
+under its own prediction_date, which the write-behind buffer stamps when
+the prediction is made, so rows written late still reach the right
+bucket. Predictions without a crop are counted under ''. Because the
+history lives in the rollups, compact_predictions() can delete old raw
+rows. It keeps confirmed rows that the incremental retraining has not
+consumed yet.
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+from db import get_connection
+from migrations import BUCKET_FORMATS
+
+GRANULARITIES = tuple(BUCKET_FORMATS)
+
+# Range shown when the request gives no start
+DEFAULT_SPANS = {
+    'hour': timedelta(hours=48),
+    'day': timedelta(days=30),
+    'month': timedelta(days=365),
+}
+
+# Approximate bucket length, to refuse ranges with too many buckets
+BUCKET_LENGTHS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'month': timedelta(days=28),
+}
+
+TREND_INPUTS = [('N', 'sum_n'), ('P', 'sum_p'), ('K', 'sum_k'),
+                ('temperature', 'sum_temperature'), ('humidity', 'sum_humidity'),
+                ('ph', 'sum_ph'), ('rainfall', 'sum_rainfall'),
+                ('confidence', 'sum_confidence')]
+
+# Raw rows deleted per transaction while compacting
+COMPACT_BATCH = 5000
+
+def refresh_nutrient_stats(conn=None):
+    """
+    Recompute crop_nutrient_stats from crops_data
+
+    Returns:
+        int: number of crops
+    """
+    conn = conn or get_connection()
+    with conn:
+        conn.execute("DELETE FROM crop_nutrient_stats")
+        conn.execute('''
+            INSERT INTO crop_nutrient_stats
+            (label, avg_n, avg_p, avg_k, avg_temp, avg_humidity, avg_ph, avg_rainfall, sample_count)
+            SELECT label, AVG(N), AVG(P), AVG(K), AVG(temperature), AVG(humidity), AVG(ph),
+                   AVG(rainfall), COUNT(*)
+            FROM crops_data GROUP BY label
+        ''')
+    return conn.execute("SELECT COUNT(*) FROM crop_nutrient_stats").fetchone()[0]
+
+def nutrient_stats(conn=None):
+    """Per-crop average inputs, ordered by crop name"""
+    conn = conn or get_connection()
+    return conn.execute('''
+        SELECT label, avg_n, avg_p, avg_k, avg_temp, avg_humidity, avg_ph, avg_rainfall,
+               sample_count
+        FROM crop_nutrient_stats
+        ORDER BY label
+    ''').fetchall()
+
+def crop_distribution(conn=None):
+    """(crop, count) rows of all predictions so far, most predicted first"""
+    conn = conn or get_connection()
+    rows = conn.execute("SELECT crop, count FROM prediction_crop_counts").fetchall()
+    return sorted(rows, key=lambda row: row['count'], reverse=True)
+
+def _utc_now():
+    """Current time as naive UTC, matching prediction_date"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _parse_time(value, default):
+    """ISO date/time as naive UTC, matching prediction_date"""
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def prediction_trends(granularity='day', start=None, end=None, crop=None, conn=None):
+    """
+    Per-bucket prediction counts and average inputs
+
+    Args:
+        granularity: 'hour', 'day' or 'month'
+        start: ISO date/time of the first bucket (default: DEFAULT_SPANS before end)
+        end: ISO date/time of the last bucket (default: now, UTC like prediction_date)
+        crop: only count this predicted crop
+
+    Returns:
+        dict: {granularity, start, end, buckets: [{bucket, count, crops, avg}]}
+
+    Raises:
+        ValueError: unknown granularity, unparseable dates or too many buckets
+    """
+    if granularity not in BUCKET_FORMATS:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    end_time = _parse_time(end, _utc_now())
+    start_time = _parse_time(start, end_time - DEFAULT_SPANS[granularity])
+    if start_time > end_time:
+        raise ValueError('start must not be after end')
+    if (end_time - start_time) / BUCKET_LENGTHS[granularity] > Config.TRENDS_MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {Config.TRENDS_MAX_BUCKETS} "
+                         f"{granularity} buckets; narrow it or use a coarser granularity")
+
+    fmt = BUCKET_FORMATS[granularity]
+    first, last = start_time.strftime(fmt), end_time.strftime(fmt)
+    query = "SELECT * FROM prediction_rollups WHERE granularity = ? AND bucket BETWEEN ? AND ?"
+    params = [granularity, first, last]
+    if crop:
+        query += " AND crop = ?"
+        params.append(crop)
+
+    conn = conn or get_connection()
+    buckets = {}
+    for row in conn.execute(query + " ORDER BY bucket, crop", params):
+        bucket = buckets.setdefault(row['bucket'], {
+            'bucket': row['bucket'], 'count': 0, 'crops': {},
+            'sums': dict.fromkeys((name for name, _ in TREND_INPUTS), 0.0)
+        })
+        bucket['count'] += row['count']
+        bucket['crops'][row['crop']] = row['count']
+        for name, column in TREND_INPUTS:
+            bucket['sums'][name] += row[column] or 0.0
+
+    for bucket in buckets.values():
+        sums = bucket.pop('sums')
+        bucket['avg'] = {name: round(total / bucket['count'], 2) for name, total in sums.items()}
+
+    return {
+        'granularity': granularity,
+        'start': first,
+        'end': last,
+        'crop': crop or None,
+        'buckets': list(buckets.values())
+    }
+
+def feedback_watermark():
+    """Last confirmed_seq consumed by incremental retraining (0 if unknown)"""
+    from ml_models.artifact import load_artifact
+    try:
+        _, manifest = load_artifact('full')
+    except (FileNotFoundError, ValueError):
+        return 0
+    return int(manifest.get('feedback_watermark') or 0)
+
+def compact_predictions(older_than_days=None, dry_run=False, conn=None):
+    """
+    Delete raw user_predictions rows older than the retention window
+
+    Their counts and input sums stay in prediction_rollups and
+    prediction_crop_counts. Confirmed rows past the feedback watermark are
+    kept for the next incremental model update.
+
+    Args:
+        older_than_days: retention in days (default Config.PREDICTION_RETENTION_DAYS)
+        dry_run: only count the rows that would be deleted
+
+    Returns:
+        int: rows deleted (or deletable, with dry_run)
+    """
+    days = Config.PREDICTION_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = (_utc_now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    watermark = feedback_watermark()
+    conn = conn or get_connection()
+    select = (
+        "SELECT id FROM user_predictions WHERE prediction_date < ? "
+        "AND NOT (confirmed_crop IS NOT NULL AND confirmed_seq > ?)"
+    )
+
+    if dry_run:
+        return conn.execute(f"SELECT COUNT(*) FROM ({select})", (cutoff, watermark)).fetchone()[0]
+
+    deleted = 0
+    while True:
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM user_predictions WHERE id IN ({select} LIMIT ?)",
+                (cutoff, watermark, COMPACT_BATCH)
+            )
+        deleted += cursor.rowcount
+        if cursor.rowcount < COMPACT_BATCH:
+            return deleted
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Analytics rollups')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('refresh', help='recompute crop_nutrient_stats from crops_data')
+    compact = subparsers.add_parser('compact', help='delete raw predictions already rolled up')
+    compact.add_argument('--days', type=int, default=Config.PREDICTION_RETENTION_DAYS,
+                         help='keep raw rows this many days')
+    compact.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        print(f"✓ Nutrient stats refreshed for {refresh_nutrient_stats()} crops")
+    elif args.command == 'compact':
+        count = compact_predictions(args.days, args.dry_run)
+        verb = 'Would delete' if args.dry_run else 'Deleted'
+        print(f"✓ {verb} {count:,} predictions older than {args.days} days")
+    else:
+        print(prediction_trends('day'))
@@ -0,0 +1,121 @@
+"""
+Facet lists and filtered row counts for /market-prices
+
+agmarknet_prices only changes when save_to_database() ingests a CSV, so the
+filter dropdowns (commodity group, commodity, variety, each with its row
+count) and the COUNT(*) behind the page numbers are computed once per
+ingest instead of once per request. save_to_database() bumps the table's
+row in cache_generations in the same transaction; each request reads that
+counter (a primary-key lookup) and drops the cache when it moved, which
+also keeps several server processes in step.
+
+A result is only stored if the generation it was computed under is still
+the current one, so a count that was running while an ingest committed
+cannot land in the cache of the new generation.
+"""
+
+import threading
+from collections import OrderedDict
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+from db import get_connection, read_generation
+
+FACET_COLUMNS = ('commodity_group', 'commodity', 'variety')
+
+class FacetCache:
+    """Per-process cache of agmarknet_prices facets, keyed by the table's generation"""
+
+    def __init__(self, table='agmarknet_prices', max_counts=None):
+        self.table = table
+        self.max_counts = max_counts or Config.FACET_COUNT_CACHE_SIZE
+        self._generation = None
+        self._facets = None
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check(self, conn):
+        """Drop the cache if the table changed; returns the generation read"""
+        generation = read_generation(conn, self.table)
+        if generation != self._generation:
+            with self._lock:
+                self._generation = generation
+                self._facets = None
+                self._counts.clear()
+        return generation
+
+    def facets(self, conn=None):
+        """
+        Distinct values of each facet column with their row counts
+
+        Returns:
+            dict: {column: [(value, count), ...] ordered by value}
+        """
+        conn = conn or get_connection()
+        generation = self._check(conn)
+        facets = self._facets
+        if facets is None:
+            facets = {
+                column: [tuple(row) for row in conn.execute(
+                    f"SELECT {column}, COUNT(*) FROM {self.table} "
+                    f"GROUP BY {column} ORDER BY {column}"
+                )]
+                for column in FACET_COLUMNS
+            }
+            with self._lock:
+                if self._generation == generation:
+                    self._facets = facets
+        return facets
+
+    def count(self, where, params, conn=None):
+        """
+        COUNT(*) of the rows matching a filter, memoised per filter
+
+        Args:
+            where: SQL conditions joined with AND
+            params: their parameters
+
+        Returns:
+            int: matching rows
+        """
+        conn = conn or get_connection()
+        generation = self._check(conn)
+        key = (tuple(where), tuple(params))
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return self._counts[key]
+
+        query = f"SELECT COUNT(*) FROM {self.table}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        total = conn.execute(query, list(params)).fetchone()[0]
+
+        with self._lock:
+            self.misses += 1
+            if self._generation != generation:
+                # An ingest committed while counting; leave it to the next request
+                return total
+            self._counts[key] = total
+            while len(self._counts) > self.max_counts:
+                self._counts.popitem(last=False)
+        return total
+
+    def info(self):
+        return {
+            'generation': self._generation,
+            'facets_cached': self._facets is not None,
+            'counts_cached': len(self._counts),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+price_facets = FacetCache()
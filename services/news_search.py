@@ -0,0 +1,93 @@
+"""
+Full-text search over news_articles
+
+Searches the news_fts FTS5 index (migration 6), which triggers keep in step
+with every insert, update and delete on news_articles. Results are ordered
+by BM25 with headline matches weighted above summary matches, and each
+row carries a short snippet with the matched terms wrapped in <mark>.
+
+User input is never passed to MATCH as-is: it is split into words, each
+quoted as a literal, and the last word becomes a prefix query so partial
+input ("fert") finds "fertiliser". A trailing * on any word also asks for
+a prefix match.
+"""
+
+import re
+import sys
+from pathlib import Path
+from markupsafe import Markup, escape
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db import get_connection
+
+# Private-use characters mark the hits so the text can be escaped first
+HIT_START, HIT_END = '', ''
+SNIPPET_TOKENS = 16
+
+TERM_PATTERN = re.compile(r'(\w+)(\*?)', re.UNICODE)
+
+SEARCH_SQL = f'''
+    SELECT news_articles.*,
+           snippet(news_fts, -1, '{HIT_START}', '{HIT_END}', '…', {SNIPPET_TOKENS}) AS snippet,
+           news_fts.rank AS rank
+    FROM news_fts
+    JOIN news_articles ON news_articles.id = news_fts.rowid
+    WHERE news_fts MATCH ?
+    ORDER BY news_fts.rank
+    LIMIT ? OFFSET ?
+'''
+
+def fts_query(text):
+    """
+    Turn free text into a safe FTS5 query
+
+    Args:
+        text: search box input
+
+    Returns:
+        str: e.g. '"crop" "insur"*', or '' if the text has no words
+    """
+    terms = TERM_PATTERN.findall(text or '')
+    parts = []
+    for i, (word, star) in enumerate(terms):
+        prefix = star or i == len(terms) - 1
+        parts.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(parts)
+
+def highlight(snippet):
+    """HTML-escape a snippet and turn the hit markers into <mark> tags"""
+    html = str(escape(snippet or ''))
+    return Markup(html.replace(HIT_START, '<mark>').replace(HIT_END, '</mark>'))
+
+def count_news(text, conn=None):
+    """Number of articles matching `text`"""
+    query = fts_query(text)
+    if not query:
+        return 0
+    conn = conn or get_connection()
+    return conn.execute(
+        "SELECT COUNT(*) FROM news_fts WHERE news_fts MATCH ?", (query,)
+    ).fetchone()[0]
+
+def search_news(text, limit=10, offset=0, conn=None):
+    """
+    Best-ranked articles for `text`
+
+    Returns:
+        list: dicts of the news_articles columns plus `snippet` (HTML) and
+              `rank` (BM25, lower is better)
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    conn = conn or get_connection()
+    results = []
+    for row in conn.execute(SEARCH_SQL, (query, limit, offset)):
+        article = dict(row)
+        article['snippet'] = highlight(article['snippet'])
+        article['rank'] = round(article['rank'], 4)
+        results.append(article)
+    return results
@@ -0,0 +1,271 @@
+"""
+Write-behind buffer for user_predictions
+
+/api/predict hands its row to a bounded in-process queue and returns
+immediately. A background thread writes queued rows in batches, one
+transaction per batch, when either the batch size or the flush interval
+is reached. Remaining rows are flushed when the process exits.
+
+Rows carry the time they were submitted as prediction_date, so a row
+written late still counts in the hour and day of its request.
+
+flush() queues a marker behind the rows already buffered and waits for
+the thread to reach it, so it returns once those rows are written even
+while other requests keep adding more.
+"""
+
+import atexit
+import queue
+import threading
+import time
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+from db import get_connection
+
+INSERT_PREDICTION_SQL = '''
+    INSERT INTO user_predictions
+    (N, P, K, temperature, humidity, ph, rainfall, predicted_crop, confidence, prediction_uid,
+     prediction_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def prediction_timestamp():
+    """Current UTC time in the format of SQLite's CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+# The user_predictions_confirm trigger (migration 11) gives each new
+# confirmation the next confirmed_seq, which incremental retraining uses as
+# its watermark; repeating the same crop keeps the old one
+CONFIRM_PREDICTION_SQL = '''
+    UPDATE user_predictions
+    SET confirmed_crop = :crop,
+        confirmed_at = CURRENT_TIMESTAMP
+    WHERE prediction_uid = :uid
+'''
+
+OVERFLOW_POLICIES = ('block', 'sync', 'drop')
+
+# Seconds between lookups of a prediction another worker has not written yet
+CONFIRM_RETRY_INTERVAL = 0.1
+
+_STOP = object()
+
+
+class PredictionWriter:
+    """
+    Batches user_predictions inserts on a background thread
+
+    When the buffer is full the overflow policy decides what happens:
+        block - wait up to block_timeout for space, then write synchronously
+        sync  - write the row synchronously in the caller
+        drop  - discard the row (counted in stats()['dropped'])
+    """
+
+    def __init__(self, db_path, max_buffer=10000, batch_size=200, flush_interval=1.0,
+                 overflow='block', block_timeout=0.5):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.batches = 0
+        self.sync_writes = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, row):
+        """
+        Queue one (N, P, K, temperature, humidity, ph, rainfall, crop, confidence, uid) row
+
+        The row is stamped with the current time here, not when it is written.
+
+        Returns:
+            bool: False if the row was dropped
+        """
+        row = tuple(row) + (prediction_timestamp(),)
+        if self._closed:
+            self._write_sync([row])
+            return True
+        self._ensure_started()
+
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow == 'block':
+            try:
+                self._queue.put(row, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                pass
+        elif self.overflow == 'drop':
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        self._write_sync([row])
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Block until every row queued before this call has been written
+
+        Args:
+            timeout: seconds to wait at most (None waits until written)
+
+        Returns:
+            bool: False if the timeout passed first
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        written = threading.Event()
+        try:
+            self._queue.put(written, timeout=timeout)
+        except queue.Full:
+            return False
+        return written.wait(timeout)
+
+    def confirm(self, prediction_uid, crop, wait=None):
+        """
+        Record the crop grown for an earlier prediction
+
+        The prediction row may still be buffered: in this process (flushed
+        first) or in another worker, which writes it within its own flush
+        interval, so a miss is retried until `wait` seconds have passed.
+
+        Args:
+            prediction_uid: prediction_id returned by /api/predict
+            crop: confirmed crop label
+            wait: seconds to keep retrying (default Config.PREDICTION_FEEDBACK_WAIT)
+
+        Returns:
+            bool: False if no prediction with this id turned up
+        """
+        wait = Config.PREDICTION_FEEDBACK_WAIT if wait is None else wait
+        deadline = time.monotonic() + wait
+        self.flush(timeout=wait)
+        conn = get_connection(self.db_path)
+        while True:
+            with conn:
+                updated = conn.execute(CONFIRM_PREDICTION_SQL,
+                                       {'crop': crop, 'uid': prediction_uid}).rowcount
+            remaining = deadline - time.monotonic()
+            if updated or remaining <= 0:
+                return bool(updated)
+            time.sleep(min(CONFIRM_RETRY_INTERVAL, remaining))
+
+    def close(self, timeout=10):
+        """Flush remaining rows and stop the background thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'sync_writes': self.sync_writes,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'overflow': self.overflow
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='prediction-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, marker = self._collect()
+            if batch:
+                self._write(batch)
+            stopping = marker is _STOP
+            if marker is not None and not stopping:
+                # A flush() waiting for the rows queued ahead of it
+                marker.set()
+            for _ in range(len(batch) + (marker is not None)):
+                self._queue.task_done()
+
+    def _collect(self):
+        """
+        Wait for the first row, then gather more until the batch is full or the interval passes
+
+        Returns:
+            tuple: (rows, the _STOP or flush marker that ended the batch, or None)
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP or isinstance(item, threading.Event):
+                return batch, item
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch, None
+
+    def _write(self, rows):
+        try:
+            conn = get_connection(self.db_path)
+            with conn:
+                conn.executemany(INSERT_PREDICTION_SQL, rows)
+            with self._lock:
+                self.written += len(rows)
+                self.batches += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += len(rows)
+            print(f"Error writing {len(rows)} predictions: {e}")
+
+    def _write_sync(self, rows):
+        with self._lock:
+            self.sync_writes += len(rows)
+        self._write(rows)
+
+
+prediction_writer = PredictionWriter(
+    Config.DATABASE_PATH,
+    max_buffer=Config.PREDICTION_WRITE_BUFFER,
+    batch_size=Config.PREDICTION_WRITE_BATCH,
+    flush_interval=Config.PREDICTION_WRITE_INTERVAL,
+    overflow=Config.PREDICTION_WRITE_OVERFLOW,
+    block_timeout=Config.PREDICTION_WRITE_BLOCK_TIMEOUT
+)
+atexit.register(prediction_writer.close)
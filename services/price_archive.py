@@ -0,0 +1,265 @@
+"""
+Columnar archive of agmarknet_prices history
+
+Every ingest is also written, typed, to a Parquet file partitioned by
+ingest day:
+
+    Config.PRICE_ARCHIVE_DIR/date=2025-11-22/part-0.parquet
+
+msp, price and arrival are stored as float64 ("-" and blanks become null),
+dates as date32, and the text columns dictionary-encoded, so a year of
+history is a few megabytes and a long-range question about one commodity
+never touches the SQLite database. query_history() picks partitions by
+their directory name before opening anything, then reads only the columns
+asked for, with the commodity filter pushed down to the row groups.
+
+Re-archiving a day replaces that day's rows for the same (commodity,
+variety), like the INSERT OR REPLACE in save_to_database(), except that
+an archived price_date survives a row without one (agmarknet_prices has
+no price_date column, so backfill_from_db() never has it). Files are
+written beside the partition and renamed into place, so readers never see
+half a file.
+
+pyarrow is only imported when the archive is used; without it the scraper
+keeps working and just skips this stage.
+"""
+
+import os
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+
+TEXT_COLUMNS = ('commodity_group', 'commodity', 'variety')
+NUMERIC_COLUMNS = ('msp', 'price', 'arrival')
+COLUMNS = ('date', 'price_date') + TEXT_COLUMNS + NUMERIC_COLUMNS
+PARTITION_PATTERN = re.compile(r'^date=(\d{4}-\d{2}-\d{2})$')
+PART_FILE = 'part-0.parquet'
+DOWNLOAD_PATTERN = re.compile(r'^agmarknet_prices_(\d{4}-\d{2}-\d{2})\.csv$')
+
+def _arrow():
+    """(pyarrow, pyarrow.parquet), or a clear error if pyarrow is missing"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("The price archive needs pyarrow: pip install pyarrow") from None
+    return pyarrow, pyarrow.parquet
+
+def _schema(pa):
+    return pa.schema([
+        ('date', pa.date32()),
+        ('price_date', pa.date32()),
+        ('commodity_group', pa.dictionary(pa.int32(), pa.string())),
+        ('commodity', pa.dictionary(pa.int32(), pa.string())),
+        ('variety', pa.dictionary(pa.int32(), pa.string())),
+        ('msp', pa.float64()),
+        ('price', pa.float64()),
+        ('arrival', pa.float64()),
+    ])
+
+def to_number(value):
+    """Agmarknet cell as a float; '-', blanks and junk become None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '').strip())
+    except ValueError:
+        return None
+
+def _to_date(value):
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def partition_path(day, root=None):
+    """Parquet file holding one ingest day"""
+    root = Path(root or Config.PRICE_ARCHIVE_DIR)
+    return root / f"date={_to_date(day).isoformat()}" / PART_FILE
+
+def partitions(start=None, end=None, root=None):
+    """
+    Archived days within [start, end], oldest first, from directory names only
+
+    Returns:
+        list: (day 'YYYY-MM-DD', Path of the parquet file)
+    """
+    root = Path(root or Config.PRICE_ARCHIVE_DIR)
+    if not root.is_dir():
+        return []
+    start = _to_date(start).isoformat() if start else None
+    end = _to_date(end).isoformat() if end else None
+    found = []
+    for entry in root.iterdir():
+        match = PARTITION_PATTERN.match(entry.name)
+        if not match or not (entry / PART_FILE).is_file():
+            continue
+        day = match.group(1)
+        if (start and day < start) or (end and day > end):
+            continue
+        found.append((day, entry / PART_FILE))
+    return sorted(found)
+
+def _write_partition(day, rows, root):
+    """Merge rows into one day's file (newest wins per commodity/variety)"""
+    pa, pq = _arrow()
+    path = partition_path(day, root)
+    merged = {}
+    if path.exists():
+        for row in pq.read_table(path).to_pylist():
+            merged[(row['commodity'], row['variety'])] = row
+    for row in rows:
+        key = (row['commodity'], row['variety'])
+        # Rows backfilled from agmarknet_prices have no price_date; keep the CSV's
+        if row['price_date'] is None and key in merged:
+            row = {**row, 'price_date': merged[key]['price_date']}
+        merged[key] = row
+
+    ordered = sorted(merged.values(), key=lambda r: tuple(r[c] or '' for c in TEXT_COLUMNS))
+    table = pa.Table.from_pylist(ordered, schema=_schema(pa))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    pq.write_table(table, tmp, compression='zstd')
+    os.replace(tmp, path)
+    return path
+
+def archive_records(records, root=None):
+    """
+    Write parsed price records into their day partitions
+
+    Args:
+        records: dicts as produced by agmarknet_csv_scraper.parse_csv()
+                 (or agmarknet_prices rows); `date` picks the partition
+        root: archive directory (default Config.PRICE_ARCHIVE_DIR)
+
+    Returns:
+        list: paths of the partitions written
+    """
+    by_day = {}
+    for record in records:
+        if not record.get('commodity') or not record.get('date'):
+            continue
+        row = {
+            'date': _to_date(record['date']),
+            'price_date': _to_date(record.get('price_date')),
+            **{column: (record.get(column) or '').strip() for column in TEXT_COLUMNS},
+            **{column: to_number(record.get(column)) for column in NUMERIC_COLUMNS},
+        }
+        by_day.setdefault(row['date'], []).append(row)
+    return [_write_partition(day, rows, root) for day, rows in sorted(by_day.items())]
+
+def backfill_from_db(conn=None, root=None):
+    """
+    Archive every day already in agmarknet_prices
+
+    Returns:
+        int: partitions written
+    """
+    from db import get_connection
+    conn = conn or get_connection()
+    rows = conn.execute('''
+        SELECT commodity_group, commodity, variety, msp, price, arrival, date
+        FROM agmarknet_prices
+    ''').fetchall()
+    return len(archive_records([dict(row) for row in rows], root))
+
+def backfill_from_downloads(directory=None, root=None):
+    """
+    Archive the raw CSVs kept in downloads/ by the scraper
+
+    Returns:
+        int: partitions written
+    """
+    from services.agmarknet_csv_scraper import parse_csv
+    directory = Path(directory or PROJECT_ROOT / 'downloads')
+    written = 0
+    for path in sorted(directory.glob('agmarknet_prices_*.csv')):
+        match = DOWNLOAD_PATTERN.match(path.name)
+        if not match:
+            continue
+        records = parse_csv(path.read_text(encoding='utf-8'), match.group(1))
+        written += len(archive_records(records, root))
+    return written
+
+def query_history(commodity=None, start=None, end=None, columns=None,
+                  variety=None, commodity_group=None, root=None):
+    """
+    Price history from the archive, without touching SQLite
+
+    Args:
+        commodity: exact commodity name (None for all)
+        start: first ingest day, 'YYYY-MM-DD' (None for the oldest)
+        end: last ingest day, 'YYYY-MM-DD' (None for the newest)
+        columns: columns to return (default all of COLUMNS)
+        variety: exact variety name
+        commodity_group: exact commodity group
+
+    Returns:
+        pandas.DataFrame: matching rows ordered by date
+
+    Raises:
+        ValueError: unknown column or unparseable date
+        RuntimeError: pyarrow is not installed
+    """
+    columns = list(columns or COLUMNS)
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    if 'date' not in columns:
+        columns.insert(0, 'date')
+
+    pa, pq = _arrow()
+    schema = pa.schema([_schema(pa).field(c) for c in columns])
+    filters = [(column, '=', value) for column, value in
+               (('commodity', commodity), ('variety', variety),
+                ('commodity_group', commodity_group)) if value]
+
+    tables = []
+    for _, path in partitions(start, end, root):
+        table = pq.read_table(path, columns=columns, filters=filters or None)
+        if table.num_rows:
+            tables.append(table.cast(schema))
+    table = pa.concat_tables(tables) if tables else schema.empty_table()
+    return table.to_pandas()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Parquet archive of agmarknet_prices')
+    subparsers = parser.add_subparsers(dest='command')
+    backfill = subparsers.add_parser('backfill', help='archive days already ingested')
+    backfill.add_argument('--from-db', action='store_true', help='read agmarknet_prices')
+    backfill.add_argument('--from-downloads', action='store_true', help='read downloads/*.csv')
+    query = subparsers.add_parser('query', help='print archived history')
+    query.add_argument('--commodity')
+    query.add_argument('--start')
+    query.add_argument('--end')
+    query.add_argument('--columns', help='comma-separated, e.g. date,commodity,price')
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        both = not (args.from_db or args.from_downloads)
+        if args.from_db or both:
+            print(f"✓ {backfill_from_db()} partition(s) written from agmarknet_prices")
+        if args.from_downloads or both:
+            print(f"✓ {backfill_from_downloads()} partition(s) written from downloads/")
+    elif args.command == 'query':
+        columns = args.columns.split(',') if args.columns else None
+        history = query_history(args.commodity, args.start, args.end, columns)
+        print(history.to_string(index=False))
+        print(f"✓ {len(history):,} rows from {len(partitions(args.start, args.end))} partition(s)")
+    else:
+        days = partitions()
+        print(f"✓ {len(days)} archived day(s) in {Config.PRICE_ARCHIVE_DIR}")
+        if days:
+            print(f"  {days[0][0]} … {days[-1][0]}")
@@ -0,0 +1,297 @@
+"""
+In-memory columnar index over agmarknet_prices
+
+/market-prices filters on a handful of low-cardinality columns and always
+orders by (date DESC, commodity ASC, id ASC). The table is loaded once per
+ingest into NumPy columns, already in that order:
+
+- commodity_group, commodity, variety and date are dictionary-encoded
+  (sorted dictionaries, so code order is value order) into int32 codes;
+- each group, commodity and variety value has a posting list: the sorted
+  positions of its rows, which are therefore also in display order;
+- msp, price and arrival stay as object arrays, only read for the rows of
+  the page being shown.
+
+A filter starts from the shortest posting list and narrows it with code
+comparisons; `commodity LIKE '%x%'` is evaluated once per distinct
+commodity. The page is a slice of the result, and cursors are the same
+tokens pagination.py produces, so links work whichever path served them.
+
+The snapshot is rebuilt when the cache_generations counter bumped by
+save_to_database() moves. query() returns None whenever it cannot answer
+(disabled, table too large, rebuild in progress with no older snapshot,
+LIKE wildcards in the search), and the caller falls back to SQLite.
+"""
+
+import bisect
+import string
+import threading
+import time
+import numpy as np
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+from db import get_connection, read_generation
+from pagination import MARKET_ORDER, encode_cursor, decode_cursor
+
+TABLE = 'agmarknet_prices'
+CATEGORICAL = ('commodity_group', 'commodity', 'variety', 'date')
+FACETS = ('commodity_group', 'commodity', 'variety')
+# SQLite's LIKE only folds the case of ASCII letters; str.upper() folds all of Unicode
+_ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+PLAIN = ('msp', 'price', 'arrival', 'scraped_at')
+COLUMNS = ('id',) + CATEGORICAL + PLAIN
+
+def _dictionary(values):
+    """Sorted distinct values (None first, as SQLite sorts NULL) and int32 codes"""
+    distinct = sorted(set(values), key=lambda v: (v is not None, v))
+    lookup = {value: code for code, value in enumerate(distinct)}
+    return distinct, np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+
+def _code_between(dictionary, value):
+    """Code of `value`, or a half step between codes if it is not in the dictionary"""
+    if value is None:
+        return 0 if dictionary and dictionary[0] is None else -0.5
+    offset = 1 if dictionary and dictionary[0] is None else 0
+    i = bisect.bisect_left(dictionary, value, lo=offset)
+    if i < len(dictionary) and dictionary[i] == value:
+        return i
+    return i - 0.5
+
+class PriceSnapshot:
+    """agmarknet_prices as sorted columns with posting lists per facet value"""
+
+    def __init__(self, rows, generation):
+        self.generation = generation
+        self.size = len(rows)
+        columns = dict(zip(COLUMNS, zip(*rows))) if rows else {c: () for c in COLUMNS}
+
+        self.dictionaries, codes = {}, {}
+        for column in CATEGORICAL:
+            self.dictionaries[column], codes[column] = _dictionary(list(columns[column]))
+        ids = np.asarray(columns['id'], dtype=np.int64)
+
+        # date DESC, commodity ASC, id ASC (lexsort takes the last key as primary)
+        order = np.lexsort((ids, codes['commodity'], -codes['date']))
+        self.ids = ids[order]
+        self.codes = {column: code[order] for column, code in codes.items()}
+        self.plain = {column: np.asarray(columns[column], dtype=object)[order] for column in PLAIN}
+
+        self.postings = {}
+        for column in FACETS:
+            by_code = np.argsort(self.codes[column], kind='stable')
+            bounds = np.searchsorted(self.codes[column][by_code],
+                                     np.arange(len(self.dictionaries[column]) + 1))
+            self.postings[column] = [by_code[bounds[c]:bounds[c + 1]]
+                                     for c in range(len(self.dictionaries[column]))]
+        self._values = {column: np.array(self.dictionaries[column], dtype=object)
+                        for column in CATEGORICAL}
+        self._upper_commodities = [str(v).translate(_ASCII_UPPER) if v is not None else None
+                                   for v in self.dictionaries['commodity']]
+
+    def _code(self, column, value):
+        """Dictionary code of an exact value, None if no row has it"""
+        code = _code_between(self.dictionaries[column], value)
+        return code if code == int(code) else None
+
+    def select(self, search='', category='', commodity='', variety=''):
+        """Positions (display order) of the rows matching the filters"""
+        equal = [(column, value) for column, value in
+                 (('commodity_group', category), ('commodity', commodity), ('variety', variety))
+                 if value]
+        codes = []
+        for column, value in equal:
+            code = self._code(column, value)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            codes.append((column, code))
+
+        if codes:
+            codes.sort(key=lambda item: len(self.postings[item[0]][item[1]]))
+            column, code = codes[0]
+            positions = self.postings[column][code]
+            for column, code in codes[1:]:
+                positions = positions[self.codes[column][positions] == code]
+        else:
+            positions = np.arange(self.size)
+
+        if search:
+            # SQLite LIKE: case-insensitive for ASCII only
+            needle = search.translate(_ASCII_UPPER)
+            matching = [code for code, value in enumerate(self._upper_commodities)
+                        if value is not None and needle in value]
+            positions = positions[np.isin(self.codes['commodity'][positions], matching)]
+        return positions
+
+    def _sort_key(self, position):
+        return (-int(self.codes['date'][position]), int(self.codes['commodity'][position]),
+                int(self.ids[position]))
+
+    def _cursor_key(self, values):
+        date, commodity, row_id = values
+        return (-_code_between(self.dictionaries['date'], date),
+                _code_between(self.dictionaries['commodity'], commodity),
+                row_id)
+
+    def rows(self, positions):
+        """Materialise rows as dicts with the table's column names"""
+        columns = [self.ids[positions].tolist()]
+        for column in CATEGORICAL:
+            columns.append(self._values[column][self.codes[column][positions]].tolist())
+        for column in PLAIN:
+            columns.append(self.plain[column][positions].tolist())
+        return [dict(zip(COLUMNS, values)) for values in zip(*columns)]
+
+    def page(self, positions, per_page, cursor=None, page=1):
+        """
+        Slice one page out of the matching positions
+
+        Returns:
+            tuple: (rows as dicts, page, next_cursor, prev_cursor), as paginate()
+        """
+        decoded = decode_cursor(cursor)
+        if decoded and len(decoded[0]) == 3:
+            values, page, backward = decoded
+            boundary = self._cursor_key(values)
+            if backward:
+                end = bisect.bisect_left(positions, boundary, key=self._sort_key)
+                start = max(0, end - per_page)
+                # Walking back, the page we came from is always still ahead
+                more_after = True
+            else:
+                start = bisect.bisect_right(positions, boundary, key=self._sort_key)
+                end = start + per_page
+                more_after = end < len(positions)
+        else:
+            page = max(1, page)
+            start = (page - 1) * per_page
+            end = start + per_page
+            more_after = end < len(positions)
+
+        rows = self.rows(positions[start:end])
+        next_cursor = prev_cursor = None
+        if rows:
+            if more_after:
+                next_cursor = encode_cursor(MARKET_ORDER.values(rows[-1]), page + 1)
+            if page > 1:
+                prev_cursor = encode_cursor(MARKET_ORDER.values(rows[0]), page - 1, backward=True)
+        return rows, page, next_cursor, prev_cursor
+
+class PriceIndex:
+    """Self-refreshing PriceSnapshot shared by the request threads"""
+
+    def __init__(self, db_path=None, max_rows=None):
+        self.db_path = db_path
+        self.max_rows = max_rows or Config.PRICE_INDEX_MAX_ROWS
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.build_seconds = None
+        self.too_large = False
+
+    def build(self, conn=None):
+        """Load the table into a new snapshot and swap it in"""
+        conn = conn or get_connection(self.db_path)
+        start = time.perf_counter()
+        # Counter first: an ingest landing in between only causes one more rebuild
+        generation = read_generation(conn, TABLE)
+        total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+        if total > self.max_rows:
+            self.too_large, self._snapshot = True, None
+            return None
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM {TABLE}").fetchall()
+        snapshot = PriceSnapshot([tuple(r) for r in rows], generation)
+        self.build_seconds = round(time.perf_counter() - start, 4)
+        self.too_large = False
+        self._snapshot = snapshot
+        return snapshot
+
+    def get(self, conn=None):
+        """Current snapshot, rebuilt first if the table changed; None if unavailable"""
+        if not Config.PRICE_INDEX_ENABLED:
+            return None
+        conn = conn or get_connection(self.db_path)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.generation == read_generation(conn, TABLE):
+            return snapshot
+        if self._lock.acquire(blocking=False):
+            try:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.generation != read_generation(conn, TABLE):
+                    snapshot = self.build(conn)
+            finally:
+                self._lock.release()
+        # Another thread is rebuilding: serve the previous snapshot meanwhile
+        return snapshot
+
+    def query(self, search='', category='', commodity='', variety='',
+              per_page=100, cursor=None, page=1, conn=None):
+        """
+        Answer a /market-prices request from memory
+
+        Returns:
+            tuple: (rows, total, page, next_cursor, prev_cursor), or None to
+                   fall back to SQLite
+        """
+        if '%' in search or '_' in search:
+            return None
+        snapshot = self.get(conn)
+        if snapshot is None:
+            return None
+        positions = snapshot.select(search, category, commodity, variety)
+        rows, page, next_cursor, prev_cursor = snapshot.page(positions, per_page, cursor, page)
+        return rows, len(positions), page, next_cursor, prev_cursor
+
+    def info(self):
+        snapshot = self._snapshot
+        return {
+            'enabled': Config.PRICE_INDEX_ENABLED,
+            'loaded': snapshot is not None,
+            'rows': snapshot.size if snapshot else 0,
+            'generation': snapshot.generation if snapshot else None,
+            'build_seconds': self.build_seconds,
+            'too_large': self.too_large
+        }
+
+price_index = PriceIndex()
+
+if __name__ == '__main__':
+    # Build the index and compare a few queries against SQLite
+    from pagination import paginate
+
+    index = PriceIndex()
+    snapshot = index.build()
+    if snapshot is None:
+        print("✗ agmarknet_prices is larger than Config.PRICE_INDEX_MAX_ROWS")
+        sys.exit(1)
+    print(f"✓ Indexed {snapshot.size:,} rows in {index.build_seconds}s")
+    if not snapshot.size:
+        print("  agmarknet_prices is empty; run services/agmarknet_csv_scraper.py first")
+        sys.exit(0)
+
+    conn = get_connection()
+    # 'é' only matches itself: SQLite folds ASCII case, not accented letters
+    for filters in [{}, {'search': 'on'}, {'search': 'é'},
+                    {'category': snapshot.dictionaries['commodity_group'][-1]}]:
+        start = time.perf_counter()
+        for _ in range(100):
+            rows, total, *_ = index.query(per_page=100, **filters)
+        memory_ms = (time.perf_counter() - start) * 10
+
+        conds, params = [], []
+        if filters.get('search'):
+            conds, params = ["commodity LIKE ?"], [f"%{filters['search']}%"]
+        if filters.get('category'):
+            conds, params = ["commodity_group = ?"], [filters['category']]
+        start = time.perf_counter()
+        for _ in range(100):
+            expected, *_ = paginate(conn, TABLE, MARKET_ORDER, 100, conds, params)
+        sqlite_ms = (time.perf_counter() - start) * 10
+
+        same = [r['id'] for r in rows] == [r['id'] for r in expected]
+        print(f"{'✓' if same else '✗'} {filters or 'no filter'}: {total:,} rows, "
+              f"memory {memory_ms:.3f} ms, SQLite {sqlite_ms:.3f} ms")
@@ -9,7 +9,8 @@ document.getElementById('crop-form').addEventListener('submit', async function(e
         temperature: parseFloat(document.getElementById('temperature').value),
         humidity: parseFloat(document.getElementById('humidity').value),
         ph: parseFloat(document.getElementById('ph').value),
-        rainfall: parseFloat(document.getElementById('rainfall').value)
+        rainfall: parseFloat(document.getElementById('rainfall').value),
+        k: 4
     };
     
     // Show loading state
@@ -46,6 +47,24 @@ document.getElementById('crop-form').addEventListener('submit', async function(e
                 document.getElementById('crop-image').src = data.image;
             }
             
+            // Ranked alternatives from the same prediction
+            const alternatives = data.alternatives || [];
+            const altList = document.getElementById('alternatives-list');
+            altList.innerHTML = '';
+            alternatives.forEach(function(alt) {
+                const item = document.createElement('li');
+                item.className = 'flex justify-between text-gray-800';
+                const name = document.createElement('span');
+                name.className = 'font-semibold';
+                name.textContent = alt.crop.toUpperCase();
+                const conf = document.createElement('span');
+                conf.textContent = alt.confidence + '%';
+                item.appendChild(name);
+                item.appendChild(conf);
+                altList.appendChild(item);
+            });
+            document.getElementById('alternatives').classList.toggle('hidden', alternatives.length === 0);
+            
             document.getElementById('result').classList.remove('hidden');
         } else {
             // Show error
@@ -0,0 +1,93 @@
+"""
+The compiled forest reaches the same leaves as scikit-learn on raw inputs
+
+Labels must be identical. Probabilities may only differ by the order in
+which the trees' leaf values are averaged (PROBA_TOLERANCE).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from config import Config
+from ml_models.compiled_forest import CompiledForest, compile_forest, raw_thresholds
+from ml_models.predict import FEATURES
+from ml_models.train_model import distill_lite_model, split_dataset
+
+PROBA_TOLERANCE = 1e-12
+
+def assert_same_scores(compiled, model, scaler, rows):
+    scaled = scaler.transform(rows)
+    difference = np.abs(compiled.predict_proba(rows) - model.predict_proba(scaled))
+    assert difference.max() <= PROBA_TOLERANCE
+    assert (compiled.predict(rows) == model.predict(scaled)).all()
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(0)
+    # Seven inputs on very different scales, like N/P/K vs ph
+    X = rng.normal(size=(400, 7)) * [40, 30, 50, 5, 20, 0.8, 60] + [50, 50, 50, 25, 70, 6.5, 100]
+    y = np.array(['rice', 'maize', 'cotton', 'jute'])[(X[:, 0] > 50) + 2 * (X[:, 6] > 100)]
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0)
+    model.fit(scaler.transform(X), y)
+    X_new = rng.normal(size=(300, 7)) * [40, 30, 50, 5, 20, 0.8, 60] + [50, 50, 50, 25, 70, 6.5, 100]
+    return model, scaler, X, X_new
+
+def test_predict_proba_matches_sklearn(fitted):
+    model, scaler, X, X_new = fitted
+    compiled = CompiledForest(compile_forest(model, scaler))
+    rows = np.vstack([X, X_new])
+
+    assert_same_scores(compiled, model, scaler, rows)
+    assert list(compiled.classes_) == list(model.classes_)
+
+def test_single_rows_match_sklearn(fitted):
+    # One row takes the scalar walk instead of the vectorised one
+    model, scaler, _, X_new = fitted
+    compiled = CompiledForest(compile_forest(model, scaler))
+    for row in X_new[:20]:
+        assert_same_scores(compiled, model, scaler, row[None, :])
+
+def test_lite_tree_matches_its_regressor(fitted):
+    model, scaler, X, X_new = fitted
+    tree = distill_lite_model(model, scaler.transform(X), max_depth=6, augment=1)
+    lite = CompiledForest(compile_forest(tree, scaler, classes=model.classes_))
+    expected = np.clip(tree.predict(scaler.transform(X_new)), 0, None)
+    expected /= expected.sum(axis=1, keepdims=True)
+    assert np.abs(lite.predict_proba(X_new) - expected).max() <= PROBA_TOLERANCE
+
+def test_explanations_add_up_to_probabilities(fitted):
+    model, scaler, _, X_new = fitted
+    compiled = CompiledForest(compile_forest(model, scaler))
+    proba = compiled.predict_proba(X_new)
+    top = proba.argmax(axis=1)
+    bias, contributions = compiled.explain(X_new, top)
+    assert np.allclose(bias + contributions.sum(axis=1), proba[np.arange(len(X_new)), top])
+
+def test_raw_thresholds_match_the_float32_compare():
+    rng = np.random.default_rng(1)
+    threshold = rng.normal(size=2000).astype(np.float32).astype(np.float64)
+    mean, scale = rng.normal(size=2000) * 50, rng.uniform(0.1, 80, size=2000)
+    raw = raw_thresholds(threshold, mean, scale)
+
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+    assert goes_left(raw).all()
+    assert not goes_left(np.nextafter(raw, np.inf)).any()
+
+def test_real_dataset_parity():
+    data = pd.read_csv(Config.DATASET_PATH)
+    X_train, X_test, y_train, _ = split_dataset(data)
+    scaler = StandardScaler().fit(X_train.to_numpy(dtype=float))
+    model = RandomForestClassifier(n_estimators=30, max_depth=15, min_samples_leaf=2,
+                                   random_state=42)
+    model.fit(scaler.transform(X_train.to_numpy(dtype=float)), y_train)
+    compiled = CompiledForest(compile_forest(model, scaler))
+
+    rows = data[FEATURES].to_numpy(dtype=float)
+    # Inputs near the split points, where a float64 fold of the scaler used to disagree
+    jittered = rows * (1 + np.random.default_rng(0).normal(scale=1e-3, size=rows.shape))
+    assert_same_scores(compiled, model, scaler, np.vstack([rows, jittered]))
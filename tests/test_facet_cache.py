@@ -0,0 +1,68 @@
+"""Facet cache results never outlive the generation they were computed under"""
+
+import pytest
+
+from db import bump_generation, get_connection
+from migrations import migrate
+from services.facet_cache import FacetCache
+
+class Rows(list):
+    def fetchone(self):
+        return self[0] if self else None
+
+class IngestDuringQuery:
+    """
+    Connection where, right after the next query matching `marker` has read
+    its rows, an ingest commits and another request sees it, as a second
+    thread would
+    """
+
+    def __init__(self, conn, cache, marker):
+        self.conn, self.cache, self.marker = conn, cache, marker
+        self.fired = False
+
+    def execute(self, sql, params=()):
+        if self.marker not in sql or self.fired:
+            return self.conn.execute(sql, params)
+        self.fired = True
+        rows = Rows(self.conn.execute(sql, params).fetchall())
+        ingest(self.conn)
+        self.cache.count([], [], self.conn)
+        return rows
+
+def ingest(conn):
+    conn.execute("INSERT INTO agmarknet_prices (commodity_group, commodity, variety, date) "
+                 "VALUES ('Vegetables', 'Onion', ?, '2025-01-01')",
+                 (f"variety {conn.total_changes}",))
+    bump_generation(conn, 'agmarknet_prices')
+    conn.commit()
+
+@pytest.fixture
+def conn(tmp_path):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    conn = get_connection(db_path)
+    ingest(conn)
+    return conn
+
+def test_count_cached_until_ingest(conn):
+    cache = FacetCache()
+    assert cache.count(["commodity = ?"], ['Onion'], conn) == 1
+    assert cache.count(["commodity = ?"], ['Onion'], conn) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    ingest(conn)
+    assert cache.count(["commodity = ?"], ['Onion'], conn) == 2
+
+def test_count_from_old_generation_is_not_stored(conn):
+    cache = FacetCache()
+    racing = IngestDuringQuery(conn, cache, "commodity = ?")
+    # Counted before the ingest landed, so the answer is the old one...
+    assert cache.count(["commodity = ?"], ['Onion'], racing) == 1
+    # ...and it must not be served as the new generation's count
+    assert cache.count(["commodity = ?"], ['Onion'], conn) == 2
+
+def test_facets_from_old_generation_are_not_stored(conn):
+    cache = FacetCache()
+    racing = IngestDuringQuery(conn, cache, "GROUP BY commodity_group")
+    assert cache.facets(racing)['commodity_group'] == [('Vegetables', 1)]
+    assert cache.facets(conn)['commodity_group'] == [('Vegetables', 2)]
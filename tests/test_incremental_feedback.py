@@ -0,0 +1,138 @@
+"""Incremental retraining picks up confirmations in the order they arrive"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from config import Config
+from db import get_connection
+from migrations import migrate
+from ml_models.artifact import load_artifact, write_artifact
+from ml_models.compiled_forest import CompiledForest, compile_forest
+from ml_models.predict import FEATURES
+from ml_models.train_model import build_manifest, save_model_pair, update_crop_model
+from services.analytics import compact_predictions
+from services.prediction_writer import (CONFIRM_PREDICTION_SQL, INSERT_PREDICTION_SQL,
+                                        prediction_timestamp)
+
+PREDICTIONS = {
+    'p1': (90, 42, 43, 20.8, 82.0, 6.5, 202.9, 'rice'),
+    'p2': (71, 54, 16, 22.6, 63.7, 5.7, 87.8, 'maize'),
+    'p3': (40, 72, 77, 17.0, 16.9, 7.5, 88.6, 'chickpea'),
+    'p4': (13, 60, 25, 17.1, 20.6, 5.7, 128.3, 'kidneybeans'),
+}
+
+@pytest.fixture
+def portal(tmp_path, monkeypatch):
+    """A published model (watermark 0) and a database with four old predictions"""
+    monkeypatch.setattr(Config, 'DATABASE_PATH', tmp_path / 'portal.db')
+    monkeypatch.setattr(Config, 'MODEL_PATH', tmp_path / 'crop_model.pkl')
+    monkeypatch.setattr(Config, 'SCALER_PATH', tmp_path / 'scaler.pkl')
+    monkeypatch.setattr(Config, 'MODEL_CURRENT_PATH', tmp_path / 'MODEL_CURRENT')
+    monkeypatch.setattr(Config, 'ARTIFACT_DIR', tmp_path / 'artifacts')
+
+    data = pd.read_csv(Config.DATASET_PATH)
+    scaler = StandardScaler().fit(data[FEATURES].to_numpy(dtype=float))
+    model = RandomForestClassifier(n_estimators=5, max_depth=8, random_state=0)
+    model.fit(scaler.transform(data[FEATURES].to_numpy(dtype=float)), data['label'])
+    version = save_model_pair(pickle.dumps(model), pickle.dumps(scaler))
+    manifest = build_manifest(model, scaler, FEATURES, {})
+    manifest['feedback_watermark'] = 0
+    write_artifact(CompiledForest(compile_forest(model, scaler)).arrays, manifest, version)
+
+    migrate()
+    conn = get_connection()
+    with conn:
+        for uid, (*features, crop) in PREDICTIONS.items():
+            conn.execute(INSERT_PREDICTION_SQL, (*features, crop, 0.9, uid, '2020-01-01 00:00:00'))
+    return conn
+
+def confirm(conn, uid):
+    with conn:
+        conn.execute(CONFIRM_PREDICTION_SQL, {'crop': PREDICTIONS[uid][-1], 'uid': uid})
+
+def update(**options):
+    # The fixture's five shallow trees score about 98% on the held-out split
+    options = {'min_rows': 1, 'new_trees': 2, 'replay_ratio': 1, 'accuracy_floor': 0.9, **options}
+    version = update_crop_model(**options)
+    assert version is not None
+    return load_artifact('full')[1]
+
+def test_late_confirmation_is_trained_on(portal):
+    confirm(portal, 'p3')
+    confirm(portal, 'p4')
+    manifest = update()
+    assert manifest['metrics']['feedback_rows'] == 2
+
+    # Confirms a prediction older (lower id) than the ones already consumed
+    confirm(portal, 'p1')
+    manifest = update()
+    assert manifest['metrics']['feedback_rows'] == 1
+    assert manifest['feedback_watermark'] == 3
+
+def test_compaction_keeps_unconsumed_confirmations(portal):
+    confirm(portal, 'p3')
+    confirm(portal, 'p4')
+    update()
+    confirm(portal, 'p1')
+
+    assert compact_predictions(older_than_days=30) == 3
+    remaining = [row[0] for row in portal.execute("SELECT prediction_uid FROM user_predictions")]
+    assert remaining == ['p1']
+
+def test_confirmation_after_compaction_stays_above_watermark(portal):
+    confirm(portal, 'p3')
+    confirm(portal, 'p4')
+    assert update()['feedback_watermark'] == 2
+    # Deletes every row, including the one holding the highest confirmed_seq
+    assert compact_predictions(older_than_days=30) == 4
+
+    *features, crop = PREDICTIONS['p1']
+    with portal:
+        portal.execute(INSERT_PREDICTION_SQL,
+                       (*features, crop, 0.9, 'p5', prediction_timestamp()))
+        portal.execute(CONFIRM_PREDICTION_SQL, {'crop': crop, 'uid': 'p5'})
+    manifest = update()
+    assert manifest['metrics']['feedback_rows'] == 1
+    assert manifest['feedback_watermark'] == 3
+
+def test_updates_never_drop_the_base_trees(portal):
+    trees = pickle.loads(Config.MODEL_PATH.read_bytes()).estimators_
+    base = [tree.tree_.threshold.copy() for tree in trees]
+    for uid in ('p1', 'p2', 'p3'):
+        confirm(portal, uid)
+        manifest = update(max_trees=8)
+    assert manifest['base_trees'] == 5
+    assert manifest['metrics']['n_trees'] == 8
+
+    trees = pickle.loads(Config.MODEL_PATH.read_bytes()).estimators_
+    assert all(np.array_equal(tree.tree_.threshold, threshold)
+               for tree, threshold in zip(trees, base))
+    # No room left for update trees next to the base ones: a full training is due
+    confirm(portal, 'p4')
+    assert update_crop_model(min_rows=1, new_trees=2, max_trees=6) is None
+
+def test_update_below_floor_is_not_published(portal):
+    published = Config.MODEL_CURRENT_PATH.read_text()
+    confirm(portal, 'p3')
+    assert update_crop_model(min_rows=1, new_trees=2, replay_ratio=1, accuracy_floor=1.01) is None
+    assert Config.MODEL_CURRENT_PATH.read_text() == published
+    assert load_artifact('full')[1]['feedback_watermark'] == 0
+
+def test_update_redistils_the_lite_tier(portal):
+    confirm(portal, 'p3')
+    manifest = update()
+    lite_manifest = load_artifact('lite')[1]
+    assert lite_manifest['metrics']['distilled_from'] == manifest['version']
+
+def test_repeating_a_confirmation_keeps_its_place(portal):
+    confirm(portal, 'p2')
+    confirm(portal, 'p2')
+    seq = portal.execute(
+        "SELECT confirmed_seq FROM user_predictions WHERE prediction_uid = 'p2'"
+    ).fetchone()[0]
+    assert seq == 1
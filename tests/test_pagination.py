@@ -0,0 +1,86 @@
+"""Cursor pages match OFFSET pages, across the NULLs of nullable sort columns"""
+
+import random
+
+import pytest
+
+from db import get_connection
+from migrations import migrate
+from pagination import MARKET_ORDER, PRODUCT_ORDERS, paginate
+
+PER_PAGE = 7
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp('pages') / 'portal.db'
+    migrate(db_path)
+    conn = get_connection(db_path)
+    rng = random.Random(7)
+    conn.executemany(
+        "INSERT INTO search_products (keyword, name, source, price_paise, scraped_at) "
+        "VALUES (?, ?, 'test', ?, ?)",
+        [(rng.choice(['urea', 'dap']), f"product {i}",
+          rng.choice([None, None, 5000, 12000, rng.randrange(100, 90000)]),
+          f"2025-01-{rng.randrange(1, 29):02d} 00:00:00") for i in range(90)])
+    conn.executemany(
+        "INSERT INTO agmarknet_prices (commodity_group, commodity, variety, date) VALUES (?, ?, ?, ?)",
+        [(rng.choice(['Vegetables', 'Pulses']), rng.choice([None, 'Onion', 'Potato', 'Tur']),
+          f"variety {i}", f"2025-01-{rng.randrange(1, 6):02d}") for i in range(80)])
+    conn.commit()
+    return conn
+
+def _walk(conn, table, keyset, where=(), params=()):
+    """Pages reached through next cursors, then back through prev cursors"""
+    forward = []
+    rows, page, next_cursor, _ = paginate(conn, table, keyset, PER_PAGE, where, params)
+    forward.append((page, [row['id'] for row in rows]))
+    while next_cursor:
+        rows, page, next_cursor, prev_cursor = paginate(
+            conn, table, keyset, PER_PAGE, where, params, cursor=next_cursor)
+        forward.append((page, [row['id'] for row in rows]))
+
+    backward = []
+    while prev_cursor:
+        rows, page, _, prev_cursor = paginate(
+            conn, table, keyset, PER_PAGE, where, params, cursor=prev_cursor)
+        backward.append((page, [row['id'] for row in rows]))
+    return forward, backward
+
+def _offset_pages(conn, table, keyset, where, params, count):
+    return [(page, [row['id'] for row in paginate(
+        conn, table, keyset, PER_PAGE, where, params, page=page)[0]])
+        for page in range(1, count + 1)]
+
+@pytest.mark.parametrize('table, keyset, where, params', [
+    ('search_products', PRODUCT_ORDERS['newest'], (), ()),
+    ('search_products', PRODUCT_ORDERS['low_to_high'], (), ()),
+    ('search_products', PRODUCT_ORDERS['high_to_low'], (), ()),
+    ('search_products', PRODUCT_ORDERS['low_to_high'], ('keyword = ?',), ('urea',)),
+    ('search_products', PRODUCT_ORDERS['high_to_low'], ('keyword = ?',), ('urea',)),
+    ('agmarknet_prices', MARKET_ORDER, (), ()),
+    ('agmarknet_prices', MARKET_ORDER, ('commodity_group = ?',), ('Pulses',)),
+])
+def test_cursor_walk_matches_offset(conn, table, keyset, where, params):
+    forward, backward = _walk(conn, table, keyset, where, params)
+    expected = _offset_pages(conn, table, keyset, where, params, len(forward))
+    assert forward == expected
+    assert backward == expected[-2::-1]
+
+    total = conn.execute(
+        f"SELECT COUNT(*) FROM {table}" + (f" WHERE {' AND '.join(where)}" if where else ""),
+        params).fetchone()[0]
+    ids = [row_id for _, page_ids in forward for row_id in page_ids]
+    assert len(ids) == len(set(ids)) == total
+
+def test_segments_seek_the_price_index():
+    # Walking toward the NULLs: finish the values, then read the NULLs from the start
+    (values_sql, values_params), (nulls_sql, nulls_params) = \
+        PRODUCT_ORDERS['low_to_high'].after([5000, 3])
+    assert values_sql.startswith('price_paise >= ? AND ')
+    assert 'IS NULL' not in values_sql and values_params == [5000, 5000, 5000, 3]
+    assert (nulls_sql, nulls_params) == ('price_paise IS NULL', [])
+
+    # Walking back out of the NULLs: finish them, then the values from the top
+    segments = PRODUCT_ORDERS['low_to_high'].after([None, 3], backward=True)
+    assert segments == [('price_paise IS NULL AND id < ?', [3]),
+                        ('price_paise IS NOT NULL', [])]
@@ -0,0 +1,38 @@
+"""prediction_rollups, filled by the insert trigger and by migration 8's backfill"""
+
+import migrations
+from db import get_connection
+from migrations import migrate
+from services.prediction_writer import INSERT_PREDICTION_SQL
+
+def _row(crop, uid, when='2025-03-01 09:30:00'):
+    return (90, 42, 43, 20.8, 82.0, 6.5, 202.9, crop, 0.9, uid, when)
+
+def _rollups(conn):
+    return [tuple(row) for row in conn.execute(
+        "SELECT bucket, crop, count FROM prediction_rollups WHERE granularity = 'day' "
+        "ORDER BY crop")]
+
+def test_prediction_without_crop_is_counted(tmp_path):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    conn = get_connection(db_path)
+    with conn:
+        conn.executemany(INSERT_PREDICTION_SQL, [_row('rice', 'a'), _row(None, 'b')])
+    assert _rollups(conn) == [('2025-03-01', '', 1), ('2025-03-01', 'rice', 1)]
+
+def test_backfill_of_legacy_rows_without_crop(tmp_path, monkeypatch):
+    db_path = tmp_path / 'portal.db'
+    monkeypatch.setattr(migrations, 'MIGRATIONS',
+                        [m for m in migrations.MIGRATIONS if m[0] <= 7])
+    migrate(db_path)
+    conn = get_connection(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO user_predictions (N, P, K, temperature, humidity, ph, rainfall, "
+            "predicted_crop, confidence, prediction_uid, prediction_date) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [_row(None, 'old'), _row('rice', 'r')])
+    monkeypatch.undo()
+
+    migrate(db_path)
+    assert _rollups(conn) == [('2025-03-01', '', 1), ('2025-03-01', 'rice', 1)]
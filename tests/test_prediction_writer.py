@@ -0,0 +1,89 @@
+"""Write-behind buffer for user_predictions"""
+
+import threading
+import time
+
+from db import get_connection
+from migrations import migrate
+import services.prediction_writer as prediction_writer
+from services.prediction_writer import PredictionWriter
+
+def _row(uid):
+    return (90, 42, 43, 20.8, 82.0, 6.5, 202.9, 'rice', 0.9, uid)
+
+def test_flush_returns_under_steady_traffic(tmp_path):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    writer = PredictionWriter(db_path, batch_size=50, flush_interval=0.05)
+    stop = threading.Event()
+
+    def traffic():
+        i = 0
+        while not stop.is_set():
+            writer.submit(_row(f'bg-{i}'))
+            i += 1
+            time.sleep(0.0005)
+
+    thread = threading.Thread(target=traffic)
+    thread.start()
+    try:
+        time.sleep(0.1)
+        writer.submit(_row('mine'))
+        started = time.monotonic()
+        assert writer.flush(timeout=5)
+        assert time.monotonic() - started < 1
+        assert get_connection(db_path).execute(
+            "SELECT COUNT(*) FROM user_predictions WHERE prediction_uid = 'mine'"
+        ).fetchone()[0] == 1
+    finally:
+        stop.set()
+        thread.join()
+        writer.close()
+
+def test_close_writes_remaining_rows(tmp_path):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    writer = PredictionWriter(db_path, flush_interval=10)
+    for i in range(5):
+        writer.submit(_row(f'row-{i}'))
+    writer.close()
+    assert get_connection(db_path).execute(
+        "SELECT COUNT(*) FROM user_predictions"
+    ).fetchone()[0] == 5
+
+def test_confirm_waits_for_a_row_buffered_by_another_worker(tmp_path):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    # Two writers stand in for two worker processes
+    other = PredictionWriter(db_path, flush_interval=0.3)
+    local = PredictionWriter(db_path)
+    uid = 'a' * 32
+    try:
+        other.submit(_row(uid))
+        assert local.confirm(uid, 'maize', wait=3)
+        assert get_connection(db_path).execute(
+            "SELECT confirmed_crop FROM user_predictions WHERE prediction_uid = ?", (uid,)
+        ).fetchone()[0] == 'maize'
+        assert not local.confirm('b' * 32, 'maize', wait=0.2)
+    finally:
+        other.close()
+        local.close()
+
+def test_rows_keep_the_time_they_were_submitted(tmp_path, monkeypatch):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    writer = PredictionWriter(db_path, flush_interval=60)
+    monkeypatch.setattr(prediction_writer, 'prediction_timestamp', lambda: '2020-01-01 10:59:59')
+    writer.submit(_row('late'))
+    monkeypatch.undo()
+    # Written after the hour is over, still counted in it
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    conn = get_connection(db_path)
+    assert conn.execute(
+        "SELECT prediction_date FROM user_predictions WHERE prediction_uid = 'late'"
+    ).fetchone()[0] == '2020-01-01 10:59:59'
+    assert [tuple(row) for row in conn.execute(
+        "SELECT bucket FROM prediction_rollups WHERE granularity = 'hour'"
+    )] == [('2020-01-01 10:00',)]
@@ -0,0 +1,78 @@
+"""archive_records() / query_history() round trips through the Parquet archive"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from db import get_connection
+from migrations import migrate
+from services.price_archive import (archive_records, backfill_from_db, partitions,
+                                    query_history)
+
+def record(day, commodity, price, variety='Local', price_date=None, group='Vegetables'):
+    return {'date': day, 'price_date': price_date, 'commodity_group': group,
+            'commodity': commodity, 'variety': variety, 'msp': '-', 'price': price,
+            'arrival': '1,200'}
+
+@pytest.fixture
+def root(tmp_path):
+    archive_records([
+        record('2025-01-01', 'Onion', '1,500', price_date='2024-12-31'),
+        record('2025-01-01', 'Potato', '900', price_date='2024-12-31'),
+        record('2025-01-02', 'Onion', '1,650', price_date='2025-01-01'),
+        record('2025-01-02', 'Tur', '7000', price_date='2025-01-01', group='Pulses'),
+    ], tmp_path)
+    return tmp_path
+
+def test_round_trip_types(root):
+    history = query_history(root=root)
+    assert [day for day, _ in partitions(root=root)] == ['2025-01-01', '2025-01-02']
+    assert len(history) == 4
+    onion = history[history['commodity'] == 'Onion'].iloc[0]
+    assert onion['date'] == date(2025, 1, 1)
+    assert onion['price_date'] == date(2024, 12, 31)
+    assert onion['price'] == 1500.0 and onion['arrival'] == 1200.0
+    assert history['msp'].isna().all()
+
+def test_commodity_filter_and_date_range(root):
+    onion = query_history('Onion', root=root)
+    assert onion['price'].tolist() == [1500.0, 1650.0]
+    assert query_history('Onion', start='2025-01-02', root=root)['price'].tolist() == [1650.0]
+    assert query_history(commodity_group='Pulses', root=root)['commodity'].tolist() == ['Tur']
+    assert query_history('Garlic', root=root).empty
+
+def test_column_pruning(root):
+    history = query_history('Onion', columns=['price'], root=root)
+    # date is always kept so the rows stay ordered by day
+    assert list(history.columns) == ['date', 'price']
+    with pytest.raises(ValueError):
+        query_history(columns=['price', 'nonsense'], root=root)
+
+def test_rewriting_a_day_replaces_its_rows(root):
+    archive_records([record('2025-01-01', 'Onion', '1,550', price_date='2024-12-31'),
+                     record('2025-01-01', 'Onion', '2000', variety='Red',
+                            price_date='2024-12-31')], root)
+    day = query_history(start='2025-01-01', end='2025-01-01', root=root)
+    assert sorted(zip(day['commodity'], day['variety'], day['price'])) == [
+        ('Onion', 'Local', 1550.0), ('Onion', 'Red', 2000.0), ('Potato', 'Local', 900.0)]
+
+def test_backfill_keeps_archived_price_date(root, tmp_path):
+    db_path = tmp_path / 'portal.db'
+    migrate(db_path)
+    conn = get_connection(db_path)
+    conn.executemany(
+        "INSERT INTO agmarknet_prices (commodity_group, commodity, variety, msp, price, "
+        "arrival, date) VALUES ('Vegetables', ?, 'Local', '-', ?, '1,200', ?)",
+        [('Onion', '1,575', '2025-01-01'), ('Garlic', '4000', '2025-01-01')])
+    conn.commit()
+
+    assert backfill_from_db(conn, root) == 1
+    day = query_history(start='2025-01-01', end='2025-01-01', root=root).set_index('commodity')
+    assert day.loc['Onion', 'price'] == 1575.0
+    assert day.loc['Onion', 'price_date'] == date(2024, 12, 31)
+    assert day.loc['Potato', 'price_date'] == date(2024, 12, 31)
+    # Only rows never archived from a CSV are left without one
+    assert pd.isna(day.loc['Garlic', 'price_date'])
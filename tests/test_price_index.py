@@ -0,0 +1,63 @@
+"""The in-memory price index answers exactly like the SQLite path it replaces"""
+
+import pytest
+
+from db import get_connection
+from migrations import migrate
+from pagination import MARKET_ORDER, paginate
+from services.price_index import TABLE, PriceIndex
+
+COMMODITIES = ['Onion', 'onion (red)', 'Jeera (Cumin)', 'Méthi', 'MÉTHI leaves',
+               'Straße Bean', 'भिंडी (Bhindi)', None]
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp('prices') / 'portal.db'
+    migrate(db_path)
+    conn = get_connection(db_path)
+    conn.executemany(
+        "INSERT INTO agmarknet_prices (commodity_group, commodity, variety, price, date) "
+        "VALUES (?, ?, ?, '100', ?)",
+        [(group, commodity, f"{group} {day}", f"2025-01-0{day}")
+         for day in range(1, 6) for group in ('Vegetables', 'Spices')
+         for commodity in COMMODITIES])
+    conn.commit()
+    return conn
+
+@pytest.fixture(scope='module')
+def index(conn):
+    index = PriceIndex()
+    index.build(conn)
+    return index
+
+def _sqlite_walk(conn, search, per_page):
+    conds, params = ["commodity LIKE ?"], [f"%{search}%"]
+    total = conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE {conds[0]}", params).fetchone()[0]
+    pages, cursor = [], None
+    while True:
+        rows, _, cursor, _ = paginate(conn, TABLE, MARKET_ORDER, per_page, conds, params,
+                                      cursor=cursor)
+        pages.append([row['id'] for row in rows])
+        if not cursor:
+            return total, pages
+
+def _index_walk(index, conn, search, per_page):
+    pages, cursor = [], None
+    while True:
+        rows, total, _, cursor, _ = index.query(search, per_page=per_page, cursor=cursor,
+                                                conn=conn)
+        pages.append([row['id'] for row in rows])
+        if not cursor:
+            return total, pages
+
+@pytest.mark.parametrize('search', ['on', 'ON', 'cumin', 'méthi', 'MÉTHI', 'é', 'É',
+                                    'STRASSE', 'ß', 'भिं', 'bhindi'])
+def test_search_matches_sqlite_like(conn, index, search):
+    total, pages = _index_walk(index, conn, search, per_page=7)
+    assert (total, pages) == _sqlite_walk(conn, search, per_page=7)
+
+def test_non_ascii_case_is_not_folded(conn, index):
+    # SQLite's LIKE folds ASCII only, so 'é' does not match 'MÉTHI leaves'
+    rows, total, *_ = index.query('é', per_page=100, conn=conn)
+    assert {row['commodity'] for row in rows} == {'Méthi'}
+    assert total == 10
@@ -0,0 +1,35 @@
+"""EXPLAIN QUERY PLAN of the hot queries on a freshly migrated database"""
+
+import pytest
+
+from db import get_connection
+from migrations import HOT_QUERIES, explain, migrate, plan_problems
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp('plans') / 'portal.db'
+    migrate(db_path)
+    return get_connection(db_path)
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_plan(conn, name):
+    sql, params, expected = HOT_QUERIES[name]
+    plan = explain(conn, sql, params)
+    assert not [line for line in plan if 'TEMP B-TREE' in line], plan
+    assert plan_problems(plan, expected) == [], plan
+    if expected.startswith('SEARCH'):
+        assert not [line for line in plan if line.startswith('SCAN ')
+                    and 'VIRTUAL TABLE' not in line], plan
+
+def test_plan_problems_flags_index_walks():
+    # A keyset query that walks the index from the start instead of seeking
+    walk = ['SCAN search_products USING INDEX idx_search_products_price']
+    assert plan_problems(walk, 'SEARCH search_products USING INDEX idx_search_products_price')
+    assert plan_problems(['SCAN search_products'], 'SCAN search_products USING INDEX x')
+    assert plan_problems(
+        ['SEARCH news_articles USING INDEX idx_news_scraped_at (scraped_at<?)',
+         'USE TEMP B-TREE FOR ORDER BY'],
+        'SEARCH news_articles USING INDEX idx_news_scraped_at')
+    assert not plan_problems(
+        ['SEARCH search_products USING COVERING INDEX idx_search_products_keyword_price (keyword=?)'],
+        'SEARCH search_products USING INDEX idx_search_products_keyword_price')
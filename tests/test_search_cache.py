@@ -0,0 +1,28 @@
+"""search_hyperparameters() fold cache survives interrupted writes"""
+
+import json
+
+import numpy as np
+
+from ml_models.train_model import search_hyperparameters
+
+GRID = {'n_estimators': [3], 'max_depth': [2], 'min_samples_leaf': [1]}
+
+def search(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 3))
+    y = np.where(X[:, 0] > 0, 'a', 'b')
+    # A floor no configuration reaches skips compiling and timing candidates
+    return search_hyperparameters(X, y, None, X, accuracy_floor=2, n_folds=2, n_jobs=1,
+                                  grid=GRID, cache_dir=tmp_path)
+
+def test_truncated_cache_file_is_refit(tmp_path):
+    _, results = search(tmp_path)
+    paths = sorted(tmp_path.glob('*.json'))
+    assert len(paths) == 2 and not list(tmp_path.glob('*.tmp'))
+
+    # A run killed mid-write leaves half a file behind
+    paths[0].write_text(paths[0].read_text()[:5])
+    _, rerun = search(tmp_path)
+    assert rerun[0]['cv_accuracy'] == results[0]['cv_accuracy']
+    assert 'accuracy' in json.loads(paths[0].read_text())